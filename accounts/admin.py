@@ -1,8 +1,300 @@
-from django.contrib import admin
-from .models import Account,PasswordResetOTP
+import calendar
+from datetime import date, timedelta
+from functools import partial
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.core.cache import cache
+from django.db.models.functions import Lower
+from django.utils import formats, timezone
+from django.utils.text import capfirst
+from django.utils.translation import gettext as _
+
+from . import otp_store
+from .identity import normalize_identifier
+from .models import Account,PasswordResetOTP,EmailOutbox
 
 
 # Register your models here.
 
-admin.site.register(Account)
-admin.site.register(PasswordResetOTP)
\ No newline at end of file
+# --------------------
+# ACCOUNTS
+# --------------------
+# outcome of bulk OTP sends, per admin user, until their next changelist view
+BULK_RESULTS_KEY = "accounts_bulk_otp_results:{}"
+
+
+def record_bulk_result(user_pk, sent, failed):
+    """dispatch_bulk() callback: keep the counts for the admin who sent them."""
+    key = BULK_RESULTS_KEY.format(user_pk)
+    cache.set(key, cache.get(key, []) + [(sent, failed)], timeout=86400)
+
+
+@admin.register(Account)
+class AccountAdmin(admin.ModelAdmin):
+    actions = ["send_reset_otps"]
+
+    @admin.action(description="Send password reset OTPs to the selected accounts", permissions=["send_reset_otps"])
+    def send_reset_otps(self, request, queryset):
+        # bulk insert here, SMTP on a background thread: a large selection
+        # would outlast the request timeout. `manage.py send_reset_otps` for whole tenants
+        gmails = list(queryset.values_list("gmail", flat=True))
+        otp_store.queue_reset_otps(gmails, on_done=partial(record_bulk_result, request.user.pk))
+        self.message_user(
+            request,
+            f"{len(gmails)} OTP(s) issued and their earlier codes revoked; the emails are being sent "
+            f"in the background, reload this page for the result.",
+            messages.SUCCESS,
+        )
+
+    def has_send_reset_otps_permission(self, request):
+        return request.user.has_perm(f"{self.opts.app_label}.send_reset_otps")
+
+    def changelist_view(self, request, extra_context=None):
+        key = BULK_RESULTS_KEY.format(request.user.pk)
+        results = cache.get(key)
+        if results:
+            cache.delete(key)
+            for sent, failed in results:
+                if failed:
+                    self.message_user(
+                        request, f"Reset OTP emails: {sent} sent, {failed} failed (retried by drain_outbox).",
+                        messages.WARNING,
+                    )
+                else:
+                    self.message_user(request, f"Reset OTP emails: {sent} sent.", messages.SUCCESS)
+        return super().changelist_view(request, extra_context)
+
+
+# --------------------
+# PASSWORD RESET OTPS
+# --------------------
+# The table grows by a row per reset request, so its changelist must not do
+# what the default one does per page: COUNT(*) the whole (filtered) table
+# twice, OFFSET through it, sort and search on unindexed columns.
+
+CURSOR_VAR = "before"
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Newest rows first, a page at a time by primary key: the next page is
+    `pk < last pk shown` (?before=), so every page is one index range with
+    a LIMIT however deep it is. Counts are not exact: the unfiltered total
+    is estimated from the primary key range, a filtered one is counted up
+    to the admin's count_limit.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        try:
+            self.before = int(request.GET[CURSOR_VAR])
+        except (KeyError, ValueError):
+            self.before = None
+        super().__init__(request, *args, **kwargs)
+        # filter / search / date links start again from the newest rows
+        self.params.pop(CURSOR_VAR, None)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        queryset = self.queryset.order_by("-pk")
+        if self.before is not None:
+            queryset = queryset.filter(pk__lt=self.before)
+        rows = list(queryset[:self.list_per_page + 1])
+        self.result_list = rows[:self.list_per_page]
+        self.next_url = None
+        if len(rows) > self.list_per_page:
+            self.next_url = self.get_query_string({CURSOR_VAR: self.result_list[-1].pk})
+        self.newest_url = self.get_query_string(remove=[CURSOR_VAR]) if self.before is not None else None
+
+        self.result_count, self.count_is_estimate = self.model_admin.count(self.queryset)
+        self.count_is_capped = not self.count_is_estimate and self.result_count > self.model_admin.count_limit
+        # pagination.html shows the count; the search form shows its own when
+        # result_count != full_result_count, and would present it as exact
+        self.full_result_count = self.result_count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        # the pagination tag would page through cl.paginator; pagination.html
+        # links by cursor instead
+        self.multi_page = False
+        self.paginator = None
+
+
+    def date_drilldown(self):
+        """
+        The date hierarchy links (admin/date_hierarchy.html context) as the
+        admin's date_hierarchy tag builds them, but from the first and last
+        date in the list, two index lookups, instead of a SELECT DISTINCT
+        over every row; periods in between are listed even if empty.
+        """
+        field = self.date_hierarchy
+        dates = self.queryset.order_by().values_list(field, flat=True)
+        first, last = dates.order_by(field).first(), dates.order_by(f"-{field}").first()
+        if first is None:
+            return {"show": False}
+        first, last = (timezone.localtime(value) if timezone.is_aware(value) else value for value in (first, last))
+        year, month, day = (self.params.get(f"{field}__{part}") for part in ("year", "month", "day"))
+        if not (year or month or day) and first.year == last.year:
+            year = first.year
+            if first.month == last.month:
+                month = first.month
+
+        def link(filters):
+            return self.get_query_string(filters, [f"{field}__"])
+
+        def month_title(year, month):
+            return capfirst(formats.date_format(date(year, month, 1), "YEAR_MONTH_FORMAT"))
+
+        if year and month and day:
+            year, month, day = int(year), int(month), int(day)
+            return {
+                "show": True,
+                "back": {"link": link({f"{field}__year": year, f"{field}__month": month}), "title": month_title(year, month)},
+                "choices": [{"title": capfirst(formats.date_format(date(year, month, day), "MONTH_DAY_FORMAT"))}],
+            }
+        if year and month:
+            year, month = int(year), int(month)
+            days = [
+                date(year, month, number) for number in range(1, calendar.monthrange(year, month)[1] + 1)
+                if first.date() <= date(year, month, number) <= last.date()
+            ]
+            return {
+                "show": True,
+                "back": {"link": link({f"{field}__year": year}), "title": str(year)},
+                "choices": [
+                    {
+                        "link": link({f"{field}__year": year, f"{field}__month": month, f"{field}__day": day.day}),
+                        "title": capfirst(formats.date_format(day, "MONTH_DAY_FORMAT")),
+                    }
+                    for day in days
+                ],
+            }
+        if year:
+            year = int(year)
+            months = [number for number in range(1, 13) if (first.year, first.month) <= (year, number) <= (last.year, last.month)]
+            return {
+                "show": True,
+                "back": {"link": link({}), "title": _("All dates")},
+                "choices": [
+                    {"link": link({f"{field}__year": year, f"{field}__month": number}), "title": month_title(year, number)}
+                    for number in months
+                ],
+            }
+        return {
+            "show": True,
+            "back": None,
+            "choices": [
+                {"link": link({f"{field}__year": str(number)}), "title": str(number)}
+                for number in range(first.year, last.year + 1)
+            ],
+        }
+
+
+class OTPStateFilter(admin.SimpleListFilter):
+    title = "state"
+    parameter_name = "state"
+
+    def lookups(self, request, model_admin):
+        return [("active", "Active"), ("verified", "Verified, not used"), ("used", "Used")]
+
+    def queryset(self, request, queryset):
+        if self.value() == "active":
+            # recent rows only: a created_at index range, not a table scan
+            since = timezone.now() - timedelta(minutes=getattr(settings, "PASSWORD_RESET_OTP_EXPIRY_MINUTES", 10))
+            return queryset.filter(created_at__gte=since, is_used=False, is_verified=False)
+        if self.value() == "verified":
+            return queryset.filter(is_verified=True, is_used=False)
+        if self.value() == "used":
+            return queryset.filter(is_used=True)
+        return queryset
+
+
+class CreatedFilter(admin.SimpleListFilter):
+    title = "created"
+    parameter_name = "created"
+    RANGES = {"1h": ("Last hour", timedelta(hours=1)), "24h": ("Last 24 hours", timedelta(days=1)),
+              "7d": ("Last 7 days", timedelta(days=7))}
+
+    def lookups(self, request, model_admin):
+        return [(key, label) for key, (label, _) in self.RANGES.items()]
+
+    def queryset(self, request, queryset):
+        if self.value() in self.RANGES:
+            return queryset.filter(created_at__gte=timezone.now() - self.RANGES[self.value()][1])
+        return queryset
+
+
+@admin.register(PasswordResetOTP)
+class PasswordResetOTPAdmin(admin.ModelAdmin):
+    """
+    Read-only: codes are issued by the reset flow and live in the OTP hot tier
+    too (accounts/otp_store.py), which admin edits would bypass; old rows are
+    removed by `manage.py purge_otps`. The code itself is not shown.
+    """
+    list_display = ("id", "gmail", "created_at", "is_verified", "is_used")
+    list_filter = (OTPStateFilter, CreatedFilter)
+    date_hierarchy = "created_at"
+    search_fields = ("gmail",)  # see get_search_results()
+    search_help_text = "Gmail prefix, case-insensitive (e.g. alice@ or alice@exa)."
+    fields = ("gmail", "created_at", "is_verified", "is_used", "token")
+    ordering = ("-pk",)
+    sortable_by = ()
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    count_limit = 1000
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        # a range on otp_gmail_lower_idx; LIKE '%term%' (icontains) scans the table
+        prefix = normalize_identifier(search_term)
+        if not prefix:
+            return queryset, False
+        queryset = queryset.alias(gmail_lower=Lower("gmail"))
+        return queryset.filter(gmail_lower__gte=prefix, gmail_lower__lt=prefix + "\U0010ffff"), False
+
+    def count(self, queryset):
+        """(row count, is_estimate): estimated unfiltered, else counted up to count_limit + 1."""
+        if not queryset.query.where:
+            pks = queryset.order_by().values_list("pk", flat=True)
+            first, last = pks.order_by("pk").first(), pks.order_by("-pk").first()
+            return (0 if first is None else last - first + 1), True
+        return queryset.order_by()[:self.count_limit + 1].count(), False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    """
+    Read-only: rows are written and retried by accounts/outbox.py. The body
+    holds a live OTP code until the row is sent, so it is not shown.
+    """
+    list_display = ("id", "to", "subject", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    fields = ("to", "from_email", "subject", "status", "attempts", "next_attempt_at", "last_error", "created_at", "sent_at")
+    readonly_fields = fields
+    ordering = ("-pk",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
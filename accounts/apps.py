@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import metrics, query_budget
+
+        if metrics.enabled():
+            # db phase of the request histograms, see accounts/metrics.py
+            connection_created.connect(metrics.install_db_timer, dispatch_uid="accounts_metrics_db_timer")
+        # SQL capture for the per-endpoint query budgets (accounts/query_budget.py)
+        connection_created.connect(query_budget.install_recorder, dispatch_uid="accounts_query_recorder")
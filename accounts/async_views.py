@@ -0,0 +1,183 @@
+# accounts/async_views.py
+"""
+Native async versions of the accounts API views, for running under ASGI
+(myproject/asgi.py). DRF's APIView is sync-only, so under ASGI every request
+to accounts/views.py goes through the sync_to_async thread shim; these views
+run on the event loop instead:
+
+ - request parsing and field validation run inline
+ - DB access uses the async ORM (aget / alatest / aexists / asave / aupdate)
+ - password hashing is awaited on the hashing pool or a worker thread
+ - OTP mail is queued on the background mail pool after commit; only the
+   transactional OTP + outbox write hops to a thread (atomic() is sync-only)
+
+Responses are the same as the sync views. Enable them with
+ACCOUNTS_ASYNC_VIEWS = True (see accounts/urls.py); URL names are unchanged.
+"""
+
+import json
+import time
+
+from django.http import JsonResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import serializers, status
+
+from .events import log_response
+from .hashing import HashingBusy
+from .serializers import (
+    LoginSerializer,
+    OTPRequestSerializer,
+    OTPVerifySerializer,
+    ResetPasswordSerializer,
+    ResendOTPSerializer,
+)
+
+
+class DataJsonResponse(JsonResponse):
+    """JsonResponse that keeps its payload as .data, like DRF's Response."""
+
+    def __init__(self, data, **kwargs):
+        super().__init__(data, **kwargs)
+        self.data = data
+
+
+class AsyncAPIView(View):
+    """
+    Minimal async counterpart of APIView: POST only, JSON/form bodies in,
+    JSON out, CSRF-exempt like DRF views with token auth. Logs the same
+    per-request event as the sync views (accounts/events.py).
+    """
+    http_method_names = ["post", "options"]
+    event = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        started = time.perf_counter()
+        response = await self._dispatch(request, *args, **kwargs)
+        # not every response carries data: e.g. the 405 of View.http_method_not_allowed
+        errors = getattr(response, "data", None) if response.status_code >= 400 else None
+        log_response(self.event, response.status_code, payload=self.data, errors=errors, started=started)
+        return response
+
+    async def _dispatch(self, request, *args, **kwargs):
+        self.data = None
+        try:
+            self.data = self.parse(request)
+        except ValueError:
+            return DataJsonResponse({"detail": "JSON parse error"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except HashingBusy as busy:
+            return DataJsonResponse({"error": busy.detail}, status=busy.status_code)
+
+    @staticmethod
+    def parse(request):
+        if request.content_type == "application/json":
+            return json.loads(request.body or b"{}")
+        return request.POST.dict()
+
+    async def options(self, request, *args, **kwargs):
+        return DataJsonResponse({}, status=status.HTTP_200_OK)
+
+
+# --------------------
+# LOGIN VIEW
+# --------------------
+class AsyncLoginView(AsyncAPIView):
+    event = "accounts.login"
+
+    async def post(self, request):
+        serializer = LoginSerializer(data=self.data, context={"request": request})
+        if not await serializer.ais_valid():
+            return DataJsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return DataJsonResponse(serializer.validated_data, status=status.HTTP_200_OK)
+
+
+# --------------------
+# OTP REQUEST VIEW
+# --------------------
+class AsyncOTPRequestView(AsyncAPIView):
+    event = "accounts.otp_request"
+
+    async def post(self, request, *args, **kwargs):
+        serializer = OTPRequestSerializer(data=self.data)
+        if not await serializer.ais_valid():
+            return DataJsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            await serializer.asave()
+        except serializers.ValidationError as ve:
+            return DataJsonResponse({"error": ve.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as exc:
+            return DataJsonResponse({"error": f"failed to send otp: {str(exc)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return DataJsonResponse({"message": "OTP sent to email"}, status=status.HTTP_200_OK)
+
+
+# --------------------
+# OTP VERIFY VIEW
+# --------------------
+class AsyncOTPVerifyView(AsyncAPIView):
+    event = "accounts.otp_verify"
+
+    async def post(self, request, *args, **kwargs):
+        serializer = OTPVerifySerializer(data=self.data)
+        if not await serializer.ais_valid():
+            return DataJsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            reset_token = await serializer.asave()
+        except serializers.ValidationError as ve:
+            return DataJsonResponse(ve.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as exc:
+            return DataJsonResponse({"error": f"failed to mark otp verified: {str(exc)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return DataJsonResponse({"detail": "otp valid", "reset_token": reset_token}, status=status.HTTP_200_OK)
+
+
+# --------------------
+# RESET PASSWORD VIEW
+# --------------------
+class AsyncResetPasswordView(AsyncAPIView):
+    event = "accounts.reset_password"
+
+    async def post(self, request, *args, **kwargs):
+        serializer = ResetPasswordSerializer(data=self.data, context={"request": request})
+        if not await serializer.ais_valid():
+            return DataJsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            updated = await serializer.asave()
+        except serializers.ValidationError as ve:
+            return DataJsonResponse({"error": ve.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except HashingBusy:
+            raise
+        except Exception as exc:
+            return DataJsonResponse({"error": f"internal error while resetting password: {str(exc)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        if updated:
+            return DataJsonResponse({"detail": "password reset successful"}, status=status.HTTP_200_OK)
+        return DataJsonResponse({"error": "no account updated"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncResendOTPView(AsyncAPIView):
+    event = "accounts.resend_otp"
+
+    async def post(self, request, *args, **kwargs):
+        serializer = ResendOTPSerializer(data=self.data)
+        if not await serializer.ais_valid():
+            return DataJsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            await serializer.asave()
+        except serializers.ValidationError as ve:
+            return DataJsonResponse({"error": ve.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception:
+            return DataJsonResponse({"error": "internal server error"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return DataJsonResponse({"message": "OTP resent successfully"}, status=status.HTTP_200_OK)
@@ -0,0 +1,162 @@
+# accounts/authentication.py
+"""
+JWTAuthentication with per-process caches, so a client repeating the same
+access token costs neither the signature check nor the Account query:
+
+ - verified tokens: bounded LRU keyed by the raw token, each entry kept
+   until the token's exp (ACCOUNTS_JWT_TOKEN_CACHE_SIZE)
+ - accounts by id, only when ACCOUNTS_JWT_USER_CACHE_SECONDS > 0 (off by
+   default): bounded LRU, each entry kept at most that long
+   (ACCOUNTS_JWT_USER_CACHE_SIZE)
+
+    REST_FRAMEWORK = {
+        "DEFAULT_AUTHENTICATION_CLASSES": ("accounts.authentication.CachingJWTAuthentication",),
+    }
+
+The is_active / CHECK_REVOKE_TOKEN checks still run on every request, against
+the cached account. Cached accounts are dropped on post_save / post_delete of
+Account; queryset.update() sends no signal, so code changing accounts that
+way calls forget_accounts() (the password reset does). Both only reach the
+current process: other workers keep serving their copy, deactivated or with
+the old password, for up to ACCOUNTS_JWT_USER_CACHE_SECONDS. That is why the
+account cache is opt-in, for single-process deployments or ones that accept
+the delay; a shared version stamp would cost a cache read per request, about
+what the primary key query it saves costs on the SQLite cache.
+
+Token classes that check a blacklist on verification (BlacklistMixin) are
+never cached, their verification needs the database.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import BlacklistMixin
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import Account
+
+
+class ExpiringLRU:
+    """Thread-safe LRU of at most `size` entries, each with its own expiry time."""
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, expires):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard(self, predicate):
+        with self._lock:
+            for key in [key for key, (value, _) in self._entries.items() if predicate(value)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+tokens = ExpiringLRU(getattr(settings, "ACCOUNTS_JWT_TOKEN_CACHE_SIZE", 10000))
+users = ExpiringLRU(getattr(settings, "ACCOUNTS_JWT_USER_CACHE_SIZE", 10000))
+
+
+def forget_accounts(gmail=None):
+    """Drop cached accounts registered with `gmail`, or all of them."""
+    if gmail is None:
+        users.clear()
+    else:
+        gmail = gmail.lower()
+        users.discard(lambda user: user.gmail.lower() == gmail)
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def _forget_account(sender, instance, **kwargs):
+    users.pop(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+@receiver(setting_changed)
+def _resize(setting, **kwargs):
+    if setting == "ACCOUNTS_JWT_TOKEN_CACHE_SIZE":
+        tokens.size = getattr(settings, setting, 10000)
+        tokens.clear()
+    elif setting == "ACCOUNTS_JWT_USER_CACHE_SIZE":
+        users.size = getattr(settings, setting, 10000)
+        users.clear()
+    elif setting in ("SIMPLE_JWT", "SECRET_KEY"):
+        tokens.clear()
+
+
+class CachingJWTAuthentication(JWTAuthentication):
+    """simplejwt's JWTAuthentication, answering repeat tokens and accounts from memory."""
+
+    def get_validated_token(self, raw_token):
+        now = time.time()
+        validated_token = tokens.get(raw_token, now)
+        if validated_token is not None:
+            return validated_token
+        validated_token = super().get_validated_token(raw_token)
+        exp = validated_token.get("exp")
+        if exp is not None and not isinstance(validated_token, BlacklistMixin):
+            tokens.set(raw_token, validated_token, exp)
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        now = time.monotonic()
+        user = users.get(user_id, now)
+        if user is None:
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            seconds = getattr(settings, "ACCOUNTS_JWT_USER_CACHE_SECONDS", 0)
+            if seconds > 0:
+                users.set(user_id, user, now + seconds)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        # each request gets its own instance: views may change request.user
+        return copy.copy(user)
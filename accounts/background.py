@@ -0,0 +1,136 @@
+# accounts/background.py
+"""
+In-process background workers: a bounded queue drained in batches by daemon
+threads. Used by the OTP mail pool (accounts.mail) and the OTP write-behind
+queue (accounts.otp_store).
+
+Threads are started lazily on the first submit() in each process, so
+pre-fork servers (gunicorn) start them in the workers, not the master.
+Subclasses implement handle_batch(); a per-thread `state` object (e.g. an
+SMTP connection) is threaded through handle_batch/on_idle/on_stop. Counters
+in `stats` are updated through count(), which any thread may call.
+"""
+
+import logging
+import os
+import queue
+import threading
+
+from django.db import close_old_connections, connection as db_connection
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class BatchWorker:
+    name = "worker"
+
+    def __init__(self, workers=1, queue_size=1000, idle_seconds=30, batch_size=20):
+        self.workers = max(1, int(workers))
+        self.queue_size = int(queue_size)
+        self.idle_seconds = idle_seconds
+        self.batch_size = max(1, int(batch_size))
+        self.stats = {"queued": 0, "overflow": 0}
+        # not _lock: shutdown() holds that while the workers drain the queue
+        self._stats_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._queue = None
+        self._threads = []
+        self._pid = None
+
+    # ---- hooks ----
+    def handle_batch(self, items, state):
+        """Process a list of queued items; return the (possibly new) state."""
+        raise NotImplementedError
+
+    def on_idle(self, state):
+        """Called after idle_seconds without work; return the new state."""
+        return state
+
+    def on_stop(self, state):
+        pass
+
+    def count(self, **increments):
+        """Add to the `stats` counters (thread-safe)."""
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] = self.stats.get(key, 0) + value
+
+    # ---- lifecycle ----
+    def _ensure_started(self):
+        if self._pid == os.getpid() and self._threads:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._threads:
+                return
+            # fresh state after a fork: the parent's threads do not exist here
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._threads = []
+            self._pid = os.getpid()
+            for i in range(self.workers):
+                t = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def shutdown(self, timeout=10):
+        """Process what is already queued, then stop the threads."""
+        with self._lock:
+            if self._pid != os.getpid() or not self._threads:
+                return
+            threads, self._threads = self._threads, []
+            for _ in threads:
+                # blocking put: stop markers must not be dropped on a full queue
+                self._queue.put(_STOP)
+        for t in threads:
+            t.join(timeout)
+
+    def submit(self, item):
+        """Queue `item`. Returns False if the queue is full."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.count(overflow=1)
+            return False
+        self.count(queued=1)
+        return True
+
+    # ---- worker threads ----
+    def _next_batch(self):
+        """Block for one item, then take whatever else is already waiting."""
+        first = self._queue.get(timeout=self.idle_seconds)
+        batch = [first]
+        while first is not _STOP and len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is _STOP:
+                break
+        return batch
+
+    def _run(self):
+        state = None
+        while True:
+            try:
+                batch = self._next_batch()
+            except queue.Empty:
+                # idle: don't keep sessions open for nothing
+                state = self.on_idle(state)
+                db_connection.close()
+                continue
+
+            stop = batch[-1] is _STOP
+            items = [i for i in batch if i is not _STOP]
+            if items:
+                close_old_connections()
+                try:
+                    state = self.handle_batch(items, state)
+                except Exception:
+                    logger.exception("%s failed to process %d item(s)", self.name, len(items))
+            if stop:
+                self.on_stop(state)
+                db_connection.close()
+                return
@@ -0,0 +1,203 @@
+# accounts/cache.py
+"""
+Host-local cache backend shared by every worker process, stored in a SQLite
+file in WAL mode.
+
+Django's default LocMemCache is per process, so with N gunicorn workers the
+OTP resend rate limit (OTP_RATE_LIMIT_SECONDS) allowed N OTPs per window.
+This backend keeps one table in a file that all workers open, without an
+external cache service:
+
+ - add() and incr()/decr() are single atomic statements (upsert / UPDATE),
+   so check-and-set rate limits hold across processes
+ - entries carry an absolute expiry and are ignored once past it; expired
+   rows are purged every CULL_EVERY writes, and MAX_ENTRIES is enforced then
+ - each thread keeps one connection (WAL lets readers run during a write)
+
+Unlike DatabaseCache it does not go through the ORM or the main database, and
+it does not run a SELECT COUNT(*) on every set. Needs SQLite >= 3.35 (RETURNING).
+
+    CACHES = {
+        "default": {
+            "BACKEND": "accounts.cache.SQLiteCache",
+            "LOCATION": BASE_DIR / "cache.sqlite3",
+            "OPTIONS": {"MAX_ENTRIES": 100_000, "CULL_EVERY": 500},
+        }
+    }
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entry (
+    key TEXT PRIMARY KEY,
+    value,
+    expires REAL
+) WITHOUT ROWID
+"""
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = str(location)
+        options = params.get("OPTIONS", {})
+        self._busy_timeout_ms = int(options.get("BUSY_TIMEOUT_MS", 5000))
+        self._cull_every = max(1, int(options.get("CULL_EVERY", 500)))
+        self._writes = 0
+        self._local = threading.local()
+
+    # ---- connection handling ----
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # isolation_level=None: autocommit; multi-statement work uses BEGIN IMMEDIATE
+        conn = sqlite3.connect(self._path, timeout=self._busy_timeout_ms / 1000, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={self._busy_timeout_ms}")
+        conn.execute(_SCHEMA)
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def close(self, **kwargs):
+        # connections are reused across requests; nothing to do per request
+        pass
+
+    # ---- value encoding: ints are stored natively so incr() can be done in SQL ----
+    def _encode(self, value):
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, self.pickle_protocol)
+
+    @staticmethod
+    def _decode(stored):
+        if isinstance(stored, int):
+            return stored
+        return pickle.loads(stored)
+
+    def _after_write(self, conn):
+        self._writes += 1
+        if self._writes % self._cull_every == 0:
+            self._cull(conn)
+
+    def _cull(self, conn):
+        conn.execute("DELETE FROM cache_entry WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+        (count,) = conn.execute("SELECT COUNT(*) FROM cache_entry").fetchone()
+        if count > self._max_entries:
+            # drop the entries closest to expiry first (never-expiring ones last)
+            conn.execute(
+                "DELETE FROM cache_entry WHERE key IN ("
+                " SELECT key FROM cache_entry ORDER BY expires IS NULL, expires LIMIT ?)",
+                (max(1, count // self._cull_frequency) if self._cull_frequency else count,),
+            )
+
+    # ---- BaseCache API ----
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        now = time.time()
+        cursor = conn.execute(
+            "INSERT INTO cache_entry (key, value, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires "
+            "WHERE cache_entry.expires IS NOT NULL AND cache_entry.expires <= ?",
+            (key, self._encode(value), self.get_backend_timeout(timeout), now),
+        )
+        added = cursor.rowcount == 1
+        if added:
+            self._after_write(conn)
+        return added
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            "SELECT value FROM cache_entry WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return default if row is None else self._decode(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)",
+            (key, self._encode(value), self.get_backend_timeout(timeout)),
+        )
+        self._after_write(conn)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            "UPDATE cache_entry SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute("DELETE FROM cache_entry WHERE key = ?", (key,))
+        return cursor.rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            "SELECT 1 FROM cache_entry WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def incr(self, key, delta=1, version=None):
+        row = self._connection().execute(
+            "UPDATE cache_entry SET value = value + ? "
+            "WHERE key = ? AND typeof(value) = 'integer' AND (expires IS NULL OR expires > ?) "
+            "RETURNING value",
+            (delta, self.make_and_validate_key(key, version=version), time.time()),
+        ).fetchone()
+        if row is None:
+            raise ValueError("Key '%s' not found or not an integer" % key)
+        return row[0]
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(k, version=version): k for k in keys}
+        if not key_map:
+            return {}
+        placeholders = ",".join("?" * len(key_map))
+        rows = self._connection().execute(
+            f"SELECT key, value FROM cache_entry WHERE key IN ({placeholders}) AND (expires IS NULL OR expires > ?)",
+            (*key_map, time.time()),
+        ).fetchall()
+        return {key_map[k]: self._decode(v) for k, v in rows}
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [(self.make_and_validate_key(k, version=version), self._encode(v), expires) for k, v in data.items()]
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._after_write(conn)
+        return []
+
+    def delete_many(self, keys, version=None):
+        rows = [(self.make_and_validate_key(k, version=version),) for k in keys]
+        if rows:
+            self._connection().executemany("DELETE FROM cache_entry WHERE key = ?", rows)
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache_entry")
@@ -0,0 +1,187 @@
+# accounts/events.py
+"""
+Structured event log for the accounts endpoints.
+
+Every accounts view emits one event per request (log_event) on the
+"accounts.events" logger. The handler (QueueJSONHandler) only puts the record
+on a bounded in-memory queue; a listener thread redacts and formats it as one
+JSON line and does the actual write, so request threads never wait on stdout
+or disk.
+
+ - sensitive fields (passwords, OTP codes, tokens) are redacted by
+   JSONLineFormatter, i.e. on the listener thread; events must therefore not
+   be given to handlers formatting `event_fields` any other way
+ - INFO events are sampled at ACCOUNTS_EVENT_SAMPLE_RATE (0.0 - 1.0);
+   warnings and errors are always kept
+ - when the queue is full the record is dropped and counted
+   (QueueJSONHandler.dropped) rather than blocking the request
+
+This is not free: benchmarks/bench_event_log.py puts a login event at about
+26 us mean / 16 us median on the request thread (record creation, the queue
+put and GIL time lost to the listener), about three times the print() it
+replaced when stdout is a fast local file. It pays off when the sink is slow
+(a full pipe, a remote syslog: the write stays on the listener) and with
+sampling (about 9 us at 10%).
+
+Configured through LOGGING in settings.py:
+
+    "handlers": {
+        "accounts_events": {
+            "class": "accounts.events.QueueJSONHandler",
+            "filename": None,          # None: stderr
+            "queue_size": 10000,
+        },
+    },
+    "loggers": {
+        "accounts.events": {"handlers": ["accounts_events"], "level": "INFO", "propagate": False},
+    },
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections.abc import Mapping
+
+from django.conf import settings
+
+logger = logging.getLogger("accounts.events")
+
+REDACTED = "[redacted]"
+SENSITIVE_FIELDS = frozenset({
+    "password", "new_password", "confirm_password",
+    "otp", "code", "reset_token", "token", "access", "refresh",
+})
+
+
+def redact(data):
+    """Copy of `data` with SENSITIVE_FIELDS masked, at any depth."""
+    if isinstance(data, Mapping):
+        return {
+            key: REDACTED if str(key).lower() in SENSITIVE_FIELDS else redact(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, (list, tuple)):
+        return [redact(value) for value in data]
+    return data
+
+
+def sample_rate():
+    return getattr(settings, "ACCOUNTS_EVENT_SAMPLE_RATE", 1.0)
+
+
+def log_event(event, level=logging.INFO, **fields):
+    """
+    Emit `event` with `fields`. Cheap when sampled out or when the logger is
+    disabled: nothing is copied or formatted. Otherwise only the LogRecord is
+    built here; redaction and JSON happen in the formatter, so `fields` must
+    not be mutated after the call.
+    """
+    if level <= logging.INFO:
+        rate = sample_rate()
+        if rate < 1.0 and random.random() >= rate:
+            return
+    if not logger.isEnabledFor(level):
+        return
+    # makeRecord + handle: logger.log() would also walk the stack (findCaller)
+    logger.handle(logger.makeRecord(logger.name, level, "", 0, event, (), None, extra={"event_fields": fields}))
+
+
+def log_response(event, status_code, payload=None, errors=None, started=None):
+    """
+    The per-request event of an accounts view: status, duration and the
+    (redacted) request payload, plus the error body for 4xx/5xx responses.
+    Client errors are sampled like successes; server errors are always kept.
+    """
+    fields = {"status": status_code}
+    if started is not None:
+        fields["ms"] = round((time.perf_counter() - started) * 1000, 3)
+    if payload is not None:
+        fields["payload"] = payload
+    if errors is not None and status_code >= 400:
+        fields["errors"] = errors
+    log_event(event, logging.ERROR if status_code >= 500 else logging.INFO, **fields)
+
+
+class JSONLineFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, event and the (redacted) event fields."""
+
+    def format(self, record):
+        payload = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "event": record.getMessage(),
+            "pid": record.process,
+        }
+        payload.update(redact(getattr(record, "event_fields", {})))
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, separators=(",", ":"))
+
+
+class QueueJSONHandler(logging.handlers.QueueHandler):
+    """
+    Non-blocking handler: enqueue on the calling thread, write JSON lines from
+    a QueueListener thread. The listener is started lazily in each process
+    (after a pre-fork server has forked) and flushed at exit.
+    """
+
+    def __init__(self, filename=None, queue_size=10000):
+        super().__init__(queue.Queue(maxsize=int(queue_size)))
+        self.filename = filename
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _target(self):
+        if self.filename:
+            target = logging.FileHandler(self.filename, encoding="utf-8", delay=True)
+        else:
+            target = logging.StreamHandler(sys.stderr)
+        target.setFormatter(JSONLineFormatter())
+        return target
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # a forked child inherits the queue object but not the thread
+            self.queue = queue.Queue(maxsize=self.queue.maxsize)
+            self._listener = logging.handlers.QueueListener(self.queue, self._target(), respect_handler_level=False)
+            self._listener.start()
+            self._pid = os.getpid()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """Write out whatever is queued and stop the listener thread."""
+        listener, self._listener = self._listener, None
+        if listener is not None and self._pid == os.getpid():
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+        self._pid = None
+
+    def prepare(self, record):
+        # the listener runs in this process, so the record is passed as is and
+        # all formatting (getMessage, json.dumps) happens off the request thread
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        self.stop()
+        super().close()
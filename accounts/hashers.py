@@ -0,0 +1,60 @@
+# accounts/hashers.py
+"""
+Password hashers whose cost parameter comes from settings, so the work factor
+can be set from a latency budget (`manage.py calibrate_hashers`) instead of
+Django's release default.
+
+The algorithm names are unchanged (pbkdf2_sha256, scrypt, argon2), so
+existing hashes keep verifying; when the configured cost differs from the
+one stored in a hash, must_update() is true and LoginSerializer rehashes the
+password on the next successful login.
+
+    PASSWORD_HASHER_PBKDF2_ITERATIONS   PBKDF2-SHA256 iterations
+    PASSWORD_HASHER_SCRYPT_WORK_FACTOR  scrypt N (power of two)
+    PASSWORD_HASHER_ARGON2_TIME_COST    argon2 time_cost
+
+A setting left as None keeps Django's default for that hasher.
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+
+def _configured(name, default):
+    return getattr(settings, name, None) or default
+
+
+class CalibratedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    cost_attribute = "iterations"
+    cost_setting = "PASSWORD_HASHER_PBKDF2_ITERATIONS"
+
+    @property
+    def iterations(self):
+        return _configured(self.cost_setting, PBKDF2PasswordHasher.iterations)
+
+
+class CalibratedScryptPasswordHasher(ScryptPasswordHasher):
+    cost_attribute = "work_factor"
+    cost_setting = "PASSWORD_HASHER_SCRYPT_WORK_FACTOR"
+
+    @property
+    def work_factor(self):
+        return _configured(self.cost_setting, ScryptPasswordHasher.work_factor)
+
+    @property
+    def maxmem(self):
+        # hashlib's default 32 MiB cap is exceeded from N = 2**15 (r = 8) upwards
+        return 256 * self.work_factor * self.block_size
+
+
+class CalibratedArgon2PasswordHasher(Argon2PasswordHasher):
+    cost_attribute = "time_cost"
+    cost_setting = "PASSWORD_HASHER_ARGON2_TIME_COST"
+
+    @property
+    def time_cost(self):
+        return _configured(self.cost_setting, Argon2PasswordHasher.time_cost)
@@ -0,0 +1,181 @@
+# accounts/hashing.py
+"""
+Optional process pool for password hashing and verification.
+
+PBKDF2 with Django's default iteration count costs tens of milliseconds of
+pure CPU per call and holds the GIL, so a login stalls every other thread in
+the same worker. With PASSWORD_HASHING_POOL = True, check_password() and
+make_password() below run in a ProcessPoolExecutor instead:
+
+ - PASSWORD_HASHING_POOL_WORKERS      pool size (default: os.cpu_count())
+ - PASSWORD_HASHING_POOL_MAX_PENDING  calls queued or running before new
+                                      ones are refused (default: 4 x workers)
+ - PASSWORD_HASHING_POOL_TIMEOUT      seconds to wait for a result (default 5)
+
+A refused or timed-out call raises HashingBusy (HTTP 503). With the pool
+disabled (the default) both functions are plain calls to django.contrib.auth.hashers.
+
+acheck_password() / amake_password() are the non-blocking twins for async
+views: they await the pool, or a worker thread when the pool is disabled.
+"""
+
+import asyncio
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .metrics import phase
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Server is busy, please try again shortly."
+    default_code = "hashing_busy"
+
+
+def init_worker(settings_module):
+    """ProcessPoolExecutor initializer: set up Django in a spawned worker."""
+    # spawned workers start from a clean interpreter
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+    django.setup()
+
+
+def _verify(password, encoded):
+    # (is_correct, must_update); the rehash decision is made by the caller
+    return hashers.verify_password(password, encoded)
+
+
+def hash_password(password):
+    """make_password() in the calling process, bypassing the pool (what the workers run)."""
+    return hashers.make_password(password)
+
+
+class HashingPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._pid = None
+
+    @property
+    def enabled(self):
+        return getattr(settings, "PASSWORD_HASHING_POOL", False)
+
+    def _get(self):
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor, self._slots
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                workers = getattr(settings, "PASSWORD_HASHING_POOL_WORKERS", None) or os.cpu_count() or 1
+                pending = getattr(settings, "PASSWORD_HASHING_POOL_MAX_PENDING", None) or workers * 4
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    # spawn, not fork: the parent has live threads (mail pool, server)
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=init_worker,
+                    initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "myproject.settings"),),
+                )
+                self._slots = threading.BoundedSemaphore(pending)
+                self._pid = os.getpid()
+        return self._executor, self._slots
+
+    def submit(self, fn, *args):
+        """Schedule fn(*args) on the pool; returns a concurrent.futures.Future."""
+        executor, slots = self._get()
+        if not slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            slots.release()
+            self._reset()
+            raise HashingBusy()
+        except Exception:
+            slots.release()
+            raise
+        # the slot is held until the work is really done, even after a timeout
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def run(self, fn, *args):
+        if not self.enabled:
+            return fn(*args)
+        future = self.submit(fn, *args)
+        try:
+            return future.result(timeout=getattr(settings, "PASSWORD_HASHING_POOL_TIMEOUT", 5))
+        except FutureTimeout:
+            future.cancel()
+            raise HashingBusy()
+        except BrokenProcessPool:
+            # a worker died (OOM kill etc.); start a fresh pool on the next call
+            self._reset()
+            raise HashingBusy()
+
+    async def arun(self, fn, *args):
+        if not self.enabled:
+            # hashlib releases the GIL, so a worker thread keeps the event loop free
+            return await sync_to_async(fn, thread_sensitive=False)(*args)
+        future = asyncio.wrap_future(self.submit(fn, *args))
+        try:
+            return await asyncio.wait_for(future, getattr(settings, "PASSWORD_HASHING_POOL_TIMEOUT", 5))
+        except asyncio.TimeoutError:
+            raise HashingBusy()
+        except BrokenProcessPool:
+            self._reset()
+            raise HashingBusy()
+
+    def _reset(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        if self._pid == os.getpid():
+            self._reset()
+
+
+pool = HashingPool()
+atexit.register(pool.shutdown)
+
+
+def check_password(password, encoded, setter=None):
+    """
+    Like django.contrib.auth.hashers.check_password: `setter(password)` is
+    called after a successful check when the hash uses an outdated hasher or
+    cost (see accounts/hashers.py).
+    """
+    with phase("hash"):
+        is_correct, must_update = pool.run(_verify, password, encoded)
+    if setter and is_correct and must_update:
+        setter(password)
+    return is_correct
+
+
+def make_password(password):
+    with phase("hash"):
+        return pool.run(hash_password, password)
+
+
+async def acheck_password(password, encoded, setter=None):
+    """See check_password(); `setter` is awaited."""
+    with phase("hash"):
+        is_correct, must_update = await pool.arun(_verify, password, encoded)
+    if setter and is_correct and must_update:
+        await setter(password)
+    return is_correct
+
+
+async def amake_password(password):
+    with phase("hash"):
+        return await pool.arun(hash_password, password)
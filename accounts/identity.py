@@ -0,0 +1,103 @@
+# accounts/identity.py
+"""
+Single-query lookups of an Account by username or gmail.
+
+AUTH_USER_MODEL is accounts.Account, so there is only one table to search.
+Matching is case-insensitive through LOWER(...) = <lowercased value>, which
+is served by the functional indexes on Lower('username') / Lower('gmail')
+declared on Account (an __iexact lookup compiles to LIKE / UPPER() and
+cannot use them).
+"""
+
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from .models import Account
+from .routers import afollows_write, follows_write
+
+
+def normalize_identifier(value):
+    return (value or "").strip().lower()
+
+
+def lowercase_accounts():
+    """Accounts with the username_lower / gmail_lower aliases the functional indexes serve."""
+    return Account.objects.alias(username_lower=Lower("username"), gmail_lower=Lower("gmail"))
+
+
+def identifier_filter(value):
+    """Match a normalized identifier against either the username or the gmail."""
+    return Q(username_lower=value) | Q(gmail_lower=value)
+
+
+def _prefer_username(matches, value):
+    for account in matches:
+        if account.username.lower() == value:
+            return account
+    return matches[0] if matches else None
+
+
+def resolve_account(identifier):
+    """
+    Return the Account whose username or gmail matches `identifier`, or None.
+    One query; when one account's username equals another's gmail, the
+    username match wins.
+    """
+    value = normalize_identifier(identifier)
+    if not value:
+        return None
+    matches = list(lowercase_accounts().filter(identifier_filter(value))[:2])
+    account = _prefer_username(matches, value)
+    if account is not None and follows_write(account.gmail):
+        # its password was just reset; the replica may still have the old one
+        matches = list(lowercase_accounts().filter(identifier_filter(value))[:2])
+        account = _prefer_username(matches, value)
+    return account
+
+
+def account_for_gmail(gmail):
+    """Return the Account registered with `gmail` (case-insensitive), or None."""
+    value = normalize_identifier(gmail)
+    if not value:
+        return None
+    return lowercase_accounts().filter(gmail_lower=value).first()
+
+
+def accounts_with_gmail(gmail):
+    """
+    Accounts registered with `gmail`, for a single-statement update(). `gmail`
+    is a string or an expression yielding an already lowercased gmail.
+    """
+    if isinstance(gmail, str):
+        gmail = normalize_identifier(gmail)
+    return lowercase_accounts().filter(gmail_lower=gmail)
+
+
+def gmail_registered(gmail):
+    value = normalize_identifier(gmail)
+    return bool(value) and lowercase_accounts().filter(gmail_lower=value).exists()
+
+
+# ---- async twins (async ORM), used by accounts.async_views ----
+async def aresolve_account(identifier):
+    value = normalize_identifier(identifier)
+    if not value:
+        return None
+    matches = [a async for a in lowercase_accounts().filter(identifier_filter(value))[:2]]
+    account = _prefer_username(matches, value)
+    if account is not None and await afollows_write(account.gmail):
+        matches = [a async for a in lowercase_accounts().filter(identifier_filter(value))[:2]]
+        account = _prefer_username(matches, value)
+    return account
+
+
+async def aaccount_for_gmail(gmail):
+    value = normalize_identifier(gmail)
+    if not value:
+        return None
+    return await lowercase_accounts().filter(gmail_lower=value).afirst()
+
+
+async def agmail_registered(gmail):
+    value = normalize_identifier(gmail)
+    return bool(value) and await lowercase_accounts().filter(gmail_lower=value).aexists()
@@ -0,0 +1,151 @@
+# accounts/mail.py
+"""
+Background delivery of OTP emails.
+
+The OTP serializers used to call send_mail() on the request thread, so every
+otp-request / resend-otp call waited for a full SMTP handshake. Now the
+email is written to the outbox (accounts.outbox) in the same transaction as
+the OTP row, and once that commits its id is handed to a small in-process
+pool of worker threads:
+
+ - the queue is bounded (OTP_EMAIL_QUEUE_SIZE); ids that don't fit stay
+   pending in the outbox for `manage.py drain_outbox`
+ - each worker keeps its SMTP connection open between batches and closes it
+   after OTP_EMAIL_IDLE_SECONDS without work
+ - failed deliveries are logged, recorded on the outbox row for retry and
+   counted in dispatcher.stats
+ - the pool is drained and joined at interpreter exit
+
+Bulk dispatches (send_reset_otps from the admin) go to a second, single
+thread instead, which sends each selection with outbox.deliver_ids() over one
+SMTP connection, the batched path of `manage.py send_reset_otps`.
+
+Set OTP_EMAIL_ASYNC = False to deliver inline right after commit (handy for
+tests and the shell).
+"""
+
+import atexit
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+
+from . import outbox
+from .background import BatchWorker
+from .metrics import phase
+
+logger = logging.getLogger(__name__)
+
+
+def build_otp_email(gmail, code):
+    """Build (but do not send) the OTP email for `gmail`."""
+    subject = getattr(settings, "PASSWORD_RESET_SUBJECT", "Your OTP Code")
+    message = (
+        f"Your password reset OTP is: {code}\n"
+        f"This OTP is valid for {getattr(settings, 'PASSWORD_RESET_OTP_EXPIRY_MINUTES', 10)} minutes."
+    )
+    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", None)
+    return EmailMessage(subject, message, from_email, [gmail])
+
+
+class MailDispatcher(BatchWorker):
+    """
+    Bounded queue of outbox ids + worker threads that claim and send them
+    over reused SMTP connections (the per-thread state is the connection).
+    """
+    name = "otp-mail"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.stats.update(sent=0, failed=0)
+
+    def submit(self, outbox_id):
+        if not super().submit(outbox_id):
+            logger.warning("OTP mail queue full (%s); outbox row %s left for drain_outbox", self.queue_size, outbox_id)
+            return False
+        return True
+
+    def handle_batch(self, ids, connection):
+        try:
+            rows = outbox.claim(limit=len(ids), ids=ids)
+            sent, failed, connection = outbox.deliver(rows, connection)
+        except Exception:
+            # rows stay claimable once their lease expires
+            logger.exception("Failed to deliver outbox rows %s", ids)
+            return outbox.close_connection(connection)
+        self.count(sent=sent, failed=failed)
+        return connection
+
+    def on_idle(self, connection):
+        return outbox.close_connection(connection)
+
+    def on_stop(self, connection):
+        outbox.close_connection(connection)
+
+
+dispatcher = MailDispatcher(
+    workers=getattr(settings, "OTP_EMAIL_WORKERS", 2),
+    queue_size=getattr(settings, "OTP_EMAIL_QUEUE_SIZE", 1000),
+    idle_seconds=getattr(settings, "OTP_EMAIL_IDLE_SECONDS", 30),
+)
+atexit.register(dispatcher.shutdown)
+
+
+class BulkDispatcher(BatchWorker):
+    """Sends whole selections of outbox ids (bulk OTP dispatch), one at a time."""
+    name = "otp-bulk-mail"
+
+    def handle_batch(self, selections, state):
+        for ids, on_done in selections:
+            _deliver_bulk(ids, on_done)
+        return state
+
+
+bulk_dispatcher = BulkDispatcher(queue_size=100, batch_size=1)
+atexit.register(bulk_dispatcher.shutdown)
+
+
+def _dispatch(outbox_id):
+    if getattr(settings, "OTP_EMAIL_ASYNC", True):
+        dispatcher.submit(outbox_id)
+        return
+    connection = None
+    try:
+        _, _, connection = outbox.deliver(outbox.claim(limit=1, ids=[outbox_id]))
+    finally:
+        outbox.close_connection(connection)
+
+
+def _deliver_bulk(ids, on_done):
+    sent, failed = outbox.deliver_ids(ids, batch_size=getattr(settings, "OTP_EMAIL_BULK_BATCH_SIZE", 100))
+    logger.info("Bulk OTP mail: %d sent, %d failed (left for drain_outbox)", sent, failed)
+    if on_done is not None:
+        on_done(sent, failed)
+
+
+def dispatch_bulk(outbox_ids, on_done=None):
+    """
+    Send these outbox rows off the request thread, chunk by chunk over one
+    SMTP connection; call it once they are committed. `on_done(sent, failed)`
+    is called when they have been through SMTP (on the sending thread).
+    """
+    ids = list(outbox_ids)
+    if not getattr(settings, "OTP_EMAIL_ASYNC", True):
+        _deliver_bulk(ids, on_done)
+    elif not bulk_dispatcher.submit((ids, on_done)):
+        logger.warning("Bulk OTP mail queue full; %d outbox row(s) left for drain_outbox", len(ids))
+        if on_done is not None:
+            on_done(0, len(ids))
+
+
+def send_otp_email(gmail, code):
+    """
+    Write the OTP email for `gmail` to the outbox and schedule delivery for
+    when the surrounding transaction commits. Call it inside the same
+    transaction.atomic() block that creates the PasswordResetOTP row.
+    """
+    with phase("mail"):
+        row = outbox.queue_email(build_otp_email(gmail, code))
+        transaction.on_commit(lambda: _dispatch(row.pk))
+    return row
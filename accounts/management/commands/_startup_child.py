@@ -0,0 +1,100 @@
+"""
+The cold start timed by profile_startup, run as a script in a fresh
+interpreter (from the project directory):
+
+    python accounts/management/commands/_startup_child.py /api/accounts/login/
+
+Prints one JSON line: per-step seconds, the first response's status, the
+installed apps and the source files that had no up-to-date .pyc. Each step
+writes MARK + its name to stderr first, which splits the -X importtime lines
+by step.
+"""
+
+import time
+
+started = time.perf_counter()
+
+import io  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
+from importlib import import_module  # noqa: E402
+
+MARK = "profile_startup step: "
+
+
+def step(timings, name, func):
+    sys.stderr.write(MARK + name + "\n")
+    sys.stderr.flush()
+    began = time.perf_counter()
+    result = func()
+    timings[name] = time.perf_counter() - began
+    return result
+
+
+def first_request(handler, path):
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    status = []
+    b"".join(handler(environ, lambda line, headers, exc_info=None: status.append(line)))
+    return int(status[0].split()[0])
+
+
+def stale_bytecode():
+    """Source files imported without an up-to-date .pyc, i.e. compiled by this process."""
+    from importlib.util import MAGIC_NUMBER
+
+    stale = []
+    for module in list(sys.modules.values()):
+        spec = getattr(module, "__spec__", None)
+        if spec is None or not spec.has_location or not spec.cached or not str(spec.origin).endswith(".py"):
+            continue
+        try:
+            source = os.stat(spec.origin)
+            with open(spec.cached, "rb") as f:
+                header = f.read(16)
+        except OSError:
+            stale.append(spec.origin)
+            continue
+        # PEP 552 header: magic, flags, then source mtime + size unless hash-based
+        timestamp_based = int.from_bytes(header[4:8], "little") == 0
+        if header[:4] != MAGIC_NUMBER or timestamp_based and (
+            int.from_bytes(header[8:12], "little") != int(source.st_mtime) & 0xFFFFFFFF
+            or int.from_bytes(header[12:16], "little") != source.st_size & 0xFFFFFFFF
+        ):
+            stale.append(spec.origin)
+    return stale
+
+
+def main(path):
+    sys.path.insert(0, os.getcwd())
+    timings = {}
+    django = step(timings, "django", lambda: __import__("django.conf"))  # the django package
+    step(timings, "settings", lambda: django.conf.settings.INSTALLED_APPS)
+    step(timings, "setup", django.setup)
+    handler = step(timings, "handler", lambda: import_module("django.core.wsgi").get_wsgi_application())
+    status = step(timings, "first_request", lambda: first_request(handler, path))
+    print(json.dumps({
+        "phases": timings,
+        "total": time.perf_counter() - started,
+        "status": status,
+        "apps": [config.name for config in django.apps.apps.get_app_configs()],
+        "stale": stale_bytecode(),
+    }))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
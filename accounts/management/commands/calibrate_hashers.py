@@ -0,0 +1,121 @@
+# accounts/management/commands/calibrate_hashers.py
+"""
+Benchmark the configured PASSWORD_HASHERS on this host and recommend a cost
+setting per hasher for a target hashing time.
+
+    python manage.py calibrate_hashers --target-ms 150
+
+For every hasher it times one hash at the current cost, scales the cost to
+the target (linearly for PBKDF2 iterations and argon2 time_cost, in powers of
+two for scrypt N, in log2 steps for bcrypt rounds), times the recommended
+cost again and prints the settings for the hashers in accounts/hashers.py.
+Hashers whose library is not installed (argon2-cffi, bcrypt) are skipped.
+"""
+
+import math
+import statistics
+import time
+
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+    get_hashers,
+)
+from django.core.management.base import BaseCommand, CommandError
+
+# (hasher base class, cost attribute, how time scales with the cost)
+COST_RULES = [
+    (PBKDF2PasswordHasher, "iterations", "linear"),
+    (ScryptPasswordHasher, "work_factor", "pow2"),
+    (Argon2PasswordHasher, "time_cost", "linear"),
+    (BCryptSHA256PasswordHasher, "rounds", "log2"),
+]
+
+
+def _rule_for(hasher):
+    for base, attribute, scaling in COST_RULES:
+        if isinstance(hasher, base):
+            return attribute, scaling
+    return None, None
+
+
+def _probe(hasher, attribute, cost):
+    """A copy of `hasher` with its cost attribute pinned to `cost`."""
+    attrs = {attribute: cost}
+    if isinstance(hasher, ScryptPasswordHasher):
+        attrs["maxmem"] = 256 * cost * hasher.block_size
+    return type(f"{type(hasher).__name__}Probe", (type(hasher),), attrs)()
+
+
+def _recommend(current, elapsed_ms, target_ms, scaling):
+    ratio = target_ms / elapsed_ms
+    if scaling == "linear":
+        step = 1000 if current >= 10_000 else 1
+        return max(step, int(round(current * ratio / step)) * step)
+    if scaling == "pow2":
+        return 2 ** max(10, int(round(math.log2(current * ratio))))
+    # log2: every extra bcrypt round doubles the time
+    return min(31, max(4, current + int(round(math.log2(ratio)))))
+
+
+class Command(BaseCommand):
+    help = "Benchmark PASSWORD_HASHERS and recommend cost settings for a target time per hash."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target-ms", type=float, default=100.0, help="target time per hash in ms (default 100)")
+        parser.add_argument("--samples", type=int, default=5, help="timed runs per measurement, median reported (default 5)")
+
+    def measure(self, hasher, samples):
+        password, salt = "calibrate-Pa55word!", hasher.salt()
+        hasher.encode(password, salt)  # warm-up
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            hasher.encode(password, salt)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        target_ms, samples = options["target_ms"], max(1, options["samples"])
+        if target_ms <= 0:
+            raise CommandError("--target-ms must be positive")
+
+        recommended_settings = []
+        self.stdout.write(f"Target: {target_ms:.0f} ms per hash, median of {samples} run(s)\n")
+        for hasher in get_hashers():
+            name = f"{hasher.algorithm} ({type(hasher).__module__}.{type(hasher).__name__})"
+            attribute, scaling = _rule_for(hasher)
+            if attribute is None:
+                self.stdout.write(f"{name}: no tunable cost, skipped")
+                continue
+            if hasher.library:
+                try:
+                    hasher._load_library()
+                except ValueError:
+                    self.stdout.write(f"{name}: library not installed, skipped")
+                    continue
+
+            current = getattr(hasher, attribute)
+            current_ms = self.measure(hasher, samples)
+            cost = _recommend(current, current_ms, target_ms, scaling)
+            cost_ms = self.measure(_probe(hasher, attribute, cost), samples)
+            self.stdout.write(
+                f"{name}\n"
+                f"    current     {attribute}={current}: {current_ms:8.1f} ms\n"
+                f"    recommended {attribute}={cost}: {cost_ms:8.1f} ms"
+            )
+            setting = getattr(hasher, "cost_setting", None)
+            if setting:
+                recommended_settings.append(f"{setting} = {cost}")
+
+        if recommended_settings:
+            self.stdout.write("\nAdd to settings.py:")
+            for line in recommended_settings:
+                self.stdout.write(self.style.SUCCESS(line))
+        else:
+            self.stdout.write(
+                "\nNo calibrated hashers (accounts.hashers) in PASSWORD_HASHERS; "
+                "the numbers above are informational only."
+            )
@@ -0,0 +1,59 @@
+# accounts/management/commands/drain_outbox.py
+"""
+Deliver pending EmailOutbox rows in batches.
+
+    python manage.py drain_outbox                 # one pass over everything due
+    python manage.py drain_outbox --loop          # keep running as a worker
+    python manage.py drain_outbox --batch-size 200 --interval 2
+
+Each batch is claimed in three statements and sent over a single SMTP
+connection, which stays open while there is work and is closed when idle.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts import outbox
+
+
+class Command(BaseCommand):
+    help = "Send pending outbox emails in batches over a reused SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="rows claimed per batch (default 100)")
+        parser.add_argument("--loop", action="store_true", help="keep polling instead of exiting when the outbox is empty")
+        parser.add_argument("--interval", type=float, default=5.0, help="seconds to sleep when idle in --loop mode (default 5)")
+        parser.add_argument("--max-batches", type=int, default=0, help="stop after this many batches (0 = no limit)")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        total_sent = total_failed = batches = 0
+        connection = None
+        started = time.monotonic()
+        try:
+            while True:
+                rows = outbox.claim(limit=batch_size)
+                if not rows:
+                    connection = outbox.close_connection(connection)
+                    if not options["loop"]:
+                        break
+                    time.sleep(options["interval"])
+                    continue
+
+                sent, failed, connection = outbox.deliver(rows, connection)
+                total_sent += sent
+                total_failed += failed
+                batches += 1
+                self.stdout.write(f"batch {batches}: sent {sent}, failed {failed}")
+                if options["max_batches"] and batches >= options["max_batches"]:
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            outbox.close_connection(connection)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {total_sent} sent, {total_failed} failed in {batches} batch(es), {elapsed:.1f}s"
+        ))
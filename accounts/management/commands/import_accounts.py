@@ -0,0 +1,291 @@
+# accounts/management/commands/import_accounts.py
+"""
+Bulk-create Accounts from a CSV or JSON-lines file.
+
+    python manage.py import_accounts clients.csv
+    python manage.py import_accounts clients.jsonl --batch-size 5000 --workers 8
+    cat clients.csv | python manage.py import_accounts - --format csv --on-conflict error
+
+Each row needs username, gmail and either password (plain text, hashed here)
+or password_hash (already encoded by one of PASSWORD_HASHERS, stored as is;
+other formats are rejected as invalid); first_name, last_name and
+email are optional. The input is read as a stream, one --batch-size batch at
+a time:
+
+ - rows with missing fields or an invalid gmail are reported and skipped
+ - usernames / gmails already taken, case-insensitively as at login
+   (accounts/identity.py), by an account or an earlier row are conflicts:
+   skipped and reported, or with --on-conflict error the import stops
+   (batches already inserted stay)
+ - plain passwords are hashed in a process pool over --workers processes
+   (default: all cores), while the previous batch is being inserted
+ - each batch is one bulk_create() in its own transaction
+
+Conflicts are checked before hashing, so skipped rows cost no PBKDF2, and
+--dry-run hashes nothing. A row that someone else inserts between the check
+and the insert is left alone by the insert (ignore_conflicts); the batch is
+read back afterwards, so such rows are counted as conflicts, not created.
+"""
+
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import identify_hasher
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+
+from accounts.hashing import hash_password, init_worker
+from accounts.identity import lowercase_accounts, normalize_identifier
+from accounts.models import Account
+
+OPTIONAL_FIELDS = ("first_name", "last_name", "email")
+
+
+class ConflictError(CommandError):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Create accounts from a CSV / JSON-lines file with parallel password hashing and bulk inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON-lines file, - for stdin")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="default: from the file extension")
+        parser.add_argument("--batch-size", type=int, default=1000, help="rows per insert (default 1000)")
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="hashing processes (default: cpu count; 0 hashes in this process)",
+        )
+        parser.add_argument("--on-conflict", choices=["skip", "error"], default="skip",
+                            help="taken username / gmail: skip the row (default) or stop")
+        parser.add_argument("--dry-run", action="store_true", help="validate and check conflicts, insert nothing")
+
+    # --------------------
+    # INPUT
+    # --------------------
+    def open_input(self, options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv" if path.endswith(".csv") else None)
+        if fmt is None:
+            raise CommandError("cannot tell the format from the file name, pass --format")
+        if path == "-":
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+        else:
+            try:
+                stream = open(path, encoding="utf-8", newline="")
+            except OSError as e:
+                raise CommandError(f"cannot read {path}: {e}")
+        return stream, fmt
+
+    def read_rows(self, stream, fmt):
+        """(line number, dict) per input row."""
+        if fmt == "csv":
+            reader = csv.DictReader(stream)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, e
+                continue
+            yield line_number, row
+
+    def batches(self, rows, size):
+        batch = []
+        for item in rows:
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    # --------------------
+    # CHECKS
+    # --------------------
+    def clean(self, row):
+        """Account field values for `row`, or raise ValueError saying what is wrong."""
+        if not isinstance(row, dict):
+            raise ValueError(f"not an object ({row})")
+        username = (row.get("username") or "").strip()
+        gmail = (row.get("gmail") or "").strip()
+        password, password_hash = row.get("password"), row.get("password_hash")
+        if not username or not gmail:
+            raise ValueError("username and gmail are required")
+        if not password and not password_hash:
+            raise ValueError("password or password_hash is required")
+        try:
+            validate_email(gmail)
+        except ValidationError:
+            raise ValueError(f"invalid gmail {gmail!r}")
+        if password_hash:
+            try:
+                identify_hasher(password_hash)
+            except ValueError:
+                raise ValueError("password_hash is not in a format of PASSWORD_HASHERS")
+        fields = {"username": username, "gmail": gmail}
+        fields.update({name: row[name] for name in OPTIONAL_FIELDS if row.get(name)})
+        return fields, password, password_hash
+
+    def taken(self, usernames, gmails):
+        """Lowercased usernames and gmails among these that accounts already use."""
+        if not usernames and not gmails:
+            return set(), set()
+        existing = lowercase_accounts().filter(Q(username_lower__in=usernames) | Q(gmail_lower__in=gmails))
+        rows = [(username.lower(), gmail.lower()) for username, gmail in existing.values_list("username", "gmail")]
+        return {username for username, _ in rows} & usernames, {gmail for _, gmail in rows} & gmails
+
+    def conflict(self, where, message, count=1):
+        self.conflicts += count
+        if self.on_conflict == "error":
+            raise ConflictError(f"{where}: {message}")
+        if self.verbosity >= 2:
+            self.stderr.write(f"{where}: skipped, {message}")
+
+    def prepare(self, batch):
+        """Accounts to create from `batch` and the plain passwords they still need hashed."""
+        cleaned = []
+        for line_number, row in batch:
+            try:
+                if isinstance(row, Exception):
+                    raise ValueError(f"invalid JSON ({row})")
+                cleaned.append((line_number, *self.clean(row)))
+            except ValueError as e:
+                self.invalid += 1
+                if self.verbosity >= 1:
+                    self.stderr.write(f"line {line_number}: skipped, {e}")
+
+        usernames = {normalize_identifier(fields["username"]) for _, fields, _, _ in cleaned}
+        gmails = {normalize_identifier(fields["gmail"]) for _, fields, _, _ in cleaned}
+        taken_usernames, taken_gmails = self.taken(usernames, gmails)
+
+        accounts, passwords = [], []
+        for line_number, fields, password, password_hash in cleaned:
+            username, gmail = normalize_identifier(fields["username"]), normalize_identifier(fields["gmail"])
+            if username in taken_usernames or username in self.seen_usernames:
+                self.conflict(f"line {line_number}", f"username {fields['username']!r} is taken")
+                continue
+            if gmail in taken_gmails or gmail in self.seen_gmails:
+                self.conflict(f"line {line_number}", f"gmail {fields['gmail']!r} is taken")
+                continue
+            self.seen_usernames.add(username)
+            self.seen_gmails.add(gmail)
+            accounts.append(Account(password=password_hash or "", **fields))
+            passwords.append(None if password_hash else password)
+        return accounts, passwords
+
+    # --------------------
+    # HASH + INSERT
+    # --------------------
+    def hash_passwords(self, executor, passwords):
+        """
+        Start hashing the plain passwords; returns an iterator of encoded
+        hashes (None where the row brought its own) that blocks as needed.
+        """
+        plain = [password for password in passwords if password is not None]
+        if executor is None:
+            hashed = iter([hash_password(password) for password in plain])
+        else:
+            # map() submits everything now; results are collected in order
+            hashed = executor.map(hash_password, plain, chunksize=max(1, len(plain) // (self.workers * 4)))
+        return (None if password is None else next(hashed) for password in passwords)
+
+    def inserted(self, accounts):
+        """How many of `accounts` are stored: bulk_create(ignore_conflicts) does not say."""
+        ours = {(account.username, account.password) for account in accounts}
+        stored = lowercase_accounts().filter(
+            username_lower__in={normalize_identifier(account.username) for account in accounts}
+        ).values_list("username", "password")
+        # the encoded password (salted) tells our row from one inserted concurrently
+        return sum(1 for row in stored if row in ours)
+
+    def insert(self, accounts, hashes):
+        started = time.monotonic()  # includes waiting for the pool
+        created = len(accounts)
+        if not self.dry_run:
+            for account, encoded in zip(accounts, hashes):
+                if encoded is not None:
+                    account.password = encoded
+            with transaction.atomic():
+                # ignore_conflicts: rows someone else inserted since taken() ran
+                Account.objects.bulk_create(accounts, ignore_conflicts=True)
+                created = self.inserted(accounts)
+        self.created += created
+        self.batches_done += 1
+        if created < len(accounts):
+            self.conflict(f"batch {self.batches_done}", f"{len(accounts) - created} row(s) taken by a concurrent insert",
+                          count=len(accounts) - created)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"batch {self.batches_done}: {created} {'would be created' if self.dry_run else 'created'}, "
+            f"{self.conflicts} conflict(s) and "
+            f"{self.invalid} invalid so far ({len(accounts) / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+        self.verbosity = options["verbosity"]
+        self.on_conflict = options["on_conflict"]
+        self.dry_run = options["dry_run"]
+        self.workers = options["workers"] if options["workers"] is not None else (os.cpu_count() or 1)
+        self.created = self.conflicts = self.invalid = self.batches_done = 0
+        self.seen_usernames, self.seen_gmails = set(), set()
+
+        stream, fmt = self.open_input(options)
+        executor = None
+        if self.workers > 0 and not self.dry_run:
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                # same worker setup as the request-time pool (accounts.hashing)
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "myproject.settings"),),
+            )
+
+        started = time.monotonic()
+        pending = deque()
+        try:
+            for batch in self.batches(self.read_rows(stream, fmt), batch_size):
+                accounts, passwords = self.prepare(batch)
+                if accounts:
+                    # hashing of this batch overlaps the insert of the previous one
+                    hashes = None if self.dry_run else self.hash_passwords(executor, passwords)
+                    pending.append((accounts, hashes))
+                if len(pending) > 1:
+                    self.insert(*pending.popleft())
+            while pending:
+                self.insert(*pending.popleft())
+        except ConflictError:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = None
+            raise
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if options["path"] != "-":
+                stream.close()
+
+        elapsed = time.monotonic() - started
+        rate = self.created / elapsed if elapsed else 0
+        verb = "would be created" if self.dry_run else "created"
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {self.created} account(s) {verb}, {self.conflicts} conflict(s) skipped, "
+            f"{self.invalid} invalid row(s) in {elapsed:.1f}s ({rate:.0f} rows/s)"
+        ))
@@ -0,0 +1,183 @@
+# accounts/management/commands/profile_startup.py
+"""
+Where a fresh process spends its time before the first response.
+
+    python manage.py profile_startup
+    python manage.py profile_startup --settings myproject.settings_api --runs 10
+    python manage.py profile_startup --top 25 --output startup.json
+
+Starts new interpreters with the current DJANGO_SETTINGS_MODULE and times
+the steps of a cold start:
+
+    django         import django / django.conf
+    settings       loading the settings module
+    setup          django.setup(): logging, app configs, models, ready()
+    handler        get_wsgi_application(): loading MIDDLEWARE
+    first_request  one GET of --path: URLconf, views, serializers, ...
+
+--runs plain runs give the wall times (medians), then one run under
+`python -X importtime` gives the breakdown by app: every module imported
+during a step is charged to the INSTALLED_APPS package it belongs to or,
+failing that, to the app whose import pulled it in first (so
+django.db.models is charged to whichever app imported it first). Modules
+no app pulled in are listed by top-level package. -X importtime slows
+imports down, so its figures are only comparable with each other.
+
+Source files imported without an up-to-date .pyc are compiled again by
+every new process (PYTHONDONTWRITEBYTECODE, read-only images); they are
+listed with what compiling them costs. `python -m compileall` at build time
+removes that.
+"""
+
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ._startup_child import MARK
+
+PHASES = ("django", "settings", "setup", "handler", "first_request")
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+CHILD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_startup_child.py")
+
+
+def run_child(path="/api/accounts/login/", importtime=False, settings_module=None, cwd=None):
+    """
+    Cold-start one interpreter; {"wall", "phases", "total", "status", "apps"}
+    (seconds), plus "imports": [(phase, self_us, cumulative_us, depth, module)]
+    with `importtime`.
+    """
+    env = dict(os.environ)
+    if settings_module:
+        env["DJANGO_SETTINGS_MODULE"] = settings_module
+    argv = [sys.executable] + (["-X", "importtime"] if importtime else []) + [CHILD, path]
+    started = time.perf_counter()
+    child = subprocess.run(argv, capture_output=True, text=True, env=env, cwd=cwd)
+    wall = time.perf_counter() - started
+    if child.returncode != 0:
+        raise CommandError(f"startup failed:\n{child.stderr[-3000:]}")
+    result = json.loads(child.stdout.strip().splitlines()[-1])
+    result["wall"] = wall
+    if importtime:
+        imports, phase = [], None
+        for line in child.stderr.splitlines():
+            if line.startswith(MARK):
+                phase = line[len(MARK):]
+                continue
+            match = IMPORT_LINE.match(line)
+            if match and phase is not None:
+                self_us, cumulative_us, indent, module = match.groups()
+                imports.append((phase, int(self_us), int(cumulative_us), len(indent) // 2, module))
+        result["imports"] = imports
+    return result
+
+
+def compile_seconds(paths):
+    """Time to compile these sources, what a start without their .pyc pays on top."""
+    started = time.perf_counter()
+    for path in paths:
+        with open(path, "rb") as source:
+            compile(source.read(), path, "exec", dont_inherit=True)
+    return time.perf_counter() - started
+
+
+def _app_of(module, apps):
+    """The longest INSTALLED_APPS package `module` is part of, or None."""
+    best = None
+    for app in apps:
+        if (module == app or module.startswith(app + ".")) and (best is None or len(app) > len(best)):
+            best = app
+    return best
+
+
+def charge(imports, apps):
+    """
+    owner -> phase -> self microseconds, charging each module to its own app,
+    else to the owner of the module that imported it (see the module doc).
+    """
+    totals = defaultdict(lambda: defaultdict(int))
+    # -X importtime prints a module after the modules it imported, one level
+    # deeper; walking backwards meets every importer before its imports
+    stack = []  # (depth, owner) of the importers of the current line
+    for phase, self_us, _, depth, module in reversed(imports):
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+        owner = _app_of(module, apps) or (stack[-1][1] if stack else None)
+        stack.append((depth, owner))
+        totals[owner or f"({module.split('.')[0]})"][phase] += self_us
+    return totals
+
+
+class Command(BaseCommand):
+    help = "Time the cold start (django.setup(), middleware, first request) and break it down by app with -X importtime."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="plain cold starts to time (default 5)")
+        parser.add_argument("--path", default="/api/accounts/login/", help="GET for the first request")
+        parser.add_argument("--top", type=int, default=15, help="owners and imports listed (default 15)")
+        parser.add_argument("--output", help="also write the results as JSON")
+
+    def handle(self, *args, **options):
+        if options["runs"] < 1:
+            raise CommandError("--runs must be at least 1")
+        cwd = str(settings.BASE_DIR)
+        runs = [run_child(options["path"], cwd=cwd) for _ in range(options["runs"])]
+        profiled = run_child(options["path"], importtime=True, cwd=cwd)
+
+        medians = {phase: statistics.median(run["phases"][phase] for run in runs) for phase in PHASES}
+        wall = statistics.median(run["wall"] for run in runs)
+        self.stdout.write(
+            f"{os.environ.get('DJANGO_SETTINGS_MODULE')}: {len(profiled['apps'])} apps, "
+            f"first request {options['path']} -> {profiled['status']}; median of {len(runs)} cold start(s)"
+        )
+        for phase in PHASES:
+            self.stdout.write(f"  {phase:14} {medians[phase] * 1000:8.1f} ms")
+        self.stdout.write(f"  {'total':14} {sum(medians.values()) * 1000:8.1f} ms  (process wall {wall * 1000:.1f} ms)")
+
+        totals = charge(profiled["imports"], profiled["apps"])
+        ranked = sorted(totals.items(), key=lambda item: -sum(item[1].values()))
+        self.stdout.write("\nimport time by app, -X importtime ms (self time of the modules charged to it)")
+        self.stdout.write(f"  {'':32}" + "".join(f"{phase:>14}" for phase in PHASES) + f"{'total':>10}")
+        for owner, by_phase in ranked[:options["top"]]:
+            cells = "".join(f"{by_phase.get(phase, 0) / 1000:14.1f}" for phase in PHASES)
+            self.stdout.write(f"  {owner:32}{cells}{sum(by_phase.values()) / 1000:10.1f}")
+
+        top = sorted((entry for entry in profiled["imports"] if entry[3] == 0), key=lambda entry: -entry[2])
+        self.stdout.write("\nslowest top-level imports (cumulative ms, -X importtime)")
+        for phase, _, cumulative_us, _, module in top[:options["top"]]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f}  {phase:14} {module}")
+
+        stale = profiled["stale"]
+        compiling = compile_seconds(stale)
+        if stale:
+            self.stdout.write(self.style.WARNING(
+                f"\n{len(stale)} module(s) had no up-to-date .pyc and were compiled from source, "
+                f"about {compiling * 1000:.1f} ms of every cold start"
+                + (" (PYTHONDONTWRITEBYTECODE is set)" if sys.flags.dont_write_bytecode else "")
+                + "; run `python -m compileall` when building the image:"
+            ))
+            for path in sorted(stale)[:options["top"]]:
+                self.stdout.write(f"  {os.path.relpath(path, cwd)}")
+        else:
+            self.stdout.write("\nevery imported module had an up-to-date .pyc")
+
+        if options["output"]:
+            with open(options["output"], "w") as out:
+                json.dump({
+                    "settings": os.environ.get("DJANGO_SETTINGS_MODULE"),
+                    "phases_ms": {phase: round(seconds * 1000, 2) for phase, seconds in medians.items()},
+                    "wall_ms": round(wall * 1000, 2),
+                    "compile_ms": round(compiling * 1000, 2),
+                    "stale_bytecode": sorted(stale),
+                    "apps_ms": {
+                        owner: {phase: round(us / 1000, 2) for phase, us in by_phase.items()} for owner, by_phase in ranked
+                    },
+                }, out, indent=2)
+            self.stdout.write(f"\nwritten to {options['output']}")
@@ -0,0 +1,105 @@
+# accounts/management/commands/purge_otps.py
+"""
+Delete (and optionally archive) dead PasswordResetOTP rows in batches.
+
+    python manage.py purge_otps                          # expired + used codes
+    python manage.py purge_otps --archive otps.jsonl.gz  # keep a copy first
+    python manage.py purge_otps --keep-used --older-than 1440 --dry-run
+
+A row is dead once it is older than the OTP expiry (--older-than, default
+PASSWORD_RESET_OTP_EXPIRY_MINUTES) or has been used. Batches walk the primary
+key upwards (WHERE id > last ORDER BY id LIMIT n) and each delete is its own
+short transaction, so on SQLite the write lock is only held per batch and
+requests keep going in between (--sleep adds a pause). With --archive, each
+batch is appended to a gzip'd JSON-lines file before it is deleted; a batch
+interrupted between the two may appear twice in the archive.
+"""
+
+import gzip
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import PasswordResetOTP
+
+ARCHIVE_FIELDS = ["id", "gmail", "code", "created_at", "is_used", "is_verified", "token"]
+
+
+class Command(BaseCommand):
+    help = "Delete expired and used password reset OTPs in batches, optionally archiving them to .jsonl.gz."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="rows deleted per batch (default 1000)")
+        parser.add_argument(
+            "--older-than", type=int, default=None,
+            help="minutes after which a code is purged (default PASSWORD_RESET_OTP_EXPIRY_MINUTES)",
+        )
+        parser.add_argument("--keep-used", action="store_true", help="only purge by age, keep used codes until then")
+        parser.add_argument("--archive", metavar="PATH", help="append purged rows to this gzip'd JSON-lines file")
+        parser.add_argument("--sleep", type=float, default=0.0, help="seconds to pause between batches (default 0)")
+        parser.add_argument("--dry-run", action="store_true", help="count matching rows, delete nothing")
+
+    def dead_rows(self, options):
+        minutes = options["older_than"]
+        if minutes is None:
+            minutes = getattr(settings, "PASSWORD_RESET_OTP_EXPIRY_MINUTES", 10)
+        condition = Q(created_at__lt=timezone.now() - timedelta(minutes=minutes))
+        if not options["keep_used"]:
+            condition |= Q(is_used=True)
+        return PasswordResetOTP.objects.filter(condition)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+        queryset = self.dead_rows(options)
+
+        if options["dry_run"]:
+            self.stdout.write(f"{queryset.count()} row(s) would be purged")
+            return
+
+        archive = gzip.open(options["archive"], "at", encoding="utf-8") if options["archive"] else None
+        total = batches = 0
+        last_id = 0
+        started = time.monotonic()
+        try:
+            while True:
+                batch_started = time.monotonic()
+                page = queryset.filter(pk__gt=last_id).order_by("pk")[:batch_size]
+                if archive:
+                    rows = list(page.values(*ARCHIVE_FIELDS))
+                    ids = [row["id"] for row in rows]
+                else:
+                    ids = list(page.values_list("pk", flat=True))
+                if not ids:
+                    break
+
+                if archive:
+                    for row in rows:
+                        archive.write(json.dumps(row, default=str) + "\n")
+                    archive.flush()
+                deleted, _ = PasswordResetOTP.objects.filter(pk__in=ids).delete()
+
+                last_id = ids[-1]
+                total += deleted
+                batches += 1
+                elapsed = time.monotonic() - batch_started
+                self.stdout.write(f"batch {batches}: {deleted} row(s), {deleted / elapsed if elapsed else 0:.0f} rows/s")
+                if options["sleep"]:
+                    time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if archive:
+                archive.close()
+
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {total} row(s) purged in {batches} batch(es), {elapsed:.1f}s ({rate:.0f} rows/s)"
+        ))
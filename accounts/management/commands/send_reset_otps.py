@@ -0,0 +1,74 @@
+# accounts/management/commands/send_reset_otps.py
+"""
+Force a password reset: issue an OTP to many accounts at once and email it.
+
+    python manage.py send_reset_otps --domain client.example.com
+    python manage.py send_reset_otps --gmail a@example.com --gmail b@example.com
+    python manage.py send_reset_otps --all --batch-size 200 --dry-run
+
+The OTP rows and their outbox emails are written with bulk INSERTs in one
+transaction, which also revokes the codes those accounts already had, then the emails are sent in --batch-size chunks over a single
+SMTP connection (otp_store.send_reset_otps). Emails that fail
+stay in the outbox and are retried by `manage.py drain_outbox`. The Account
+admin has the same as an action, which returns once the rows are written and
+leaves the sending to a background thread (mail.dispatch_bulk) and shows the
+sent/failed counts on the next changelist view.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from accounts import otp_store
+from accounts.models import Account
+
+
+class Command(BaseCommand):
+    help = "Issue password reset OTPs to many accounts and send them over one SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--domain", action="append", default=[], help="accounts whose gmail is @DOMAIN (repeatable)")
+        parser.add_argument("--gmail", action="append", default=[], help="a single account by gmail (repeatable)")
+        parser.add_argument("--all", action="store_true", help="every active account")
+        parser.add_argument("--include-inactive", action="store_true", help="also inactive accounts")
+        parser.add_argument("--batch-size", type=int, default=100, help="emails per SMTP chunk (default 100)")
+        parser.add_argument("--dry-run", action="store_true", help="count the accounts, send nothing")
+
+    def selected(self, options):
+        if not (options["all"] or options["domain"] or options["gmail"]):
+            raise CommandError("pass --all, --domain or --gmail")
+        accounts = Account.objects.all()
+        if not options["all"]:
+            condition = Q()
+            for domain in options["domain"]:
+                condition |= Q(gmail__iendswith="@" + domain.lstrip("@"))
+            for gmail in options["gmail"]:
+                condition |= Q(gmail__iexact=gmail)
+            accounts = accounts.filter(condition)
+        if not options["include_inactive"]:
+            accounts = accounts.filter(is_active=True)
+        return accounts
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        accounts = self.selected(options)
+        if options["dry_run"]:
+            self.stdout.write(f"{accounts.count()} account(s) would get an OTP")
+            return
+
+        gmails = list(accounts.values_list("gmail", flat=True))
+        started = time.monotonic()
+
+        def progress(sent, failed):
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"sent {sent}, failed {failed} ({sent / elapsed if elapsed else 0:.0f} emails/s)")
+
+        sent, failed = otp_store.send_reset_otps(gmails, options["batch_size"], progress)
+        elapsed = time.monotonic() - started
+        style = self.style.WARNING if failed else self.style.SUCCESS
+        self.stdout.write(style(
+            f"Done: {len(gmails)} OTP(s) issued, {sent} email(s) sent, {failed} failed (left for drain_outbox) "
+            f"in {elapsed:.1f}s ({sent / elapsed if elapsed else 0:.0f} emails/s)"
+        ))
@@ -0,0 +1,306 @@
+# accounts/metrics.py
+"""
+Latency histograms for the accounts endpoints, exported in Prometheus text
+format.
+
+Recorded per request (MetricsMiddleware) for the views of accounts/urls.py
+only, labelled with their URL name:
+
+    accounts_request_duration_seconds{url_name}          whole request
+    accounts_phase_duration_seconds{url_name, phase}     time spent in
+        db    every SQL statement (execute wrapper on each DB connection)
+        hash  password hashing / verification (accounts.hashing)
+        mail  queueing the OTP email (accounts.mail)
+        jwt   minting and signing tokens (LoginSerializer)
+
+plus accounts_mail_send_seconds for the SMTP send of each outbox email on
+the background mail pool. Phases can nest (the outbox insert is also db).
+
+Each process keeps its histograms in memory and writes a snapshot to
+ACCOUNTS_METRICS_DIR/metrics-<pid>.json at most every
+ACCOUNTS_METRICS_FLUSH_SECONDS; the metrics view sums the snapshots of all
+workers. Snapshots of exited workers are kept (so totals don't drop when a
+worker is recycled) until they are ACCOUNTS_METRICS_RETAIN_SECONDS old.
+
+Per request the cost is a context variable, a few perf_counter() calls and
+one bisect per histogram, i.e. microseconds.
+
+The scrape endpoint (metrics_view) requires ACCOUNTS_METRICS_TOKEN as a
+bearer token and is off while it is unset.
+"""
+
+import atexit
+import bisect
+import contextvars
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import Http404, HttpResponse
+
+# upper bounds in seconds; the last bucket is +Inf
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "accounts_request_duration_seconds": "Duration of accounts requests by URL name.",
+    "accounts_phase_duration_seconds": "Time per request spent in db / hash / mail / jwt.",
+    "accounts_mail_send_seconds": "SMTP send time per outbox email (background mail pool).",
+}
+
+# phase name -> seconds, for the request being handled in this context
+_phases = contextvars.ContextVar("accounts_metric_phases", default=None)
+
+
+def enabled():
+    return getattr(settings, "ACCOUNTS_METRICS_ENABLED", True)
+
+
+def metrics_dir():
+    return str(getattr(settings, "ACCOUNTS_METRICS_DIR", os.path.join(tempfile.gettempdir(), "accounts-metrics")))
+
+
+class Registry:
+    """In-process histograms: (name, labels) -> per-bucket counts + sum."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._last_flush = 0.0
+        self._dirty = False
+
+    def reset(self):
+        # after fork: the parent's numbers are in the parent's snapshot
+        self._lock = threading.Lock()
+        self._series = {}
+        self._last_flush = 0.0
+        self._dirty = False
+
+    def observe(self, name, labels, seconds):
+        index = bisect.bisect_left(BUCKETS, seconds)
+        key = (name, labels)
+        with self._lock:
+            row = self._series.get(key)
+            if row is None:
+                row = self._series[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+            row[index] += 1
+            row[-1] += seconds
+            self._dirty = True
+
+    def snapshot(self):
+        with self._lock:
+            return [[name, dict(labels), row[:-1], row[-1]] for (name, labels), row in self._series.items()]
+
+    def maybe_flush(self):
+        if self._dirty and time.monotonic() - self._last_flush >= getattr(settings, "ACCOUNTS_METRICS_FLUSH_SECONDS", 1.0):
+            self.flush()
+
+    def flush(self):
+        if not self._series:
+            return
+        self._last_flush = time.monotonic()
+        self._dirty = False
+        directory = metrics_dir()
+        os.makedirs(directory, exist_ok=True)
+        # write + rename, so readers never see a half-written file
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+        with os.fdopen(fd, "w") as tmp:
+            json.dump({"pid": os.getpid(), "series": self.snapshot()}, tmp)
+        os.replace(tmp_path, os.path.join(directory, f"metrics-{os.getpid()}.json"))
+
+
+registry = Registry()
+os.register_at_fork(after_in_child=registry.reset)
+atexit.register(registry.flush)
+
+
+# --------------------
+# RECORDING
+# --------------------
+@contextmanager
+def phase(name):
+    """Add the time spent in the block to phase `name` of the current request."""
+    timings = _phases.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+
+
+def _db_timer(execute, sql, params, many, context):
+    timings = _phases.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings["db"] = timings.get("db", 0.0) + time.perf_counter() - started
+
+
+def install_db_timer(sender, connection, **kwargs):
+    """connection_created receiver: time every statement on `connection`."""
+    if _db_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _db_timer)
+
+
+def observe_mail_send(seconds):
+    registry.observe("accounts_mail_send_seconds", (), seconds)
+    registry.maybe_flush()
+
+
+def _begin():
+    return _phases.set({}), time.perf_counter()
+
+
+_views = None
+
+
+def _accounts_view(match):
+    """Whether a resolved request is for a view of accounts/urls.py, other than metrics."""
+    global _views
+    if _views is None:
+        from .urls import urlpatterns
+
+        _views = {pattern.callback for pattern in urlpatterns if pattern.name != "metrics"}
+    return match is not None and match.func in _views
+
+
+def _end(request, token, started):
+    elapsed = time.perf_counter() - started
+    timings = _phases.get()
+    _phases.reset(token)
+    match = getattr(request, "resolver_match", None)
+    if not _accounts_view(match):
+        # the admin, other apps, 404s: not ours to label
+        return
+    labels = (("url_name", match.url_name),)
+    registry.observe("accounts_request_duration_seconds", labels, elapsed)
+    for name, seconds in timings.items():
+        registry.observe("accounts_phase_duration_seconds", labels + (("phase", name),), seconds)
+    registry.maybe_flush()
+
+
+class MetricsMiddleware:
+    """Records the request / phase histograms; works under WSGI and ASGI."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not enabled():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token, started = _begin()
+        try:
+            return self.get_response(request)
+        finally:
+            _end(request, token, started)
+
+    async def __acall__(self, request):
+        token, started = _begin()
+        try:
+            return await self.get_response(request)
+        finally:
+            _end(request, token, started)
+
+
+# --------------------
+# EXPORT
+# --------------------
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read_snapshots():
+    directory = metrics_dir()
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    retain = getattr(settings, "ACCOUNTS_METRICS_RETAIN_SECONDS", 86400)
+    snapshots = []
+    for name in names:
+        if not (name.startswith("metrics-") and name.endswith(".json")):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+            if not _alive(snapshot["pid"]) and time.time() - os.path.getmtime(path) > retain:
+                os.remove(path)
+                continue
+        except (OSError, ValueError, KeyError):
+            continue
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def collect():
+    """Histograms of all worker processes, summed: {(name, labels): [counts, sum]}."""
+    registry.flush()
+    merged = {}
+    for snapshot in _read_snapshots():
+        for name, labels, counts, total in snapshot["series"]:
+            key = (name, tuple(sorted(labels.items())))
+            row = merged.setdefault(key, [[0] * len(counts), 0.0])
+            row[0] = [a + b for a, b in zip(row[0], counts)]
+            row[1] += total
+    return merged
+
+
+def _labels(pairs):
+    return ",".join(f'{key}="{value}"' for key, value in pairs)
+
+
+def render(merged):
+    lines = []
+    for name in sorted({name for name, _ in merged}):
+        lines.append(f"# HELP {name} {HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} histogram")
+        for (series_name, labels), (counts, total) in sorted(merged.items()):
+            if series_name != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{{{_labels(labels + (('le', bound),))}}} {cumulative}")
+            suffix = f"{{{_labels(labels)}}}" if labels else ""
+            lines.append(f"{name}_sum{suffix} {total:.6f}")
+            lines.append(f"{name}_count{suffix} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Answers only requests that carry
+    `Authorization: Bearer <ACCOUNTS_METRICS_TOKEN>`, and nothing at all until
+    that token is configured. Not by client address: behind a proxy on the
+    same host every request comes from 127.0.0.1.
+    """
+    token = getattr(settings, "ACCOUNTS_METRICS_TOKEN", None)
+    scheme, _, presented = request.headers.get("Authorization", "").partition(" ")
+    if not token or scheme.lower() != "bearer" or not hmac.compare_digest(presented.encode(), token.encode()):
+        raise Http404()
+    return HttpResponse(render(collect()), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:17
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_emailoutbox'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='account_username_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(django.db.models.functions.text.Lower('gmail'), name='account_gmail_lower_idx'),
+        ),
+    ]
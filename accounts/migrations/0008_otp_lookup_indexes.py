@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:28
+
+import django.db.models.functions.text
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_account_lower_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='passwordresetotp',
+            name='accounts_pa_gmail_188a13_idx',
+        ),
+        migrations.AlterField(
+            model_name='passwordresetotp',
+            name='token',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='passwordresetotp',
+            index=models.Index(django.db.models.functions.text.Lower('gmail'), models.F('code'), models.OrderBy(models.F('created_at'), descending=True), condition=models.Q(('is_used', False), ('is_verified', False)), name='otp_active_lookup_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:00
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_otp_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='passwordresetotp',
+            index=models.Index(fields=['created_at'], name='otp_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passwordresetotp',
+            index=models.Index(django.db.models.functions.text.Lower('gmail'), name='otp_gmail_lower_idx'),
+        ),
+    ]
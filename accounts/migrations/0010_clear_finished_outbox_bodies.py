@@ -0,0 +1,20 @@
+# Clears the bodies (OTP codes) of outbox emails that were already sent or
+# have failed for good; accounts.outbox clears them from now on.
+
+from django.db import migrations
+
+
+def clear_bodies(apps, schema_editor):
+    EmailOutbox = apps.get_model('accounts', 'EmailOutbox')
+    EmailOutbox.objects.filter(status__in=['sent', 'failed']).exclude(body='').update(body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_otp_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_bodies, migrations.RunPython.noop),
+    ]
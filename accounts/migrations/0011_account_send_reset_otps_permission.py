@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:37
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_clear_finished_outbox_bodies'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='account',
+            options={'permissions': [('send_reset_otps', 'Can send password reset OTPs in bulk')], 'verbose_name': 'user', 'verbose_name_plural': 'users'},
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.core.mail import EmailMessage
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 from datetime import timedelta
 import uuid
@@ -9,9 +11,42 @@ class Account(AbstactUser):
     username = models.CharField(max_length=150, unique=True)
     gmail = models.EmailField(unique=True)
     password = models.CharField(max_length=255)  # hashed
+
+    class Meta(AbstactUser.Meta):
+        permissions = [
+            ("send_reset_otps", "Can send password reset OTPs in bulk"),
+        ]
+        indexes = [
+            # case-insensitive login / OTP lookups, see accounts/identity.py
+            models.Index(Lower('username'), name='account_username_lower_idx'),
+            models.Index(Lower('gmail'), name='account_gmail_lower_idx'),
+        ]
+
     def __str__(self):
         return self.username
 
+class PasswordResetOTPQuerySet(models.QuerySet):
+    def active(self, minutes=10):
+        """Unused, unverified codes created within the last `minutes` (expiry in SQL)."""
+        return self.filter(
+            is_used=False,
+            is_verified=False,
+            created_at__gte=timezone.now() - timedelta(minutes=minutes),
+        )
+
+    def for_code(self, gmail, code):
+        """Case-insensitive gmail + code match that otp_active_lookup_idx can serve."""
+        return self.alias(gmail_lower=Lower('gmail')).filter(gmail_lower=gmail.lower(), code=code)
+
+    def for_gmail(self, gmail):
+        """Case-insensitive gmail match on the Lower('gmail') indexes (not LIKE / UPPER())."""
+        return self.alias(gmail_lower=Lower('gmail')).filter(gmail_lower=gmail.lower())
+
+    def for_gmails(self, gmails):
+        """for_gmail() for several gmails at once (an IN on the same index)."""
+        return self.alias(gmail_lower=Lower('gmail')).filter(gmail_lower__in=[gmail.lower() for gmail in gmails])
+
+
 class PasswordResetOTP(models.Model):
     """
     Stores OTP codes sent to emails for password reset.
@@ -22,11 +57,23 @@ class PasswordResetOTP(models.Model):
     is_used = models.BooleanField(default=False)
     is_verified = models.BooleanField(default=False)
     # optional: a UUID token (not necessary for our flow but handy)
-    token = models.UUIDField(default=uuid.uuid4, editable=False)
+    token = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
+
+    objects = PasswordResetOTPQuerySet.as_manager()
 
     class Meta:
         indexes = [
-            models.Index(fields=['gmail', 'code']),
+            # verify: active().for_code(...).latest('created_at'); partial, so
+            # used/verified rows (most of the table) are not in it
+            models.Index(
+                Lower('gmail'), 'code', models.F('created_at').desc(),
+                name='otp_active_lookup_idx',
+                condition=models.Q(is_used=False, is_verified=False),
+            ),
+            # admin changelist (accounts/admin.py): date hierarchy / recency
+            # filters, and the case-insensitive gmail prefix search
+            models.Index(fields=['created_at'], name='otp_created_at_idx'),
+            models.Index(Lower('gmail'), name='otp_gmail_lower_idx'),
         ]
 
     def expired(self, minutes=10):
@@ -34,4 +81,47 @@ class PasswordResetOTP(models.Model):
 
     def mark_used(self):
         self.is_used = True
-        self.save(update_fields=['is_used'])
\ No newline at end of file
+        self.save(update_fields=['is_used'])
+
+class EmailOutbox(models.Model):
+    """
+    Outgoing email, written in the same transaction as the row that caused it
+    (e.g. a PasswordResetOTP) so a crash before delivery does not lose it.
+    Rows are delivered by the mail pool (accounts.mail) or by
+    `manage.py drain_outbox`, see accounts/outbox.py.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    to = models.TextField()  # comma separated recipients
+    from_email = models.CharField(max_length=254, blank=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()  # cleared once sent or failed for good (holds the OTP code)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # when the row may next be claimed; doubles as the lease of a 'sending' row
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_id = models.UUIDField(null=True, blank=True, editable=False)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['claim_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.to}: {self.subject} ({self.status})"
+
+    def as_message(self):
+        return EmailMessage(self.subject, self.body, self.from_email or None, self.to.split(","))
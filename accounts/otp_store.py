@@ -0,0 +1,297 @@
+# accounts/otp_store.py
+"""
+Hot tier for OTP state, kept in its own shared cache (OTP_STORE_CACHE, an
+accounts.cache.SQLiteCache separate from the rate-limit and replica-pin keys)
+so that verify and reset are answered from memory instead of the primary
+database.
+
+PasswordResetOTP rows stay the durable record: they are created in the
+request transaction (together with the outbox email) and the reset claims
+its row with a conditional UPDATE; the verified / superseded-by-a-resend
+flags are written through, or behind by a background queue.
+
+Cache keys (all expire with the OTP, PASSWORD_RESET_OTP_EXPIRY_MINUTES):
+
+    otp:gmail:<gmail>          marker {"since": ts}: codes created before
+                               `since` were superseded by a resend
+    otp:code:<gmail>:<code>    entry for a code
+    otp:token:<token>          the same entry, by reset token
+    otp:verified:<id>          set once (cache.add) when the OTP is verified
+    otp:used:<id>              set once the reset token has been used
+
+The cache culls entries on its own (expiry, MAX_ENTRIES), so any of these
+keys can disappear independently. A lookup is only answered from the store
+when both the code's entry and its gmail's marker are present; a missing
+entry is not proof that there is no such code, and without the marker a
+superseded code cannot be told apart. Every other case returns MISS and the
+serializers query the database as before.
+
+Off by default; enable with OTP_HOT_STORE = True (and OTP_STORE_WRITE_BEHIND =
+True to move the flag writes off the request as well).
+"""
+
+import atexit
+import random
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from . import outbox
+from .background import BatchWorker
+from .identity import normalize_identifier
+from .mail import build_otp_email, dispatch_bulk, send_otp_email
+from .models import PasswordResetOTP
+
+# lookup result: the store cannot tell, ask the database
+MISS = object()
+
+
+def enabled():
+    return getattr(settings, "OTP_HOT_STORE", False)
+
+
+def _cache():
+    return caches[getattr(settings, "OTP_STORE_CACHE", "otp")]
+
+
+def _ttl():
+    return getattr(settings, "PASSWORD_RESET_OTP_EXPIRY_MINUTES", 10) * 60
+
+
+def _marker_key(gmail):
+    return f"otp:gmail:{gmail}"
+
+
+def _code_key(gmail, code):
+    return f"otp:code:{gmail}:{code}"
+
+
+def _token_key(token):
+    return f"otp:token:{token}"
+
+
+def expired(entry):
+    return time.time() > entry["created"] + _ttl()
+
+
+# --------------------
+# WRITE-BEHIND
+# --------------------
+def _write(items):
+    verified = [i for op, i in items if op == "verified"]
+    if verified:
+        PasswordResetOTP.objects.filter(pk__in=verified).update(is_verified=True)
+    for gmail, since in (arg for op, arg in items if op == "supersede"):
+        PasswordResetOTP.objects.for_gmail(gmail).filter(is_used=False, created_at__lt=since).update(is_used=True)
+
+
+class OTPWriteBehind(BatchWorker):
+    """Applies OTP state changes to PasswordResetOTP rows in batches."""
+    name = "otp-write-behind"
+
+    def handle_batch(self, items, state):
+        _write(items)
+        return state
+
+
+writer = OTPWriteBehind(queue_size=getattr(settings, "OTP_STORE_QUEUE_SIZE", 10000), batch_size=200)
+atexit.register(writer.shutdown)
+
+
+def _write_behind(op, arg):
+    if getattr(settings, "OTP_STORE_WRITE_BEHIND", False) and writer.submit((op, arg)):
+        return
+    # disabled, or the queue is full: write through rather than lose the update
+    _write([(op, arg)])
+
+
+# --------------------
+# STORE
+# --------------------
+def remember(otp):
+    """Cache a freshly committed PasswordResetOTP."""
+    if not enabled():
+        return
+    gmail = normalize_identifier(otp.gmail)
+    entry = {
+        "id": otp.pk,
+        "gmail": otp.gmail,
+        "code": otp.code,
+        "token": str(otp.token),
+        "created": otp.created_at.timestamp(),
+    }
+    remaining = entry["created"] + _ttl() - time.time()
+    if remaining <= 0:
+        return
+    cache = _cache()
+    cache.set_many({_code_key(gmail, otp.code): entry, _token_key(entry["token"]): entry}, timeout=remaining)
+    # keeps an existing marker, and its `since`, as is
+    cache.add(_marker_key(gmail), {"since": 0.0}, timeout=_ttl())
+
+
+def supersede(gmail):
+    """Invalidate every code issued to `gmail` so far (resend)."""
+    if enabled():
+        now = timezone.now()
+        _cache().set(_marker_key(normalize_identifier(gmail)), {"since": now.timestamp()}, timeout=_ttl())
+        _write_behind("supersede", (gmail, now))
+    else:
+        PasswordResetOTP.objects.for_gmail(gmail).filter(is_used=False).update(is_used=True)
+
+
+def supersede_many(gmails, batch_size=500):
+    """
+    supersede() for many gmails (bulk reset), written through: one UPDATE per
+    `batch_size` gmails, cache markers once the transaction commits.
+    """
+    now = timezone.now()
+    gmails = sorted({normalize_identifier(gmail) for gmail in gmails})
+    for start in range(0, len(gmails), batch_size):
+        PasswordResetOTP.objects.for_gmails(gmails[start:start + batch_size]).filter(
+            is_used=False, created_at__lt=now,
+        ).update(is_used=True)
+    if enabled():
+        markers = {_marker_key(gmail): {"since": now.timestamp()} for gmail in gmails}
+        transaction.on_commit(lambda: _cache().set_many(markers, timeout=_ttl()))
+
+
+def _state(cache, entry):
+    """
+    (verified, used, superseded) for a cached entry, in one round trip;
+    None when the gmail's marker is gone and supersession is unknown.
+    """
+    marker_key = _marker_key(normalize_identifier(entry["gmail"]))
+    got = cache.get_many([f"otp:verified:{entry['id']}", f"otp:used:{entry['id']}", marker_key])
+    marker = got.get(marker_key)
+    if marker is None:
+        return None
+    return (
+        f"otp:verified:{entry['id']}" in got,
+        f"otp:used:{entry['id']}" in got,
+        entry["created"] < marker["since"],
+    )
+
+
+def lookup(gmail, code):
+    """
+    Find a live, unverified OTP for (gmail, code).
+    Returns the entry, None when the store knows the code is spent (expired,
+    superseded, verified or used), or MISS.
+    """
+    if not enabled():
+        return MISS
+    cache = _cache()
+    gmail = normalize_identifier(gmail)
+    entry = cache.get(_code_key(gmail, code))
+    if entry is None:
+        # never cached, or culled: only the database knows
+        return MISS
+    if expired(entry):
+        return None
+    state = _state(cache, entry)
+    if state is None:
+        return MISS
+    return None if any(state) else entry
+
+
+def claim_verified(entry):
+    """Mark the OTP verified; False if a concurrent request got there first."""
+    if not _cache().add(f"otp:verified:{entry['id']}", True, timeout=_ttl()):
+        return False
+    _write_behind("verified", entry["id"])
+    return True
+
+
+def lookup_token(token):
+    """
+    Find a verified, unused OTP by reset token.
+    Returns the entry, None when it is known to be used or superseded, or
+    MISS (including when the store has not seen it verified; the database
+    decides then).
+    """
+    if not enabled():
+        return MISS
+    cache = _cache()
+    entry = cache.get(_token_key(token))
+    if entry is None:
+        return MISS
+    state = _state(cache, entry)
+    if state is None:
+        return MISS
+    verified, used, superseded = state
+    if used or superseded:
+        return None
+    return entry if verified else MISS
+
+
+def mark_used(entry):
+    """Record a completed reset (the row itself was claimed in the database)."""
+    _cache().set(f"otp:used:{entry['id']}", True, timeout=_ttl())
+
+
+def issue_otp(gmail):
+    """
+    Create a 4-digit OTP for `gmail`, write its email to the outbox in the
+    same transaction and cache it once committed.
+    """
+    code = f"{random.randint(0, 9999):04d}"
+    with transaction.atomic():
+        otp = PasswordResetOTP.objects.create(gmail=gmail, code=code)
+        send_otp_email(gmail, code)
+        transaction.on_commit(lambda: remember(otp))
+    return otp
+
+
+def issue_otps(gmails, batch_size=500):
+    """
+    issue_otp() for many gmails (bulk password reset): the codes they already
+    have are superseded, as by a resend, and the OTP rows and outbox emails are
+    written with bulk INSERTs in one transaction. Delivery is left to the
+    caller (outbox.deliver_ids, or drain_outbox). Returns the OTPs and their
+    outbox rows, in order.
+    """
+    codes = [f"{random.randint(0, 9999):04d}" for _ in gmails]
+    with transaction.atomic():
+        supersede_many(gmails, batch_size)
+        otps = PasswordResetOTP.objects.bulk_create(
+            [PasswordResetOTP(gmail=gmail, code=code) for gmail, code in zip(gmails, codes)],
+            batch_size=batch_size,
+        )
+        rows = outbox.queue_emails([build_otp_email(gmail, code) for gmail, code in zip(gmails, codes)], batch_size)
+        transaction.on_commit(lambda: [remember(otp) for otp in otps])
+    return otps, rows
+
+
+def send_reset_otps(gmails, batch_size=100, progress=None):
+    """
+    Issue an OTP to each of `gmails` and email them in chunks of `batch_size`
+    over one SMTP connection; failures stay in the outbox for drain_outbox.
+    Returns (sent, failed); see outbox.deliver_ids for `progress`.
+    """
+    _, rows = issue_otps(gmails)
+    return outbox.deliver_ids([row.pk for row in rows], batch_size=batch_size, progress=progress)
+
+
+def queue_reset_otps(gmails, on_done=None):
+    """
+    issue_otps() and leave the emails to the background bulk sender
+    (mail.dispatch_bulk, which calls `on_done(sent, failed)` when it is
+    through) once committed; returns the OTPs without waiting for SMTP.
+    """
+    otps, rows = issue_otps(gmails)
+    ids = [row.pk for row in rows]
+    transaction.on_commit(lambda: dispatch_bulk(ids, on_done))
+    return otps
+
+
+# async twins for accounts.async_views (the cache backend is sync)
+alookup = sync_to_async(lookup)
+aclaim_verified = sync_to_async(claim_verified)
+alookup_token = sync_to_async(lookup_token)
+amark_used = sync_to_async(mark_used)
+asupersede = sync_to_async(supersede)
+aissue_otp = sync_to_async(issue_otp)
@@ -0,0 +1,170 @@
+# accounts/outbox.py
+"""
+Transactional email outbox.
+
+ - queue_email() writes an EmailOutbox row; call it inside the same
+   transaction.atomic() block as the row the email is about. queue_emails()
+   does the same for many messages with one bulk INSERT.
+ - claim() moves a batch of due rows to 'sending' under a lease
+   (OTP_EMAIL_CLAIM_SECONDS), so concurrent drainers never share a row and a
+   crashed drainer's rows become claimable again once the lease runs out.
+ - deliver() sends a claimed batch over one SMTP connection and records the
+   outcome: 'sent', or back to 'pending' with exponential backoff, or
+   'failed' after OTP_EMAIL_MAX_ATTEMPTS. deliver_ids() claims and sends
+   given rows chunk by chunk over one connection (bulk OTP dispatch).
+ - the body (which holds the OTP code) is cleared as soon as a row is sent
+   or has failed for good; only the envelope and outcome are kept.
+
+Used by the background mail pool (accounts.mail) and `manage.py drain_outbox`.
+"""
+
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from . import metrics
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+_CLAIMABLE = [EmailOutbox.STATUS_PENDING, EmailOutbox.STATUS_SENDING]
+
+
+def _fields(message):
+    return {
+        "to": ",".join(message.to),
+        "from_email": message.from_email or "",
+        "subject": message.subject,
+        "body": message.body,
+    }
+
+
+def queue_email(message):
+    """Persist an EmailMessage as a pending outbox row."""
+    return EmailOutbox.objects.create(**_fields(message))
+
+
+def queue_emails(messages, batch_size=500):
+    """queue_email() for many messages: bulk INSERTs, rows returned with their ids."""
+    return EmailOutbox.objects.bulk_create([EmailOutbox(**_fields(m)) for m in messages], batch_size=batch_size)
+
+
+def claim(limit=100, ids=None):
+    """
+    Claim up to `limit` due rows (optionally restricted to `ids`) and return them.
+    Costs three statements regardless of batch size.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, "OTP_EMAIL_CLAIM_SECONDS", 300))
+
+    due = EmailOutbox.objects.filter(status__in=_CLAIMABLE, next_attempt_at__lte=now)
+    if ids is not None:
+        due = due.filter(pk__in=ids)
+    pks = list(due.order_by("next_attempt_at", "pk").values_list("pk", flat=True)[:limit])
+    if not pks:
+        return []
+
+    claim_id = uuid.uuid4()
+    # re-check the due condition so a row claimed by someone else in between is skipped
+    EmailOutbox.objects.filter(
+        pk__in=pks, status__in=_CLAIMABLE, next_attempt_at__lte=now
+    ).update(status=EmailOutbox.STATUS_SENDING, claim_id=claim_id, next_attempt_at=now + lease)
+    return list(EmailOutbox.objects.filter(claim_id=claim_id).order_by("pk"))
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt once `attempts` attempts have failed."""
+    base = getattr(settings, "OTP_EMAIL_RETRY_BASE_SECONDS", 30)
+    cap = getattr(settings, "OTP_EMAIL_RETRY_MAX_SECONDS", 3600)
+    return timedelta(seconds=min(cap, base * 2 ** max(0, attempts - 1)))
+
+
+def _record_failure(row, exc):
+    max_attempts = getattr(settings, "OTP_EMAIL_MAX_ATTEMPTS", 5)
+    row.attempts += 1
+    row.last_error = f"{type(exc).__name__}: {exc}"[:1000]
+    row.claim_id = None
+    if row.attempts >= max_attempts:
+        row.status = EmailOutbox.STATUS_FAILED
+        row.body = ""
+        logger.error("Giving up on outbox email %s to %s after %d attempts: %s", row.pk, row.to, row.attempts, row.last_error)
+    else:
+        row.status = EmailOutbox.STATUS_PENDING
+        row.next_attempt_at = timezone.now() + retry_delay(row.attempts)
+        logger.warning("Outbox email %s to %s failed (attempt %d): %s", row.pk, row.to, row.attempts, row.last_error)
+    row.save(update_fields=["attempts", "last_error", "claim_id", "status", "next_attempt_at", "body"])
+
+
+def close_connection(connection):
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            logger.warning("Error closing SMTP connection", exc_info=True)
+    return None
+
+
+def deliver(rows, connection=None):
+    """
+    Send claimed `rows` over `connection` (opened if None).
+    Returns (sent, failed, connection); the connection is None if it broke
+    and should be reopened by the caller.
+    """
+    if not rows:
+        return 0, 0, connection
+
+    sent_pks = []
+    failed = 0
+    for row in rows:
+        try:
+            if connection is None:
+                connection = get_connection(fail_silently=False)
+                connection.open()
+            started = time.perf_counter()
+            connection.send_messages([row.as_message()])
+            metrics.observe_mail_send(time.perf_counter() - started)
+            sent_pks.append(row.pk)
+        except Exception as exc:
+            failed += 1
+            _record_failure(row, exc)
+            # the session may be half-dead; reconnect for the next row
+            connection = close_connection(connection)
+
+    if sent_pks:
+        EmailOutbox.objects.filter(pk__in=sent_pks).update(
+            status=EmailOutbox.STATUS_SENT,
+            sent_at=timezone.now(),
+            body="",
+            attempts=F("attempts") + 1,
+            claim_id=None,
+            last_error="",
+        )
+    return len(sent_pks), failed, connection
+
+
+def deliver_ids(ids, batch_size=100, progress=None):
+    """
+    Claim and send the outbox rows `ids` in chunks of `batch_size`, all over
+    one SMTP connection (reopened only if it breaks). Rows that fail stay in
+    the outbox for retry by drain_outbox. `progress(sent, failed)` is called
+    after each chunk with the running totals. Returns (sent, failed).
+    """
+    total_sent = total_failed = 0
+    connection = None
+    try:
+        for start in range(0, len(ids), batch_size):
+            rows = claim(limit=batch_size, ids=ids[start:start + batch_size])
+            sent, failed, connection = deliver(rows, connection)
+            total_sent += sent
+            total_failed += failed
+            if progress is not None:
+                progress(total_sent, total_failed)
+    finally:
+        close_connection(connection)
+    return total_sent, total_failed
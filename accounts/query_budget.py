@@ -0,0 +1,158 @@
+# accounts/query_budget.py
+"""
+Per-endpoint SQL budgets: how many statements an accounts view may run and
+how long they may take in total.
+
+    with QueryRecorder() as recorder:
+        client.post(reverse("login"), ...)
+    recorder.check("login")          # raises QueryBudgetExceeded, listing the SQL
+
+QueryBudgetTestMixin.assertQueryBudget() wraps this for accounts/tests.py,
+and QueryBudgetMiddleware applies it to every request in development:
+
+    MIDDLEWARE = [..., "accounts.query_budget.QueryBudgetMiddleware"]  # DEBUG only
+
+Budgets are DEFAULT_BUDGETS overridden by ACCOUNTS_QUERY_BUDGETS, keyed by URL
+name. Transaction control (BEGIN / COMMIT / SAVEPOINT ...) is recorded but
+not counted. Statements are captured through a context variable read by an
+execute wrapper on every connection, so queries the async views run in
+sync_to_async threads are included.
+"""
+
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGETS = {
+    "login": {"queries": 1, "ms": 50},
+    "otp-request": {"queries": 3, "ms": 50},
+    "verify-otp": {"queries": 2, "ms": 50},
+    "reset-password": {"queries": 3, "ms": 50},
+    "resend-otp": {"queries": 4, "ms": 50},
+}
+
+_TRANSACTION_CONTROL = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE SAVEPOINT")
+
+_recorder = contextvars.ContextVar("accounts_query_recorder", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def budget_for(url_name):
+    budgets = {**DEFAULT_BUDGETS, **getattr(settings, "ACCOUNTS_QUERY_BUDGETS", {})}
+    return budgets.get(url_name)
+
+
+def _record(execute, sql, params, many, context):
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.add(sql, params, (time.perf_counter() - started) * 1000)
+
+
+def install_recorder(sender, connection, **kwargs):
+    """connection_created receiver: let QueryRecorder see `connection`."""
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record)
+
+
+class QueryRecorder:
+    """Collects (sql, params, ms) of the statements run inside the block."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __enter__(self):
+        self._token = _recorder.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _recorder.reset(self._token)
+        return False
+
+    def add(self, sql, params, ms):
+        self.statements.append((sql, params, ms))
+
+    @property
+    def queries(self):
+        return [s for s in self.statements if not s[0].lstrip().upper().startswith(_TRANSACTION_CONTROL)]
+
+    @property
+    def total_ms(self):
+        return sum(ms for _, _, ms in self.queries)
+
+    def report(self):
+        return "\n".join(
+            f"  {i}. [{ms:.2f} ms] {sql}" + (f"  -- params {params!r}" if params else "")
+            for i, (sql, params, ms) in enumerate(self.queries, 1)
+        )
+
+    def violation(self, url_name, budget=None):
+        """Description of how the budget for `url_name` was exceeded, or None."""
+        budget = budget or budget_for(url_name)
+        if not budget:
+            return None
+        count, total_ms = len(self.queries), self.total_ms
+        over = []
+        if "queries" in budget and count > budget["queries"]:
+            over.append(f"{count} queries (budget {budget['queries']})")
+        if "ms" in budget and total_ms > budget["ms"]:
+            over.append(f"{total_ms:.1f} ms of SQL (budget {budget['ms']} ms)")
+        if not over:
+            return None
+        return f"{url_name} ran {' and '.join(over)}:\n{self.report()}"
+
+    def check(self, url_name, budget=None):
+        problem = self.violation(url_name, budget)
+        if problem:
+            raise QueryBudgetExceeded(problem)
+
+
+class QueryBudgetTestMixin:
+    """For TestCase classes: `with self.assertQueryBudget("login"): ...`."""
+
+    @contextmanager
+    def assertQueryBudget(self, url_name, **budget):
+        with QueryRecorder() as recorder:
+            yield recorder
+        problem = recorder.violation(url_name, budget or None)
+        if problem:
+            raise self.failureException(problem)
+
+
+class QueryBudgetMiddleware:
+    """
+    Development aid (only active with DEBUG = True): records the SQL of each
+    request, adds an X-Query-Count header and logs a warning listing the
+    statements when the URL name's budget is exceeded. With
+    ACCOUNTS_QUERY_BUDGETS_STRICT = True the request fails instead.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        response["X-Query-Count"] = str(len(recorder.queries))
+        match = getattr(request, "resolver_match", None)
+        problem = recorder.violation(match.url_name) if match and match.url_name else None
+        if problem:
+            if getattr(settings, "ACCOUNTS_QUERY_BUDGETS_STRICT", False):
+                raise QueryBudgetExceeded(problem)
+            logger.warning("Query budget exceeded: %s", problem)
+        return response
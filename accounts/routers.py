@@ -0,0 +1,189 @@
+# accounts/routers.py
+"""
+Read replica routing for the accounts models.
+
+    DATABASES["replica"] = {...}
+    ACCOUNTS_READ_REPLICA = "replica"
+    DATABASE_ROUTERS = ["accounts.routers.ReplicaRouter"]
+    MIDDLEWARE = [..., "accounts.routers.ReplicaPinningMiddleware", ...]
+
+Reads of Account and PasswordResetOTP (login, OTP verify, the gmail existence
+checks) go to the ACCOUNTS_READ_REPLICA alias; all writes and every other
+model stay on default. Reads only go to the replica inside a request handled
+by ReplicaPinningMiddleware, and only until that request writes:
+
+ - the first write (save / create / update / delete / select_for_update)
+   pins the rest of the request to default, so it reads its own writes
+ - reads inside a transaction on default stay in it
+ - the response of a request that wrote sets a cookie pinning the client to
+   default for ACCOUNTS_REPLICA_PIN_SECONDS (keep it above the replica lag),
+   so its next request sees the write too
+ - the cookie only comes back from same-origin clients (cross-origin API
+   calls are made without credentials, CORS_ALLOW_CREDENTIALS = False), so
+   the reset flow also pins by what the next request sends: verify pins the
+   reset token, a reset pins the gmail (pin()); the reset and the login
+   that present them read from default (follows_write()). These pins live
+   in the ACCOUNTS_REPLICA_PIN_CACHE cache, which must be shared by every
+   app server reading the replica
+ - management commands, background threads and anything else outside a
+   request read from default
+
+The pin is a context variable holding a mutable dict, so a write made
+through sync_to_async() / the async ORM pins the async view that made it.
+
+Locally, a second SQLite file stands in for the replica:
+
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": BASE_DIR / "replica.sqlite3",
+        "TEST": {"MIRROR": "default"},
+    }
+    python manage.py migrate --database replica
+    sqlite3 db.sqlite3 ".backup replica.sqlite3"    # catch the replica up
+
+Nothing copies writes to it, so it lags until the next .backup, which is
+what makes pinning visible. TEST MIRROR keeps the test run on one database.
+"""
+
+import contextvars
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_MODELS = {"accounts.account", "accounts.passwordresetotp"}
+PIN_COOKIE = "accounts_db_pin"
+
+# {"pinned": bool, "wrote": bool} for the request handled in this context
+_state = contextvars.ContextVar("accounts_replica_state", default=None)
+
+
+def replica_alias():
+    return getattr(settings, "ACCOUNTS_READ_REPLICA", None)
+
+
+class ReplicaRouter:
+    """Account / PasswordResetOTP reads to the replica, writes to default."""
+
+    def db_for_read(self, model, **hints):
+        alias = replica_alias()
+        if alias is None or model._meta.label_lower not in REPLICA_MODELS:
+            return None
+        state = _state.get()
+        if state is None or state["pinned"]:
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            # related lookups follow the row they start from
+            return instance._state.db
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state["pinned"] = state["wrote"] = True
+        if replica_alias() is not None and model._meta.label_lower in REPLICA_MODELS:
+            # without this a row read from the replica would be saved back there
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        alias = replica_alias()
+        if alias is not None and {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, alias}:
+            return True
+        return None
+
+
+def _pin_key(value):
+    return f"accounts_db_pin:{str(value).strip().lower()}"
+
+
+def pin(*values):
+    """
+    A write was made that the client will read back by one of `values` (a
+    gmail, a reset token): send reads that present them to default for
+    ACCOUNTS_REPLICA_PIN_SECONDS, see follows_write().
+    """
+    seconds = getattr(settings, "ACCOUNTS_REPLICA_PIN_SECONDS", 5)
+    if replica_alias() is None or seconds <= 0:
+        return
+    cache = caches[getattr(settings, "ACCOUNTS_REPLICA_PIN_CACHE", "default")]
+    cache.set_many({_pin_key(value): True for value in values}, timeout=seconds)
+
+
+def follows_write(*values):
+    """
+    Pin the rest of this request to default if one of `values` was pin()ned
+    recently. True if that moved its reads off the replica, i.e. what was
+    read so far may be stale.
+    """
+    state = _state.get()
+    if replica_alias() is None or state is None or state["pinned"]:
+        return False
+    cache = caches[getattr(settings, "ACCOUNTS_REPLICA_PIN_CACHE", "default")]
+    if not cache.get_many([_pin_key(value) for value in values]):
+        return False
+    state["pinned"] = True
+    return True
+
+
+# async twins (the cache backend is sync); the pin state dict is shared with the thread
+async def apin(*values):
+    if replica_alias() is not None:
+        await sync_to_async(pin)(*values)
+
+
+async def afollows_write(*values):
+    if replica_alias() is None:
+        return False
+    return await sync_to_async(follows_write)(*values)
+
+
+def _begin(request):
+    return _state.set({"pinned": PIN_COOKIE in request.COOKIES, "wrote": False})
+
+
+def _end(token, response):
+    state = _state.get()
+    _state.reset(token)
+    seconds = getattr(settings, "ACCOUNTS_REPLICA_PIN_SECONDS", 5)
+    if state["wrote"] and seconds > 0:
+        response.set_cookie(PIN_COOKIE, "1", max_age=seconds, httponly=True, samesite="Lax")
+    return response
+
+
+class ReplicaPinningMiddleware:
+    """Enables replica reads for the request, with read-your-writes pinning; WSGI and ASGI."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if replica_alias() is None:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _begin(request)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            _state.reset(token)
+            raise
+        return _end(token, response)
+
+    async def __acall__(self, request):
+        token = _begin(request)
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            _state.reset(token)
+            raise
+        return _end(token, response)
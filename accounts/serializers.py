@@ -6,39 +6,119 @@ Serializers for:
  - OTP verify (check OTP and return reset token)
  - Reset password (accept reset_token + new passwords and update the account)
 Notes:
- - This version uses synchronous SMTP (django.core.mail.send_mail).
+ - OTP emails are written to the outbox (accounts.outbox) in the same
+   transaction as the OTP row and sent off the request thread by the mail
+   pool (accounts.mail); `manage.py drain_outbox` retries anything left over.
  - The reset flow returns a reset_token in verify step; the reset endpoint uses that.
+ - Verify and reset are answered from the OTP hot tier (accounts.otp_store)
+   when it knows the code/token, and fall back to the PasswordResetOTP table.
+ - Every serializer also has an async path (ais_valid / avalidate / asave)
+   used by accounts.async_views; it shares the checks below and swaps the
+   ORM, cache and hashing calls for their non-blocking twins.
 """
 
+from collections.abc import Mapping
+
+from asgiref.sync import sync_to_async
 from rest_framework import serializers
+from rest_framework.fields import SkipField, get_error_detail
+from rest_framework.serializers import as_serializer_error
+from rest_framework.settings import api_settings
 from django.conf import settings
-from django.contrib.auth.hashers import check_password, make_password
-from django.contrib.auth import get_user_model
-from django.core.mail import send_mail, BadHeaderError
-from rest_framework_simplejwt.tokens import RefreshToken
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Subquery
+from django.db.models.functions import Lower
+from django.utils import timezone
 
-import random
 import re
+from datetime import timedelta
+from functools import partial
+
+from . import hashing, otp_store, routers
+from .authentication import forget_accounts
+from .metrics import phase
+from .tokens import issue_tokens
+from .identity import (
+    accounts_with_gmail,
+    agmail_registered,
+    aresolve_account,
+    gmail_registered,
+    resolve_account,
+)
+from .models import PasswordResetOTP
+
+
+def otp_expiry_minutes():
+    return getattr(settings, "PASSWORD_RESET_OTP_EXPIRY_MINUTES", 10)
+
 
-from .models import Account, PasswordResetOTP
+class AsyncValidationMixin:
+    """
+    ais_valid(): the async twin of is_valid() for use under ASGI.
+
+    Field parsing is pure CPU and runs inline; per-field hooks are looked up
+    as `avalidate_<field>` (awaited) instead of `validate_<field>`, and the
+    object-level hook is `await avalidate(attrs)` (defaults to validate()).
+    Errors come out in the same shape as is_valid().
+    """
 
-User = get_user_model()
+    async def ais_valid(self):
+        assert hasattr(self, "initial_data"), "Cannot call `.ais_valid()` without passing `data=`."
+        if not hasattr(self, "_validated_data"):
+            try:
+                attrs = await self._ato_internal_value(self.initial_data)
+                self._validated_data = await self.avalidate(attrs)
+            except serializers.ValidationError as exc:
+                self._validated_data = {}
+                self._errors = as_serializer_error(exc)
+            else:
+                self._errors = {}
+        return not bool(self._errors)
+
+    async def avalidate(self, attrs):
+        return self.validate(attrs)
+
+    async def _ato_internal_value(self, data):
+        if not isinstance(data, Mapping):
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ["Invalid data."]})
+        attrs, errors = {}, {}
+        for field in self._writable_fields:
+            hook = getattr(self, "avalidate_" + field.field_name, None)
+            try:
+                value = field.run_validation(field.get_value(data))
+                if hook is not None:
+                    value = await hook(value)
+            except serializers.ValidationError as exc:
+                errors[field.field_name] = exc.detail
+            except DjangoValidationError as exc:
+                errors[field.field_name] = get_error_detail(exc)
+            except SkipField:
+                pass
+            else:
+                # accounts serializers only have flat (non-dotted) sources
+                attrs[field.source] = value
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
 
 
 # --------------------
 # LOGIN SERIALIZER
 # --------------------
-class LoginSerializer(serializers.Serializer):
+class LoginSerializer(AsyncValidationMixin, serializers.Serializer):
     """
     Accepts an 'identifier' (username or gmail/email) and 'password'.
-    Returns JWT tokens and basic user info on success.
+    Returns JWT tokens and basic user info on success; with access_only=true
+    only the access token (for clients that never refresh).
     """
     identifier = serializers.CharField()
     username = serializers.CharField(required=False)  # backward compatibility
     password = serializers.CharField(write_only=True)
+    access_only = serializers.BooleanField(required=False, default=False)
 
-    def validate(self, attrs):
+    def _credentials(self, attrs):
         #  Extract identifier (username/email/gmail)
         raw_identifier = (
             attrs.get("identifier") or
@@ -56,133 +136,172 @@ class LoginSerializer(serializers.Serializer):
        # -------- PASSWORD VALIDATION --------
         if len(password) < 8:
             raise serializers.ValidationError({"error": "Enter the valid password of minimum 8 characters"})
+        return identifier, password
 
-        # -------- LOOKUP USER IN Custom Account Model --------
-        account_user = None
-        try:
-            account_user = Account.objects.get(username__iexact=identifier)
-        except Account.DoesNotExist:
-            try:
-                account_user = Account.objects.get(gmail__iexact=identifier)
-            except Account.DoesNotExist:
-                account_user = None
+    def _login_response(self, user, access_only=False):
+        user_info = {"id": user.id, "username": user.username, "gmail": user.gmail}
 
-        # -------- LOOKUP USER IN Django User Model --------
-        django_user = None
-        if account_user is None:
-            try:
-                django_user = User.objects.get(username__iexact=identifier)
-            except User.DoesNotExist:
-                try:
-                    django_user = User.objects.get(email__iexact=identifier)
-                except User.DoesNotExist:
-                    django_user = None
-
-        # -------- IF NO USER FOUND --------
-        if account_user is None and django_user is None:
+        # -------- GENERATE TOKENS (accounts.tokens) --------
+        with phase("jwt"):
+            tokens = issue_tokens(user, access_only=access_only)
+
+        return {**tokens, "user": user_info}
+
+    def validate(self, attrs):
+        identifier, password = self._credentials(attrs)
+
+        # -------- LOOKUP USER (one query: username OR gmail) --------
+        user = resolve_account(identifier)
+        if user is None:
             raise serializers.ValidationError({"error": "Enter valid username/email"})
 
-        # -------- PASSWORD CHECK --------
-        if account_user is not None:
-            if not check_password(password, account_user.password):
-                raise serializers.ValidationError({"error": "Enter the valid password"})
-            user = account_user
-            user_info = {"id": user.id, "username": user.username, "gmail": user.gmail}
-        else:
-            if not django_user.check_password(password):
-                raise serializers.ValidationError({"error": "Enter the valid password"})
-            user = django_user
-            user_info = {"id": user.id, "username": user.username, "gmail": getattr(user, "email", "")}
+        # -------- PASSWORD CHECK (rehash to the current cost if outdated) --------
+        def upgrade_hash(raw_password):
+            user.password = hashing.make_password(raw_password)
+            user.save(update_fields=["password"])
+
+        if not hashing.check_password(password, user.password, setter=upgrade_hash):
+            raise serializers.ValidationError({"error": "Enter the valid password"})
+        return self._login_response(user, attrs.get("access_only", False))
+
+    async def avalidate(self, attrs):
+        identifier, password = self._credentials(attrs)
+        user = await aresolve_account(identifier)
+        if user is None:
+            raise serializers.ValidationError({"error": "Enter valid username/email"})
 
-        # -------- GENERATE TOKENS --------
-        refresh = RefreshToken()
-        access = refresh.access_token
-        access["user_id"] = user.id
+        async def upgrade_hash(raw_password):
+            user.password = await hashing.amake_password(raw_password)
+            await user.asave(update_fields=["password"])
 
-        return {"refresh": str(refresh), "access": str(access), "user": user_info}
+        if not await hashing.acheck_password(password, user.password, setter=upgrade_hash):
+            raise serializers.ValidationError({"error": "Enter the valid password"})
+        return self._login_response(user, attrs.get("access_only", False))
 
 
 # --------------------
 # OTP REQUEST SERIALIZER
 # --------------------
-class OTPRequestSerializer(serializers.Serializer):
+class OTPRequestSerializer(AsyncValidationMixin, serializers.Serializer):
     """
     Request an OTP to be sent to the provided gmail.
-    Uses synchronous Django send_mail (SMTP). Validate that the gmail exists
-    in either the custom Account model or Django's User model.
+    The email is queued on the background mail pool (accounts.mail).
+    Validate that the gmail belongs to a registered Account.
     """
     gmail = serializers.EmailField()
 
     def validate_gmail(self, value):
-        # Check if this email exists either in Account or User
-        exists_in_account = Account.objects.filter(gmail__iexact=value).exists()
-        exists_in_user = User.objects.filter(email__iexact=value).exists()
-        if not (exists_in_account or exists_in_user):
+        if not gmail_registered(value):
             # ValidationError expects a string (or list), not a dict
             raise serializers.ValidationError("Enter a registered email")
         return value
 
+    async def avalidate_gmail(self, value):
+        if not await agmail_registered(value):
+            raise serializers.ValidationError("Enter a registered email")
+        return value
+
     def save(self, **kwargs):
         gmail = self.validated_data["gmail"]
-        # generate 4-digit OTP
-        code = f"{random.randint(0, 9999):04d}"
-        otp = PasswordResetOTP.objects.create(gmail=gmail, code=code)
-
-        # Build email content
-        subject = getattr(settings, "PASSWORD_RESET_SUBJECT", "Your OTP Code")
-        message = f"Your password reset OTP is: {code}\nThis OTP is valid for {getattr(settings, 'PASSWORD_RESET_OTP_EXPIRY_MINUTES', 10)} minutes."
-        from_email = getattr(settings, "DEFAULT_FROM_EMAIL", None)
         try:
-            # synchronous SMTP send
-            send_mail(subject, message, from_email, [gmail], fail_silently=False)
-        except BadHeaderError:
-            # Re-raise as serializer error so view returns 400
-            raise serializers.ValidationError({"error":"Invalid header found when sending email"})
+            # OTP row and outbox row commit together; delivery happens after commit
+            otp = otp_store.issue_otp(gmail)
         except Exception:
-            # Log or return a friendly error
             # In production log the exception; here we raise SerializerError for the client
             raise serializers.ValidationError({"error":"Failed to send OTP email:" })
         return otp
 
+    async def asave(self, **kwargs):
+        # transaction.atomic() is sync-only, so the two-row write runs in a thread
+        return await sync_to_async(self.save)(**kwargs)
+
 
 # --------------------
 # OTP VERIFY SERIALIZER
 # --------------------
-class OTPVerifySerializer(serializers.Serializer):
+class OTPVerifySerializer(AsyncValidationMixin, serializers.Serializer):
     """
-    Verifies the OTP supplied by the user. Attaches the OTP record (otp_record)
-    to validated_data so the view can mark it verified and return the reset token.
+    Verifies the OTP supplied by the user and returns the reset token from
+    save(). validate() only consults the hot tier (accounts.otp_store) and
+    attaches its entry as otp_entry; codes it doesn't know are looked up and
+    marked verified by save(). Either way the reset token is the one the OTP
+    was issued with.
     """
     gmail = serializers.EmailField()
     otp = serializers.CharField()
 
-    def validate(self, attrs):
-        gmail = attrs.get("gmail")
-        otp = attrs.get("otp", "").strip()
-
-        otp_queryset = PasswordResetOTP.objects.filter(gmail__iexact=gmail, code=otp, is_used=False)
-
-        # if model has is_verified, ensure we only consider not-yet-verified records
-        if hasattr(PasswordResetOTP, "_meta") and any(f.name == "is_verified" for f in PasswordResetOTP._meta.get_fields()):
-            otp_queryset = otp_queryset.filter(is_verified=False)
-
-        try:
-            otp_record = otp_queryset.latest("created_at")
-        except PasswordResetOTP.DoesNotExist:
+    def _newest(self):
+        """
+        pk and token of the newest unused, unverified, unexpired row for
+        gmail + code, all in SQL (otp_active_lookup_idx).
+        """
+        gmail = self.validated_data["gmail"]
+        otp = self.validated_data["otp"].strip()
+        active = PasswordResetOTP.objects.active(minutes=otp_expiry_minutes())
+        return active.for_code(gmail, otp).order_by("-created_at").values("pk", "token")
+
+    def _claim(self, row):
+        """
+        The conditional UPDATE marking `row` verified: it re-checks that the
+        row is still active, so of two concurrent verifies only one updates it.
+        """
+        if row is None:
+            return PasswordResetOTP.objects.none()
+        return PasswordResetOTP.objects.active(minutes=otp_expiry_minutes()).filter(pk=row["pk"])
+
+    def _from_store(self, attrs, entry):
+        if entry is None:
             raise serializers.ValidationError({"error": "invalid or expired otp"})
+        attrs["otp_entry"] = entry
+        return attrs
 
-        # expiration check
-        if otp_record.expired(minutes=getattr(settings, "PASSWORD_RESET_OTP_EXPIRY_MINUTES", 10)):
-            raise serializers.ValidationError({"error": "invalid or expired otp"})
+    def validate(self, attrs):
+        entry = otp_store.lookup(attrs.get("gmail"), attrs.get("otp", "").strip())
+        if entry is not otp_store.MISS:
+            return self._from_store(attrs, entry)
+        return attrs
 
-        attrs["otp_rec"] = otp_record
+    async def avalidate(self, attrs):
+        entry = await otp_store.alookup(attrs.get("gmail"), attrs.get("otp", "").strip())
+        if entry is not otp_store.MISS:
+            return self._from_store(attrs, entry)
         return attrs
 
+    def save(self, **kwargs):
+        entry = self.validated_data.get("otp_entry")
+        if entry is not None:
+            # cache.add: of two concurrent verifies only one wins
+            if not otp_store.claim_verified(entry):
+                raise serializers.ValidationError({"error": ["invalid or expired otp"]})
+            token = entry["token"]
+        else:
+            row = self._newest().first()
+            if not self._claim(row).update(is_verified=True):
+                raise serializers.ValidationError({"error": ["invalid or expired otp"]})
+            token = row["token"]
+        # the reset that presents this token reads it from default (accounts.routers)
+        routers.pin(token)
+        return str(token)
+
+    async def asave(self, **kwargs):
+        entry = self.validated_data.get("otp_entry")
+        if entry is not None:
+            if not await otp_store.aclaim_verified(entry):
+                raise serializers.ValidationError({"error": ["invalid or expired otp"]})
+            token = entry["token"]
+        else:
+            row = await self._newest().afirst()
+            if not await self._claim(row).aupdate(is_verified=True):
+                raise serializers.ValidationError({"error": ["invalid or expired otp"]})
+            token = row["token"]
+        await routers.apin(token)
+        return str(token)
+
 
 # ---------------------
 # RESET PASSWORD SERIALIZER
 # ---------------------
-class ResetPasswordSerializer(serializers.Serializer):
+class ResetPasswordSerializer(AsyncValidationMixin, serializers.Serializer):
     """
     Accepts only:
       - new_password
@@ -214,7 +333,7 @@ class ResetPasswordSerializer(serializers.Serializer):
         attrs["new_password_valid"] = new_password
         return attrs
 
-    def save(self, **kwargs):
+    def _reset_token(self):
         # We expect the view to pass the request in context so we can read headers
         request = self.context.get("request")
         token = None
@@ -224,93 +343,182 @@ class ResetPasswordSerializer(serializers.Serializer):
 
         if not token:
             raise serializers.ValidationError({"error": "reset token required (X-Reset-Token header or reset_token in body)"})
+        return token
 
-        # find OTP by token
-        try:
-            otp_record = PasswordResetOTP.objects.get(token=token, is_used=False)
-        except PasswordResetOTP.DoesNotExist:
-            raise serializers.ValidationError({"error": "invalid or used reset token"})
-
+    def _check_otp(self, otp_record):
         # optional: require verification if model supports it
         if hasattr(otp_record, "is_verified") and not getattr(otp_record, "is_verified", False):
             raise serializers.ValidationError({"error": "otp not verified; verify otp first"})
 
         # OTP-expiry
-        if otp_record.expired(minutes=getattr(settings, "PASSWORD_RESET_OTP_EXPIRY_MINUTES", 10)):
+        if otp_record.expired(minutes=otp_expiry_minutes()):
             raise serializers.ValidationError({"error": "reset token expired; request a new otp"})
 
-        new_password = self.validated_data["new_password_valid"]
         gmail = getattr(otp_record, "gmail", None) or getattr(otp_record, "email", None)
         if not gmail:
             raise serializers.ValidationError({"error": "internal error: otp has no email"})
+        return gmail
+
+    def _check_entry(self, entry):
+        # hot-tier twin of _check_otp(); lookup_token() only returns verified entries
+        if entry is None:
+            raise serializers.ValidationError({"error": "invalid or used reset token"})
+        if otp_store.expired(entry):
+            raise serializers.ValidationError({"error": "reset token expired; request a new otp"})
+        return entry["gmail"]
 
-        # Update Account (custom) or fallback to Django User\
-        updated = False
-        account_queryset = Account.objects.filter(gmail__iexact=gmail)
-        if account_queryset.exists():
-            account = account_queryset.first()
-            account.password = make_password(new_password)
-            account.save(update_fields=["password"])
-            updated = True
+    def _claim_failed(self, otp_record):
+        # only reached when the claim matched nothing: say why
+        if otp_record is None or otp_record.is_used:
+            raise serializers.ValidationError({"error": "invalid or used reset token"})
+        self._check_otp(otp_record)
+        raise serializers.ValidationError({"error": "invalid or used reset token"})
+
+    def _pending(self, token):
+        """
+        The unused, verified, unexpired OTP row for `token` (unique index),
+        checked before hashing so made-up tokens cost no PBKDF2 or pool slot.
+        Read from default if the token was verified within the replica lag.
+        """
+        cutoff = timezone.now() - timedelta(minutes=otp_expiry_minutes())
+        return PasswordResetOTP.objects.filter(token=token, is_used=False, is_verified=True, created_at__gte=cutoff)
+
+    def _apply_reset(self, token, password_hash, entry=None):
+        """
+        One transaction, two statements: a conditional UPDATE claims the OTP
+        (only one request can flip is_used), then one UPDATE sets the password
+        of the account registered with its gmail. Returns None if the claim
+        matched nothing, else whether an account was updated.
+        """
+        if entry is not None:
+            # the hot tier saw it verified; its write-behind may not have landed yet
+            claim = PasswordResetOTP.objects.filter(pk=entry["id"], is_used=False).update
+            fields = {"is_used": True, "is_verified": True}
+            accounts = accounts_with_gmail(entry["gmail"])
         else:
-            usr_qs = User.objects.filter(email__iexact=gmail)
-            if usr_qs.exists():
-                u = usr_qs.first()
-                u.set_password(new_password)
-                u.save(update_fields=["password"])
-                updated = True
-
-        # mark OTP used
-        try:
-            if hasattr(otp_record, "mark_used"):
-                otp_record.mark_used()
-            else:
-                otp_record.is_used = True
-                otp_record.save(update_fields=["is_used"])
-        except Exception:
-            # In production log the exception. For now we continue.
-            pass
+            # the claim repeats _pending(): it is the guard against a concurrent reset
+            claim = self._pending(token).update
+            fields = {"is_used": True}
+            otp_gmail = PasswordResetOTP.objects.filter(token=token).values(gmail_lower=Lower("gmail"))[:1]
+            accounts = accounts_with_gmail(Subquery(otp_gmail))
+        with transaction.atomic():
+            if not claim(**fields):
+                return None
+            # update() sends no post_save: drop cached accounts (all of them
+            # when only the database knows the gmail)
+            transaction.on_commit(partial(forget_accounts, entry["gmail"] if entry else None))
+            return bool(accounts.update(password=password_hash))
 
+    def save(self, **kwargs):
+        token = self._reset_token()
+        entry = otp_store.lookup_token(token)
+        if entry is otp_store.MISS:
+            entry = None
+            routers.follows_write(token)
+            try:
+                gmail = self._pending(token).values_list("gmail", flat=True).first()
+            except DjangoValidationError:
+                # not a UUID
+                raise serializers.ValidationError({"error": "invalid or used reset token"})
+            if gmail is None:
+                self._claim_failed(PasswordResetOTP.objects.filter(token=token).first())
+        else:
+            gmail = self._check_entry(entry)
+        # hash before the transaction: no lock is held while it runs
+        password_hash = hashing.make_password(self.validated_data["new_password_valid"])
+
+        updated = self._apply_reset(token, password_hash, entry)
+        if updated is None:
+            if entry is not None:
+                raise serializers.ValidationError({"error": "invalid or used reset token"})
+            self._claim_failed(PasswordResetOTP.objects.filter(token=token).first())
+        if entry is not None:
+            otp_store.mark_used(entry)
+        # the next login reads the new password from default (accounts.routers)
+        routers.pin(gmail)
         return updated
 
-class ResendOTPSerializer(serializers.Serializer):
+    async def asave(self, **kwargs):
+        token = self._reset_token()
+        entry = await otp_store.alookup_token(token)
+        if entry is otp_store.MISS:
+            entry = None
+            await routers.afollows_write(token)
+            try:
+                gmail = await self._pending(token).values_list("gmail", flat=True).afirst()
+            except DjangoValidationError:
+                raise serializers.ValidationError({"error": "invalid or used reset token"})
+            if gmail is None:
+                self._claim_failed(await PasswordResetOTP.objects.filter(token=token).afirst())
+        else:
+            gmail = self._check_entry(entry)
+        password_hash = await hashing.amake_password(self.validated_data["new_password_valid"])
+
+        # transaction.atomic() is sync-only
+        updated = await sync_to_async(self._apply_reset)(token, password_hash, entry)
+        if updated is None:
+            if entry is not None:
+                raise serializers.ValidationError({"error": "invalid or used reset token"})
+            self._claim_failed(await PasswordResetOTP.objects.filter(token=token).afirst())
+        if entry is not None:
+            await otp_store.amark_used(entry)
+        await routers.apin(gmail)
+        return updated
+
+class ResendOTPSerializer(AsyncValidationMixin, serializers.Serializer):
     gmail = serializers.EmailField()
 
     def validate_gmail(self, value):
         # Re-check email exists (for security)
-        exists_in_account = Account.objects.filter(gmail__iexact=value).exists()
-        exists_in_user = User.objects.filter(email__iexact=value).exists()
+        if not gmail_registered(value):
+            raise serializers.ValidationError("Enter a registered email")
+        return value
 
-        if not (exists_in_account or exists_in_user):
+    async def avalidate_gmail(self, value):
+        if not await agmail_registered(value):
             raise serializers.ValidationError("Enter a registered email")
         return value
 
+    def _rate_limit(self, gmail):
+        rate_limit_seconds = getattr(settings, "OTP_RATE_LIMIT_SECONDS", 60)
+        return f"otp_rate_{gmail.lower()}", rate_limit_seconds
+
+    def _create_otp(self, gmail):
+        try:
+            otp = otp_store.issue_otp(gmail)
+        except Exception:
+            raise serializers.ValidationError({"error": "Failed to send OTP. Please try again later."})
+        return otp
+
     def save(self, **kwargs):
         gmail = self.validated_data['gmail']
-        rate_limit_seconds = getattr(settings, "OTP_RATE_LIMIT_SECONDS", 60)
-        cache_key = f"otp_rate_{gmail.lower()}"
-        if cache.get(cache_key):
+        cache_key, rate_limit_seconds = self._rate_limit(gmail)
+        # atomic check-and-set: only one request per window gets past this,
+        # across all workers sharing the cache
+        if not cache.add(cache_key, True, timeout=rate_limit_seconds):
             raise serializers.ValidationError({"error": f"Please wait {rate_limit_seconds} seconds before requesting a new OTP."})
 
-        # mark old otps used
-        PasswordResetOTP.objects.filter(gmail__iexact=gmail, is_used=False).update(is_used=True)
-
-        code = f"{random.randint(0, 9999):04d}"
-        otp = PasswordResetOTP.objects.create(gmail=gmail, code=code)
+        try:
+            # mark old otps used (in the hot tier at once, in the table write-behind)
+            otp_store.supersede(gmail)
+            return self._create_otp(gmail)
+        except Exception:
+            # nothing was sent; don't hold the window against the user
+            cache.delete(cache_key)
+            raise
 
-        # Build email content
-        subject = getattr(settings, "PASSWORD_RESET_SUBJECT", "Your OTP Code")
-        message = f"Your password reset OTP is: {code}\nThis OTP is valid for {getattr(settings, 'PASSWORD_RESET_OTP_EXPIRY_MINUTES', 10)} minutes."
-        from_email = getattr(settings, "DEFAULT_FROM_EMAIL", None)
+    async def asave(self, **kwargs):
+        gmail = self.validated_data['gmail']
+        cache_key, rate_limit_seconds = self._rate_limit(gmail)
+        if not await cache.aadd(cache_key, True, timeout=rate_limit_seconds):
+            raise serializers.ValidationError({"error": f"Please wait {rate_limit_seconds} seconds before requesting a new OTP."})
 
-        # send_mail as above...
         try:
-            send_mail(subject, message, from_email, [gmail], fail_silently=False)
+            await otp_store.asupersede(gmail)
+            return await sync_to_async(self._create_otp)(gmail)
         except Exception:
-            raise serializers.ValidationError({"error": "Failed to send OTP. Please try again later."})
-
-        cache.set(cache_key, True, timeout=rate_limit_seconds)
-        return otp
+            await cache.adelete(cache_key)
+            raise
 
 
 
@@ -1,3 +1,1456 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Permission
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import async_views, authentication, hashing, identity, mail as mail_pool, metrics, otp_store, outbox
+from .background import BatchWorker
+from .cache import SQLiteCache
+from .events import JSONLineFormatter
+from .mail import build_otp_email
+from .admin import PasswordResetOTPAdmin
+from .management.commands import calibrate_hashers
+from .management.commands.profile_startup import IMPORT_LINE, charge
+from .management.commands.purge_otps import ARCHIVE_FIELDS
+from .models import Account, EmailOutbox, PasswordResetOTP
+from .query_budget import QueryBudgetExceeded, QueryBudgetTestMixin, QueryRecorder
+from .routers import PIN_COOKIE, ReplicaPinningMiddleware, ReplicaRouter, follows_write, pin
+from .serializers import OTPVerifySerializer, ResetPasswordSerializer
+from .tokens import issue_tokens
+
+# deterministic and self-contained: per-test cache, fast hasher, inline mail
+# and OTP state writes (the background threads would use other connections)
+TEST_SETTINGS = dict(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "otp": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "otp"},
+    },
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    OTP_EMAIL_ASYNC=False,
+    OTP_STORE_WRITE_BEHIND=False,
+    ACCOUNTS_EVENT_SAMPLE_RATE=0.0,
+)
+
+
+def clear_caches():
+    # LocMemCache outlives override_settings: start each test from empty caches
+    for alias in ("default", "otp"):
+        caches[alias].clear()
+
+# ROOT_URLCONF of AsyncViewTests and EventLogTests: the sync views (accounts/urls.py) next to
+# their async twins (accounts/async_views.py), named async-<url name>
+urlpatterns = [
+    path("api/accounts/", include("accounts.urls")),
+    path("async/login/", async_views.AsyncLoginView.as_view(), name="async-login"),
+    path("async/otp-request/", async_views.AsyncOTPRequestView.as_view(), name="async-otp-request"),
+    path("async/verify-otp/", async_views.AsyncOTPVerifyView.as_view(), name="async-verify-otp"),
+    path("async/reset-password/", async_views.AsyncResetPasswordView.as_view(), name="async-reset-password"),
+    path("async/resend-otp/", async_views.AsyncResendOTPView.as_view(), name="async-resend-otp"),
+]
+
+
+@override_settings(**TEST_SETTINGS)
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Each accounts endpoint stays within its SQL budget (accounts/query_budget.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create_user(username="Alice", gmail="Alice@Example.com", password="Secret#123")
+
+    def setUp(self):
+        clear_caches()
+
+    def post(self, url_name, data, **extra):
+        return self.client.post(reverse(url_name), data=json.dumps(data), content_type="application/json", **extra)
+
+    def request_otp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.post("otp-request", {"gmail": "alice@example.com"}).status_code, 200)
+        return PasswordResetOTP.objects.latest("created_at")
+
+    def test_login(self):
+        with self.assertQueryBudget("login"):
+            response = self.post("login", {"identifier": "alice", "password": "Secret#123"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_otp_request(self):
+        with self.assertQueryBudget("otp-request"):
+            response = self.post("otp-request", {"gmail": "alice@example.com"})
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(OTP_HOT_STORE=True)
+    def test_verify_otp_hot_tier(self):
+        otp = self.request_otp()
+        # only the is_verified write, done inline here instead of write-behind
+        with self.assertQueryBudget("verify-otp"):
+            response = self.post("verify-otp", {"gmail": "alice@example.com", "otp": otp.code})
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(OTP_HOT_STORE=False)
+    def test_verify_otp_database(self):
+        otp = self.request_otp()
+        with self.assertQueryBudget("verify-otp"):
+            response = self.post("verify-otp", {"gmail": "alice@example.com", "otp": otp.code})
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(OTP_HOT_STORE=False)
+    def test_reset_password(self):
+        otp = self.request_otp()
+        token = self.post("verify-otp", {"gmail": "alice@example.com", "otp": otp.code}).json()["reset_token"]
+        with self.assertQueryBudget("reset-password"):
+            response = self.post(
+                "reset-password", {"new_password": "Newpass#123", "confirm_password": "Newpass#123"},
+                HTTP_X_RESET_TOKEN=token,
+            )
+        self.assertEqual(response.status_code, 200)
+        self.account.refresh_from_db()
+        self.assertTrue(self.account.check_password("Newpass#123"))
+
+    def test_resend_otp(self):
+        with self.assertQueryBudget("resend-otp"):
+            response = self.post("resend-otp", {"gmail": "alice@example.com"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_failure_lists_the_sql(self):
+        with QueryRecorder() as recorder:
+            self.post("login", {"identifier": "alice", "password": "Secret#123"})
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            recorder.check("login", {"queries": 0})
+        self.assertIn("login ran 1 queries (budget 0)", str(raised.exception))
+        self.assertIn('FROM "accounts_account"', str(raised.exception))
+
+
+@override_settings(**TEST_SETTINGS)
+class IdentityTests(TestCase):
+    """Single-query username-or-gmail lookups (accounts/identity.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = Account.objects.create_user(username="Alice", gmail="Alice@Example.com", password="Secret#123")
+        # a username that is another account's gmail
+        cls.squatter = Account.objects.create_user(
+            username="alice@example.com", gmail="squatter@example.com", password="Secret#123",
+        )
+
+    def test_username_beats_another_accounts_gmail(self):
+        for identifier in ("alice@example.com", "  ALICE@Example.COM "):
+            with self.assertNumQueries(1):
+                self.assertEqual(identity.resolve_account(identifier).pk, self.squatter.pk)
+            self.assertEqual(async_to_sync(identity.aresolve_account)(identifier).pk, self.squatter.pk)
+
+    def test_mixed_case_input(self):
+        for identifier in ("alice", "ALICE", " aLiCe ", "SQUATTER@example.com"):
+            expected = self.squatter if "@" in identifier else self.alice
+            self.assertEqual(identity.resolve_account(identifier).pk, expected.pk)
+        self.assertEqual(identity.account_for_gmail("ALICE@EXAMPLE.COM ").pk, self.alice.pk)
+        self.assertTrue(identity.gmail_registered("Squatter@Example.Com"))
+        self.assertFalse(identity.gmail_registered("alice"))  # a username, not a gmail
+        for identifier in ("", "   ", None, "nobody"):
+            self.assertIsNone(identity.resolve_account(identifier))
+
+    def test_prefer_username_ordering(self):
+        value = "alice@example.com"
+        # the database returns the two matches in either order
+        for matches in ([self.alice, self.squatter], [self.squatter, self.alice]):
+            self.assertIs(identity._prefer_username(matches, value), self.squatter)
+        # no username match: the first gmail match
+        self.assertIs(identity._prefer_username([self.alice], value), self.alice)
+        self.assertIsNone(identity._prefer_username([], value))
+
+
+@override_settings(**TEST_SETTINGS, OTP_HOT_STORE=True)
+class OTPHotTierTests(TestCase):
+    """Verify and reset through the OTP hot tier (accounts/otp_store.py) and its database fallback."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create_user(username="Alice", gmail="Alice@Example.com", password="Secret#123")
+
+    def setUp(self):
+        clear_caches()
+
+    def post(self, url_name, data, **extra):
+        return self.client.post(reverse(url_name), data=json.dumps(data), content_type="application/json", **extra)
+
+    def request_otp(self, url_name="otp-request", gmail="alice@example.com"):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.post(url_name, {"gmail": gmail}).status_code, 200)
+        return PasswordResetOTP.objects.latest("pk")
+
+    def verify(self, otp):
+        return self.post("verify-otp", {"gmail": "alice@example.com", "otp": otp.code})
+
+    def reset(self, token):
+        return self.post(
+            "reset-password", {"new_password": "Newpass#123", "confirm_password": "Newpass#123"},
+            HTTP_X_RESET_TOKEN=token,
+        )
+
+    def test_verify_and_reset_from_the_hot_tier(self):
+        otp = self.request_otp()
+        with mock.patch.object(PasswordResetOTP.objects, "active") as active:
+            response = self.verify(otp)
+        active.assert_not_called()  # the database lookup was never built
+        self.assertEqual(response.status_code, 200)
+        token = response.json()["reset_token"]
+        self.assertEqual(token, str(otp.token))
+        self.assertEqual(otp_store.lookup_token(token)["id"], otp.pk)
+
+        self.assertEqual(self.reset(token).status_code, 200)
+        self.account.refresh_from_db()
+        self.assertTrue(self.account.check_password("Newpass#123"))
+        otp.refresh_from_db()
+        self.assertTrue(otp.is_used and otp.is_verified)
+        self.assertIsNone(otp_store.lookup_token(token))
+        self.assertEqual(self.reset(token).status_code, 400)
+        self.assertEqual(self.verify(otp).status_code, 400)
+
+    @override_settings(OTP_STORE_WRITE_BEHIND=True)
+    def test_resend_supersedes_the_old_code_before_the_write_behind_lands(self):
+        # writer.submit() accepts the write-behind items and applies none of them
+        with mock.patch.object(otp_store.writer, "submit", return_value=True) as submit, \
+                mock.patch("accounts.otp_store.random.randint", side_effect=[1111, 2222]):
+            old = self.request_otp()
+            new = self.request_otp("resend-otp", gmail="ALICE@example.com")
+            old.refresh_from_db()
+            self.assertFalse(old.is_used)  # the supersede is still queued
+            self.assertEqual(self.verify(old).status_code, 400)
+            self.assertEqual(self.verify(new).status_code, 200)
+
+        # the queued writes, applied: only the old code is used
+        otp_store._write([call.args[0] for call in submit.call_args_list])
+        old.refresh_from_db()
+        new.refresh_from_db()
+        self.assertEqual((old.is_used, new.is_used, new.is_verified), (True, False, True))
+
+    def test_culled_keys_fall_back_to_the_database(self):
+        otp_cache = caches["otp"]
+        with mock.patch("accounts.otp_store.random.randint", side_effect=[1111, 2222]):
+            first = self.request_otp()
+            second = self.request_otp()
+        # the cache culled the first code's entry but kept the gmail's marker
+        otp_cache.delete(f"otp:code:alice@example.com:{first.code}")
+        self.assertIs(otp_store.lookup("alice@example.com", first.code), otp_store.MISS)
+        self.assertEqual(self.verify(first).status_code, 200)
+
+        # ... and then the marker: a superseded code can't be told apart any more
+        self.request_otp("resend-otp")
+        otp_cache.delete("otp:gmail:alice@example.com")
+        self.assertIs(otp_store.lookup("alice@example.com", second.code), otp_store.MISS)
+        self.assertEqual(self.verify(second).status_code, 400)
+
+    def test_miss_falls_back_to_the_database(self):
+        # never cached (e.g. created before the cache was flushed)
+        otp = PasswordResetOTP.objects.create(gmail="alice@example.com", code="4321")
+        self.assertIs(otp_store.lookup("alice@example.com", "4321"), otp_store.MISS)
+        response = self.verify(otp)
+        self.assertEqual(response.status_code, 200)
+        token = response.json()["reset_token"]
+        otp.refresh_from_db()
+        self.assertEqual((str(otp.token), otp.is_verified), (token, True))
+        self.assertIs(otp_store.lookup_token(token), otp_store.MISS)
+
+        self.assertEqual(self.reset(token).status_code, 200)
+        self.account.refresh_from_db()
+        self.assertTrue(self.account.check_password("Newpass#123"))
+        self.assertEqual(self.reset(token).status_code, 400)
+
+
+@override_settings(**TEST_SETTINGS)
+class OTPVerifyTests(TestCase):
+    """Of two verifies of the same code exactly one succeeds, with the OTP's own reset token."""
+
+    def setUp(self):
+        clear_caches()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.otp = otp_store.issue_otp("alice@example.com")
+
+    def serializer(self):
+        serializer = OTPVerifySerializer(data={"gmail": "Alice@example.com", "otp": self.otp.code})
+        self.assertTrue(serializer.is_valid())
+        return serializer
+
+    def race(self, save):
+        first, second = self.serializer(), self.serializer()
+        stale = second._newest().first()  # both read the row before either updates it
+        with mock.patch.object(second, "_newest") as newest:
+            newest.return_value.first.return_value = stale
+            newest.return_value.afirst = mock.AsyncMock(return_value=stale)
+            results = []
+            for serializer in (first, second):
+                try:
+                    results.append(save(serializer))
+                except ValidationError as exc:
+                    results.append(exc.detail)
+        self.assertEqual(results, [str(self.otp.token), {"error": ["invalid or expired otp"]}])
+        self.otp.refresh_from_db()
+        self.assertTrue(self.otp.is_verified)
+
+    def test_database_path(self):
+        self.race(lambda serializer: serializer.save())
+
+    def test_database_path_async(self):
+        self.race(lambda serializer: async_to_sync(serializer.asave)())
+
+    @override_settings(OTP_HOT_STORE=True)
+    def test_hot_tier(self):
+        otp_store.remember(self.otp)
+        self.race(lambda serializer: serializer.save())
+
+
+@override_settings(**TEST_SETTINGS)
+class ResetPasswordTests(TestCase):
+    """Tokens the database doesn't hold are refused before the new password is hashed."""
+
+    def reset(self, token):
+        return self.client.post(
+            reverse("reset-password"), data=json.dumps({"new_password": "Newpass#123", "confirm_password": "Newpass#123"}),
+            content_type="application/json", HTTP_X_RESET_TOKEN=token,
+        )
+
+    def test_unknown_tokens_are_not_hashed(self):
+        unverified = PasswordResetOTP.objects.create(gmail="alice@example.com", code="1234")
+        with mock.patch("accounts.hashing.make_password") as make_password:
+            for token, error in [
+                (str(uuid.uuid4()), "invalid or used reset token"),
+                ("not-a-uuid", "invalid or used reset token"),
+                (str(unverified.token), "otp not verified; verify otp first"),
+            ]:
+                response = self.reset(token)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {"error": {"error": error}})
+        make_password.assert_not_called()
+
+
+@override_settings(**TEST_SETTINGS)
+class MetricsTests(TestCase):
+    """Histograms (accounts/metrics.py) cover the accounts views only."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(ACCOUNTS_METRICS_DIR=directory.name, ACCOUNTS_METRICS_TOKEN="s3cret"))
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+
+    def test_exposition(self):
+        Account.objects.create_user(username="Alice", gmail="Alice@Example.com", password="Secret#123")
+        self.client.get("/admin/login/")  # also named "login"
+        self.client.get("/api/accounts/no-such-page/")
+        self.client.post(reverse("login"), data=json.dumps({"identifier": "alice", "password": "Secret#123"}),
+                         content_type="application/json")
+
+        response = self.client.get(reverse("metrics"), headers={"Authorization": "Bearer s3cret"})
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        lines = response.content.decode().splitlines()
+        self.assertIn("# TYPE accounts_request_duration_seconds histogram", lines)
+        self.assertIn('accounts_request_duration_seconds_bucket{url_name="login",le="+Inf"} 1', lines)
+        self.assertIn('accounts_phase_duration_seconds_count{phase="db",url_name="login"} 1', lines)
+        # the admin page, the 404 and the scrape itself are not recorded
+        counts = [line for line in lines if line.startswith("accounts_request_duration_seconds_count")]
+        self.assertEqual(counts, ['accounts_request_duration_seconds_count{url_name="login"} 1'])
+
+    def test_scrape_needs_the_token(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url, headers={"Authorization": "Bearer s3cret"}).status_code, 200)
+        for headers in ({}, {"Authorization": "Bearer wrong"}, {"Authorization": "s3cret"}):
+            with self.subTest(headers=headers):
+                self.assertEqual(self.client.get(url, headers=headers).status_code, 404)
+        # loopback is not trusted (a proxy on the same host), and no token configured means off
+        with override_settings(ACCOUNTS_METRICS_TOKEN=None):
+            self.assertEqual(self.client.get(url, headers={"Authorization": "Bearer "}).status_code, 404)
+            self.assertEqual(self.client.get(url, REMOTE_ADDR="127.0.0.1").status_code, 404)
+
+
+@override_settings(**{**TEST_SETTINGS, "ACCOUNTS_EVENT_SAMPLE_RATE": 1.0}, ROOT_URLCONF=__name__)
+class EventLogTests(TestCase):
+    """The per-request events never carry passwords or issued tokens."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create_user(username="Alice", gmail="Alice@Example.com", password="Secret#123")
+
+    def events(self, prefix, password):
+        body = json.dumps({"identifier": "alice", "password": password, "nested": [{"token": "abc"}]})
+        with self.assertLogs("accounts.events", "INFO") as captured:
+            response = self.client.post(reverse(f"{prefix}login"), data=body, content_type="application/json")
+        formatter = JSONLineFormatter()
+        return response, [formatter.format(record) for record in captured.records]
+
+    def test_login_payload_is_redacted(self):
+        for prefix in ("", "async-"):
+            for password, status_code in (("Secret#123", 200), ("Wrong#123", 400)):
+                with self.subTest(view=f"{prefix}login", status=status_code):
+                    response, lines = self.events(prefix, password)
+                    self.assertEqual(response.status_code, status_code)
+                    [line] = lines
+                    self.assertNotIn(password, line)
+                    self.assertNotIn("abc", line)
+                    event = json.loads(line)
+                    self.assertEqual(event["event"], "accounts.login")
+                    self.assertEqual(event["payload"], {
+                        "identifier": "alice", "password": "[redacted]", "nested": [{"token": "[redacted]"}],
+                    })
+                    if status_code == 200:
+                        self.assertNotIn(response.json()["access"], line)
+
+
+class StubProcessPool(ThreadPoolExecutor):
+    """ProcessPoolExecutor stand-in: same interface, threads instead of spawned processes."""
+
+    def __init__(self, max_workers, mp_context=None, initializer=None, initargs=()):
+        super().__init__(max_workers)
+
+
+@override_settings(
+    PASSWORD_HASHING_POOL=True, PASSWORD_HASHING_POOL_WORKERS=1,
+    PASSWORD_HASHING_POOL_MAX_PENDING=2, PASSWORD_HASHING_POOL_TIMEOUT=0.2,
+)
+class HashingPoolTests(SimpleTestCase):
+    """accounts.hashing.HashingPool: bounded, time-limited, and rebuilt when broken."""
+
+    def setUp(self):
+        self.enterContext(mock.patch("accounts.hashing.ProcessPoolExecutor", StubProcessPool))
+        self.pool = hashing.HashingPool()
+        self.addCleanup(self.pool.shutdown)
+        self.gate = threading.Event()
+        self.addCleanup(self.gate.set)
+
+    def test_runs_on_the_pool(self):
+        self.assertEqual(self.pool.run(pow, 2, 10), 1024)
+        self.assertIsInstance(self.pool._executor, StubProcessPool)
+        with override_settings(PASSWORD_HASHING_POOL=False):
+            self.assertEqual(hashing.HashingPool().run(pow, 2, 3), 8)  # inline, no executor
+
+    def test_full_pool_is_busy(self):
+        blocked = [self.pool.submit(self.gate.wait, 5) for _ in range(2)]  # MAX_PENDING
+        with self.assertRaises(hashing.HashingBusy) as raised:
+            self.pool.run(pow, 2, 10)
+        self.assertEqual(raised.exception.status_code, 503)
+        self.gate.set()
+        for future in blocked:
+            future.result(5)
+        self.assertEqual(self.pool.run(pow, 2, 10), 1024)  # slots are given back
+
+    def test_timeout_is_busy(self):
+        with self.assertRaises(hashing.HashingBusy):
+            self.pool.run(self.gate.wait, 5)
+        # queued behind it on the one worker: cancelled on timeout, its slot given back
+        with self.assertRaises(hashing.HashingBusy):
+            async_to_sync(self.pool.arun)(self.gate.wait, 5)
+        # the running call keeps its slot until it really finishes
+        queued = self.pool.submit(self.gate.wait, 5)
+        with self.assertRaises(hashing.HashingBusy):
+            self.pool.submit(pow, 2, 10)
+        self.gate.set()
+        queued.result(5)  # one worker: the timed-out call had finished first
+        self.assertEqual(async_to_sync(self.pool.arun)(pow, 2, 10), 1024)
+
+    def test_broken_pool_is_replaced(self):
+        executor, _ = self.pool._get()
+        with mock.patch.object(executor, "submit", side_effect=BrokenProcessPool("worker died")):
+            with self.assertRaises(hashing.HashingBusy):
+                self.pool.run(pow, 2, 10)
+        self.assertIsNone(self.pool._executor)
+        self.assertEqual(self.pool.run(pow, 2, 10), 1024)  # a fresh pool
+
+        def crash():
+            raise BrokenProcessPool("worker died mid-call")
+
+        for run in (self.pool.run, async_to_sync(self.pool.arun)):
+            broken = self.pool._get()[0]
+            with self.assertRaises(hashing.HashingBusy):
+                run(crash)
+            self.assertIsNot(self.pool._get()[0], broken)
+
+    @override_settings(**TEST_SETTINGS)
+    def test_login_answers_503(self):
+        with mock.patch.object(hashing.pool, "run", side_effect=hashing.HashingBusy()), \
+                mock.patch("accounts.serializers.resolve_account", return_value=Account(password="x")), \
+                self.assertLogs("accounts.events", "ERROR"):
+            response = self.client.post(reverse("login"), data=json.dumps({"identifier": "alice", "password": "Secret#123"}),
+                                        content_type="application/json")
+        self.assertEqual(response.status_code, 503)
+
+
+@override_settings(
+    **{**TEST_SETTINGS, "PASSWORD_HASHERS": ["accounts.hashers.CalibratedPBKDF2PasswordHasher"]},
+    PASSWORD_HASHER_PBKDF2_ITERATIONS=1000, ROOT_URLCONF=__name__,
+)
+class CalibratedHasherTests(TestCase):
+    """Costs from settings (accounts/hashers.py): outdated hashes are upgraded on login."""
+
+    def setUp(self):
+        clear_caches()
+        self.account = Account.objects.create_user(username="Alice", gmail="Alice@Example.com", password="Secret#123")
+
+    def login(self, url_name, password="Secret#123"):
+        return self.client.post(reverse(url_name), data=json.dumps({"identifier": "alice", "password": password}),
+                                content_type="application/json")
+
+    def stored_iterations(self):
+        self.account.refresh_from_db()
+        return int(self.account.password.split("$")[1])
+
+    def test_login_rehashes_an_outdated_cost(self):
+        self.assertEqual(self.stored_iterations(), 1000)
+        for url_name, iterations in (("login", 2000), ("async-login", 3000)):
+            with self.subTest(url_name), override_settings(PASSWORD_HASHER_PBKDF2_ITERATIONS=iterations):
+                self.assertEqual(self.login(url_name, "Wrong#1234").status_code, 400)
+                self.assertEqual(self.stored_iterations(), iterations - 1000)  # not on a failed login
+                self.assertEqual(self.login(url_name).status_code, 200)
+                self.assertEqual(self.stored_iterations(), iterations)
+                upgraded = self.account.password
+                self.assertEqual(self.login(url_name).status_code, 200)
+                self.account.refresh_from_db()
+                self.assertEqual(self.account.password, upgraded)  # current cost: left alone
+        self.assertTrue(self.account.check_password("Secret#123"))
+
+    def calibrate(self, timings, **options):
+        out = io.StringIO()
+        with mock.patch.object(calibrate_hashers.Command, "measure", side_effect=timings):
+            call_command("calibrate_hashers", stdout=out, **options)
+        return out.getvalue()
+
+    def test_calibrate_hashers(self):
+        with override_settings(PASSWORD_HASHERS=[
+            "accounts.hashers.CalibratedPBKDF2PasswordHasher", "django.contrib.auth.hashers.MD5PasswordHasher",
+        ]):
+            output = self.calibrate([10.0, 5.2], target_ms=5, samples=1)
+        self.assertIn("Target: 5 ms per hash, median of 1 run(s)", output)
+        self.assertIn("current     iterations=1000:     10.0 ms", output)
+        self.assertIn("recommended iterations=500:      5.2 ms", output)
+        self.assertIn("md5 (django.contrib.auth.hashers.MD5PasswordHasher): no tunable cost, skipped", output)
+        self.assertTrue(output.endswith("Add to settings.py:\nPASSWORD_HASHER_PBKDF2_ITERATIONS = 500\n"))
+
+        with override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.PBKDF2PasswordHasher"]):
+            output = self.calibrate([300.0, 100.0], target_ms=100)
+        self.assertIn("recommended iterations=", output)
+        self.assertIn("No calibrated hashers (accounts.hashers) in PASSWORD_HASHERS", output)
+
+        with self.assertRaises(CommandError):
+            call_command("calibrate_hashers", target_ms=0)
+
+    def test_cost_scaling(self):
+        recommend = calibrate_hashers._recommend
+        self.assertEqual(recommend(1_000_000, 200, 100, "linear"), 500_000)
+        self.assertEqual(recommend(2, 50, 100, "linear"), 4)
+        self.assertEqual(recommend(2 ** 14, 10, 40, "pow2"), 2 ** 16)
+        self.assertEqual(recommend(12, 100, 400, "log2"), 14)
+
+
+@override_settings(**TEST_SETTINGS)
+class TokenMinterTests(TestCase):
+    """accounts.tokens issues tokens simplejwt accepts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create_user(username="Alice", gmail="Alice@Example.com", password="Secret#123")
+
+    def login(self, **extra):
+        data = {"identifier": "alice", "password": "Secret#123", **extra}
+        response = self.client.post(reverse("login"), data=json.dumps(data), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_tokens_validate_with_simplejwt(self):
+        body = self.login()
+        access, refresh = AccessToken(body["access"]), RefreshToken(body["refresh"])
+        self.assertEqual(access["user_id"], self.account.pk)
+        self.assertEqual(refresh["user_id"], self.account.pk)
+        self.assertNotEqual(access["jti"], refresh["jti"])
+        # a refresh issues an access token for the same account
+        self.assertEqual(refresh.access_token["user_id"], self.account.pk)
+
+    def test_access_only(self):
+        body = self.login(access_only=True)
+        self.assertNotIn("refresh", body)
+        self.assertEqual(AccessToken(body["access"])["user_id"], self.account.pk)
+
+    def test_revoke_token_claim(self):
+        # simplejwt's modules hold api_settings by name, out of reach of override_settings(SIMPLE_JWT=...)
+        with mock.patch.object(jwt_settings, "CHECK_REVOKE_TOKEN", True), mock.patch("accounts.tokens._minter", None):
+            body = self.login()
+            for token in (AccessToken(body["access"]), RefreshToken(body["refresh"])):
+                self.assertEqual(token["hash_password"], get_md5_hash_password(self.account.password))
+            authentication.tokens.clear()
+            authentication.users.clear()
+            request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {body['access']}")
+            self.assertEqual(authentication.CachingJWTAuthentication().authenticate(request)[0].pk, self.account.pk)
+            self.account.set_password("Changed#123")
+            self.account.save()
+            with self.assertRaises(AuthenticationFailed):
+                authentication.CachingJWTAuthentication().authenticate(request)
+
+    def test_tampered_token_rejected(self):
+        access = self.login()["access"]
+        header, payload, signature = access.split(".")
+        with self.assertRaises(TokenError):
+            AccessToken(f"{header}.{payload}.{signature[::-1]}")
+
+
+@override_settings(**TEST_SETTINGS, ACCOUNTS_JWT_USER_CACHE_SECONDS=30)
+class CachingJWTAuthenticationTests(TestCase):
+    """accounts.authentication answers repeat tokens without crypto or SQL."""
+
+    def setUp(self):
+        authentication.tokens.clear()
+        authentication.users.clear()
+        self.account = Account.objects.create_user(username="Alice", gmail="Alice@Example.com", password="Secret#123")
+        self.request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {issue_tokens(self.account)['access']}")
+
+    def authenticate(self):
+        return authentication.CachingJWTAuthentication().authenticate(self.request)
+
+    def test_repeat_request_uses_caches(self):
+        user, token = self.authenticate()
+        self.assertEqual(user.pk, self.account.pk)
+        with self.assertNumQueries(0):
+            cached_user, cached_token = self.authenticate()
+        self.assertIs(cached_token, token)
+        self.assertEqual(cached_user.pk, self.account.pk)
+        self.assertIsNot(cached_user, user)
+
+    def test_post_save_invalidates_account(self):
+        self.authenticate()
+        self.account.is_active = False
+        self.account.save(update_fields=["is_active"])
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_password_reset_invalidates_account(self):
+        self.authenticate()
+        otp = PasswordResetOTP.objects.create(gmail="alice@example.com", code="123456", is_verified=True)
+        serializer = ResetPasswordSerializer(data={"new_password": "Newpass#123", "confirm_password": "Newpass#123"})
+        self.assertTrue(serializer.is_valid())
+        serializer.initial_data["reset_token"] = str(otp.token)
+        with self.captureOnCommitCallbacks(execute=True):
+            serializer.save()
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate()
+        self.assertTrue(user.check_password("Newpass#123"))
+
+    def reset_password(self, password):
+        otp = PasswordResetOTP.objects.create(gmail="alice@example.com", code="123456", is_verified=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(ResetPasswordSerializer()._apply_reset(str(otp.token), make_password(password)))
+
+    def test_reset_in_another_process_with_the_account_cache_off(self):
+        # forget_accounts() only reaches this process: another worker's reset
+        # is like one whose invalidation never runs here
+        with override_settings(ACCOUNTS_JWT_USER_CACHE_SECONDS=0), mock.patch("accounts.serializers.forget_accounts"):
+            authentication.users.clear()
+            self.authenticate()
+            self.assertEqual(len(authentication.users), 0)
+            self.reset_password("Newpass#123")
+            self.assertTrue(self.authenticate()[0].check_password("Newpass#123"))
+
+    def test_reset_in_another_process_with_the_account_cache_on(self):
+        # the opt-in cache serves the old account until its entry expires
+        self.authenticate()
+        with mock.patch("accounts.serializers.forget_accounts"):
+            self.reset_password("Newpass#123")
+        self.assertFalse(self.authenticate()[0].check_password("Newpass#123"))
+        with mock.patch("accounts.authentication.time.monotonic", return_value=time.monotonic() + 31):
+            self.assertTrue(self.authenticate()[0].check_password("Newpass#123"))
+
+    def test_expired_token_is_not_served_from_cache(self):
+        self.authenticate()
+        later = timezone.now() + timedelta(hours=1)
+        with mock.patch("accounts.authentication.time.time", return_value=later.timestamp()), \
+                mock.patch("rest_framework_simplejwt.tokens.aware_utcnow", return_value=later):
+            with self.assertRaises(InvalidToken):
+                self.authenticate()
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    """The shared cache backend (accounts/cache.py), on a temporary file."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, "cache.sqlite3")
+        self.cache = self.backend()
+
+    def backend(self, **options):
+        return SQLiteCache(self.location, {"OPTIONS": options})
+
+    def later(self, seconds):
+        """The clock `seconds` from now, for the cache and Django's timeout arithmetic."""
+        return mock.patch("time.time", return_value=time.time() + seconds)
+
+    def test_add_only_replaces_missing_or_expired_keys(self):
+        self.assertTrue(self.cache.add("key", "first", timeout=10))
+        # another worker process: another backend instance on the same file
+        self.assertFalse(self.backend().add("key", "second"))
+        self.assertEqual(self.cache.get("key"), "first")
+        with self.later(11):
+            self.assertIsNone(self.cache.get("key"))
+            self.assertTrue(self.cache.add("key", "third"))
+        self.assertEqual(self.cache.get("key"), "third")
+
+    def test_incr_is_atomic_across_connections(self):
+        self.cache.set("hits", 0)
+
+        def hit():
+            backend = self.backend()  # own connection, like another worker
+            for _ in range(50):
+                backend.incr("hits")
+
+        threads = [threading.Thread(target=hit) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get("hits"), 200)
+        self.assertEqual(self.cache.decr("hits", 5), 195)
+        self.cache.set("name", "alice")
+        for key in ("missing", "name"):
+            with self.assertRaises(ValueError):
+                self.cache.incr(key)
+
+    def test_touch_moves_the_expiry(self):
+        self.cache.set("key", "value", timeout=10)
+        self.assertTrue(self.cache.touch("key", timeout=60))
+        self.assertFalse(self.cache.touch("missing"))
+        with self.later(30):
+            self.assertEqual(self.cache.get("key"), "value")
+        with self.later(61):
+            self.assertFalse(self.cache.has_key("key"))
+            self.assertFalse(self.cache.touch("key"))
+
+    def test_cull_drops_expired_then_soonest_to_expire(self):
+        cache = self.backend(MAX_ENTRIES=10, CULL_FREQUENCY=2, CULL_EVERY=1)
+        cache.set("expiring", "value", timeout=5)
+        with self.later(6):
+            for number in range(11):
+                cache.set(f"key{number}", number, timeout=100 + number)
+        # the expired entry went at the first cull; at 11 entries the 5
+        # closest to expiry went
+        kept = cache.get_many(["expiring"] + [f"key{number}" for number in range(11)])
+        self.assertEqual(sorted(kept.values()), list(range(5, 11)))
+
+    def test_clear(self):
+        self.cache.set_many({"a": 1, "b": [2]}, timeout=None)
+        self.assertEqual(self.cache.get_many(["a", "b"]), {"a": 1, "b": [2]})
+        self.cache.clear()
+        self.assertEqual(self.backend().get_many(["a", "b"]), {})
+
+
+@override_settings(**TEST_SETTINGS)
+class ImportAccountsTests(TestCase):
+    """manage.py import_accounts (in-process hashing: --workers 0)."""
+
+    def import_rows(self, rows, **options):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write("\n".join(rows) + "\n")
+        self.addCleanup(os.remove, f.name)
+        out = io.StringIO()
+        call_command("import_accounts", f.name, **{"workers": 0, **options}, stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_import_skips_conflicts_and_invalid_rows(self):
+        Account.objects.create_user(username="Taken", gmail="taken@example.com", password="Secret#123")
+        output = self.import_rows([
+            "username,gmail,password",
+            "bob,bob@example.com,Secret#123",
+            "TAKEN,new@example.com,Secret#123",  # username conflict, case-insensitive
+            "carol,BOB@example.com,Secret#123",  # gmail conflict with an earlier row
+            "dave,not-an-email,Secret#123",
+        ])
+        self.assertIn("1 account(s) created, 2 conflict(s) skipped, 1 invalid row(s)", output)
+        self.assertTrue(Account.objects.get(username="bob").check_password("Secret#123"))
+        self.assertEqual(Account.objects.count(), 2)
+
+    def test_password_hash_must_be_known(self):
+        encoded = make_password("Secret#123")
+        output = self.import_rows([
+            "username,gmail,password_hash",
+            f"bob,bob@example.com,{encoded}",
+            "carol,carol@example.com,Secret#123",  # plain text in the hash column
+            "dave,dave@example.com,!unusable",
+        ])
+        self.assertIn("1 account(s) created, 0 conflict(s) skipped, 2 invalid row(s)", output)
+        self.assertEqual(Account.objects.get().password, encoded)
+
+    def test_rows_taken_by_a_concurrent_insert_are_not_counted(self):
+        Account.objects.create_user(username="Taken", gmail="taken@example.com", password="Secret#123")
+        rows = ["username,gmail,password", "Taken,other@example.com,Secret#123", "eve,eve@example.com,Secret#123"]
+        # inserted after the conflict check ran
+        with mock.patch("accounts.management.commands.import_accounts.Command.taken", return_value=(set(), set())):
+            output = self.import_rows(rows)
+            self.assertIn("batch 1: 1 created, 1 conflict(s)", output)
+            self.assertIn("Done: 1 account(s) created, 1 conflict(s) skipped", output)
+            self.assertFalse(Account.objects.filter(gmail="other@example.com").exists())
+            with self.assertRaisesMessage(CommandError, "batch 1: 1 row(s) taken by a concurrent insert"):
+                self.import_rows(rows[:2], on_conflict="error")
+
+    def test_dry_run_hashes_nothing(self):
+        with mock.patch("accounts.management.commands.import_accounts.hash_password") as hash_password, \
+                mock.patch("accounts.management.commands.import_accounts.ProcessPoolExecutor") as executor:
+            output = self.import_rows(
+                ["username,gmail,password", "bob,bob@example.com,Secret#123", "eve,eve@example.com,Secret#123"],
+                workers=None, dry_run=True,
+            )
+        hash_password.assert_not_called()
+        executor.assert_not_called()
+        self.assertIn("Done: 2 account(s) would be created", output)
+        self.assertFalse(Account.objects.exists())
+
+
+@override_settings(**TEST_SETTINGS, OTP_EMAIL_MAX_ATTEMPTS=2)
+class OutboxTests(TestCase):
+    """The transactional outbox (accounts/outbox.py): claims, delivery and retries."""
+
+    def queue(self, gmail="alice@example.com", code="1234"):
+        return outbox.queue_email(build_otp_email(gmail, code))
+
+    def assertAbout(self, when, seconds_from_now):
+        self.assertAlmostEqual((when - timezone.now()).total_seconds(), seconds_from_now, delta=5)
+
+    def test_claim_leases_rows(self):
+        rows = [self.queue(f"user{number}@example.com") for number in range(3)]
+        first = outbox.claim(limit=2)
+        self.assertEqual([row.pk for row in first], [rows[0].pk, rows[1].pk])
+        for row in first:
+            self.assertEqual(row.status, EmailOutbox.STATUS_SENDING)
+            self.assertIsNotNone(row.claim_id)
+            self.assertAbout(row.next_attempt_at, 300)  # OTP_EMAIL_CLAIM_SECONDS
+        # leased rows are not handed out again
+        self.assertEqual([row.pk for row in outbox.claim()], [rows[2].pk])
+        self.assertEqual(outbox.claim(), [])
+
+    def test_expired_lease_is_claimed_again(self):
+        row = self.queue()
+        [claimed] = outbox.claim()
+        self.assertEqual(outbox.claim(), [])
+        # the drainer holding it died; its lease runs out
+        EmailOutbox.objects.filter(pk=row.pk).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        [reclaimed] = outbox.claim()
+        self.assertEqual(reclaimed.pk, row.pk)
+        self.assertNotEqual(reclaimed.claim_id, claimed.claim_id)
+
+    def test_deliver_marks_rows_sent(self):
+        row = self.queue(code="4321")
+        sent, failed, connection = outbox.deliver(outbox.claim())
+        outbox.close_connection(connection)
+        self.assertEqual((sent, failed), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ["alice@example.com"])
+        self.assertIn("4321", mail.outbox[0].body)
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts, row.claim_id, row.last_error), (EmailOutbox.STATUS_SENT, 1, None, ""))
+        self.assertIsNotNone(row.sent_at)
+        self.assertEqual(outbox.claim(), [])
+
+    @override_settings(OTP_EMAIL_MAX_ATTEMPTS=5, OTP_EMAIL_RETRY_BASE_SECONDS=30, OTP_EMAIL_RETRY_MAX_SECONDS=100)
+    def test_send_error_retries_with_backoff(self):
+        self.assertEqual([outbox.retry_delay(n).total_seconds() for n in (1, 2, 3, 4)], [30, 60, 100, 100])
+        row = self.queue()
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=OSError("down")), \
+                self.assertLogs("accounts.outbox", "WARNING"):
+            self.assertEqual(outbox.deliver(outbox.claim())[:2], (0, 1))
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts, row.claim_id), (EmailOutbox.STATUS_PENDING, 1, None))
+        self.assertEqual(row.last_error, "OSError: down")
+        self.assertAbout(row.next_attempt_at, 30)
+        self.assertEqual(outbox.claim(), [])  # not due yet
+
+        EmailOutbox.objects.filter(pk=row.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(outbox.deliver(outbox.claim())[:2], (1, 0))
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (EmailOutbox.STATUS_SENT, 2))
+
+    def test_drain_outbox(self):
+        for number in range(3):
+            self.queue(f"user{number}@example.com")
+        later = self.queue("later@example.com")
+        EmailOutbox.objects.filter(pk=later.pk).update(next_attempt_at=timezone.now() + timedelta(minutes=5))
+        out = io.StringIO()
+        call_command("drain_outbox", batch_size=2, stdout=out)
+        self.assertEqual(out.getvalue().splitlines()[:2], ["batch 1: sent 2, failed 0", "batch 2: sent 1, failed 0"])
+        self.assertIn("Done: 3 sent, 0 failed in 2 batch(es)", out.getvalue())
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f"user{number}@example.com" for number in range(3)])
+        self.assertEqual(EmailOutbox.objects.get(pk=later.pk).status, EmailOutbox.STATUS_PENDING)
+
+    def test_finished_rows_do_not_keep_the_code(self):
+        sent, failing = self.queue(code="1111"), self.queue("bob@example.com", "2222")
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages",
+                        side_effect=[1, OSError("down"), OSError("down")]), \
+                self.assertLogs("accounts.outbox", "WARNING"):
+            self.assertEqual(outbox.deliver(outbox.claim())[:2], (1, 1))
+            failing.refresh_from_db()
+            self.assertIn("2222", failing.body)  # still to be retried
+            EmailOutbox.objects.filter(pk=failing.pk).update(next_attempt_at=timezone.now())
+            self.assertEqual(outbox.deliver(outbox.claim())[:2], (0, 1))
+
+        sent.refresh_from_db()
+        failing.refresh_from_db()
+        self.assertEqual((sent.status, sent.body), (EmailOutbox.STATUS_SENT, ""))
+        self.assertEqual((failing.status, failing.body), (EmailOutbox.STATUS_FAILED, ""))
+
+    def test_admin_is_read_only_and_hides_the_body(self):
+        row = self.queue(code="9876")
+        admin_user = Account.objects.create_superuser(username="root", gmail="root@example.com", password="Secret#123")
+        self.client.force_login(admin_user)
+
+        changelist = self.client.get(reverse("admin:accounts_emailoutbox_changelist"))
+        self.assertContains(changelist, "alice@example.com")
+        self.assertNotContains(changelist, "9876")
+        detail = self.client.get(reverse("admin:accounts_emailoutbox_change", args=[row.pk]))
+        self.assertContains(detail, "alice@example.com")
+        self.assertNotContains(detail, "9876")
+        self.assertNotContains(detail, 'name="_save"')
+        self.assertEqual(self.client.get(reverse("admin:accounts_emailoutbox_add")).status_code, 403)
+        self.assertEqual(self.client.post(reverse("admin:accounts_emailoutbox_change", args=[row.pk]), {"body": "x"}).status_code, 403)
+
+
+@override_settings(**TEST_SETTINGS)
+class MailPoolTests(TransactionTestCase):
+    """The background mail pool (accounts/mail.py) on real threads, against committed outbox rows."""
+
+    def setUp(self):
+        self.pool = mail_pool.MailDispatcher(workers=1, queue_size=2, idle_seconds=0.05)
+        self.addCleanup(self.pool.shutdown)
+
+    def queue(self, count):
+        return [outbox.queue_email(build_otp_email(f"user{number}@example.com", "1234")).pk for number in range(count)]
+
+    def test_shutdown_drains_the_queue(self):
+        ids = self.queue(2)
+        for pk in ids:
+            self.assertTrue(self.pool.submit(pk))
+        self.pool.shutdown()
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ["user0@example.com", "user1@example.com"])
+        self.assertEqual(self.pool.stats, {"queued": 2, "overflow": 0, "sent": 2, "failed": 0})
+        self.assertEqual(EmailOutbox.objects.filter(status=EmailOutbox.STATUS_SENT).count(), 2)
+
+    def test_full_queue_leaves_rows_for_drain_outbox(self):
+        ids = self.queue(4)
+        busy, release = threading.Event(), threading.Event()
+        claim = outbox.claim
+
+        def slow_claim(*args, **kwargs):
+            busy.set()
+            release.wait(5)
+            return claim(*args, **kwargs)
+
+        with mock.patch("accounts.mail.outbox.claim", side_effect=slow_claim):
+            self.assertTrue(self.pool.submit(ids[0]))
+            self.assertTrue(busy.wait(5))  # the worker holds the first id
+            self.assertTrue(self.pool.submit(ids[1]))
+            self.assertTrue(self.pool.submit(ids[2]))
+            with self.assertLogs("accounts.mail", "WARNING") as logs:
+                self.assertFalse(self.pool.submit(ids[3]))
+            self.assertIn(f"outbox row {ids[3]} left for drain_outbox", logs.output[0])
+            release.set()
+            self.pool.shutdown()
+
+        self.assertEqual((self.pool.stats["queued"], self.pool.stats["overflow"], self.pool.stats["sent"]), (3, 1, 3))
+        self.assertEqual(EmailOutbox.objects.get(pk=ids[3]).status, EmailOutbox.STATUS_PENDING)
+
+    def test_failures_are_recorded_and_logged(self):
+        failing, sent, broken = self.queue(3)
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=[OSError("down"), 1]), \
+                self.assertLogs("accounts.outbox", "WARNING") as logs:
+            self.pool.submit(failing)
+            self.pool.submit(sent)
+            self.pool.shutdown()
+        self.assertIn("OSError: down", logs.output[0])
+        self.assertEqual((self.pool.stats["sent"], self.pool.stats["failed"]), (1, 1))
+        row = EmailOutbox.objects.get(pk=failing)
+        self.assertEqual((row.status, row.attempts, row.last_error), (EmailOutbox.STATUS_PENDING, 1, "OSError: down"))
+
+        # an error outside the send (here the claim) is logged, and the worker keeps going
+        pool = mail_pool.MailDispatcher(workers=1, queue_size=2, idle_seconds=0.05)
+        with mock.patch("accounts.mail.outbox.claim", side_effect=[RuntimeError("db gone"), []]), \
+                self.assertLogs("accounts.mail", "ERROR") as logs:
+            pool.submit(broken)
+            pool.shutdown()
+        self.assertIn(f"Failed to deliver outbox rows [{broken}]", logs.output[0])
+
+    def test_stats_from_many_threads(self):
+        class Null(BatchWorker):
+            def handle_batch(self, items, state):
+                self.count(handled=len(items))
+
+        worker = Null(workers=2, queue_size=10000)
+        threads = [threading.Thread(target=lambda: [worker.submit(n) for n in range(500)]) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        worker.shutdown()
+        self.assertEqual(worker.stats, {"queued": 4000, "overflow": 0, "handled": 4000})
+
+
+@override_settings(**TEST_SETTINGS, PASSWORD_RESET_OTP_EXPIRY_MINUTES=10)
+class PurgeOTPsTests(TestCase):
+    """manage.py purge_otps: which rows are dead, batching and the archive."""
+
+    def setUp(self):
+        def otp(minutes_old, **fields):
+            row = PasswordResetOTP.objects.create(gmail=f"user{PasswordResetOTP.objects.count()}@example.com", code="1234", **fields)
+            PasswordResetOTP.objects.filter(pk=row.pk).update(created_at=timezone.now() - timedelta(minutes=minutes_old))
+            return row.pk
+
+        self.expired = [otp(11), otp(30, is_verified=True), otp(60 * 24, is_used=True)]
+        self.used = [otp(1, is_used=True), otp(5, is_used=True, is_verified=True)]
+        self.live = [otp(1), otp(9, is_verified=True)]
+
+    def purge(self, **options):
+        out = io.StringIO()
+        call_command("purge_otps", stdout=out, **options)
+        return out.getvalue()
+
+    def remaining(self):
+        return sorted(PasswordResetOTP.objects.values_list("pk", flat=True))
+
+    def test_cutoff(self):
+        self.assertIn("5 row(s) would be purged", self.purge(dry_run=True))
+        self.assertIn("2 row(s) would be purged", self.purge(dry_run=True, keep_used=True, older_than=20))
+        self.assertEqual(len(self.remaining()), 7)
+
+        self.purge(keep_used=True)
+        self.assertEqual(self.remaining(), sorted(self.used + self.live))
+        self.purge()
+        self.assertEqual(self.remaining(), sorted(self.live))
+
+    def test_batches_and_archive(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "otps.jsonl.gz")
+            output = self.purge(batch_size=2, archive=path)
+            self.purge(archive=path, older_than=0)  # appends
+            with gzip.open(path, "rt", encoding="utf-8") as archive:
+                rows = [json.loads(line) for line in archive]
+
+        self.assertEqual([line.split(":")[0] for line in output.splitlines()[:-1]], ["batch 1", "batch 2", "batch 3"])
+        self.assertIn("batch 3: 1 row(s)", output)
+        self.assertIn("Done: 5 row(s) purged in 3 batch(es)", output)
+        self.assertEqual(self.remaining(), [])
+
+        self.assertEqual([row["id"] for row in rows], sorted(self.expired + self.used) + self.live)
+        self.assertEqual(list(rows[0]), ARCHIVE_FIELDS)
+        self.assertEqual((rows[0]["gmail"], rows[0]["code"], rows[0]["is_used"]), ("user0@example.com", "1234", False))
+        uuid.UUID(rows[0]["token"])
+        self.assertIsInstance(rows[0]["created_at"], str)
+
+
+@override_settings(**TEST_SETTINGS)
+class SendResetOTPsTests(TestCase):
+    """manage.py send_reset_otps / the Account admin action."""
+
+    def test_issues_and_sends_to_the_domain(self):
+        for name in ("ann", "ben", "cat"):
+            Account.objects.create_user(username=name, gmail=f"{name}@client.example", password="Secret#123")
+        Account.objects.create_user(username="other", gmail="other@example.com", password="Secret#123")
+
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("send_reset_otps", domain=["client.example"], batch_size=2, stdout=out)
+        self.assertIn("3 OTP(s) issued, 3 email(s) sent, 0 failed", out.getvalue())
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ["ann@client.example", "ben@client.example", "cat@client.example"])
+        self.assertFalse(EmailOutbox.objects.exclude(status=EmailOutbox.STATUS_SENT).exists())
+
+        # the codes are live
+        otp = PasswordResetOTP.objects.get(gmail="ben@client.example")
+        response = self.client.post(
+            reverse("verify-otp"), data=json.dumps({"gmail": otp.gmail, "otp": otp.code}), content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def admin_action(self, user=None, names=("ann", "ben")):
+        if user is None:
+            user = Account.objects.create_superuser(username="root", gmail="root@example.com", password="Secret#123")
+        accounts = [Account.objects.get_or_create(username=name, gmail=f"{name}@client.example")[0] for name in names]
+        self.client.force_login(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("admin:accounts_account_changelist"), {
+                "action": "send_reset_otps", "_selected_action": [account.pk for account in accounts],
+            }, follow=True)
+        return response
+
+    def changelist(self):
+        return self.client.get(reverse("admin:accounts_account_changelist"))
+
+    def test_admin_action_sends_in_the_background(self):
+        with override_settings(OTP_EMAIL_ASYNC=True), \
+                mock.patch.object(mail_pool.bulk_dispatcher, "submit", return_value=True) as submit:
+            response = self.admin_action()
+        self.assertContains(response, "2 OTP(s) issued and their earlier codes revoked; the emails are being sent")
+        [(ids, on_done)] = submit.call_args.args
+        self.assertEqual(ids, list(EmailOutbox.objects.order_by("pk").values_list("pk", flat=True)))
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(PasswordResetOTP.objects.count(), 2)
+
+        self.assertNotContains(self.changelist(), "Reset OTP emails")
+        on_done(1, 1)  # what the bulk sender reports when it is through
+        self.assertContains(self.changelist(), "Reset OTP emails: 1 sent, 1 failed (retried by drain_outbox).")
+        self.assertNotContains(self.changelist(), "Reset OTP emails")  # shown once
+
+    def test_admin_action_reports_a_full_queue(self):
+        with override_settings(OTP_EMAIL_ASYNC=True), \
+                mock.patch.object(mail_pool.bulk_dispatcher, "submit", return_value=False), \
+                self.assertLogs("accounts.mail", "WARNING"):
+            self.admin_action()
+        self.assertContains(self.changelist(), "Reset OTP emails: 0 sent, 2 failed (retried by drain_outbox).")
+
+    def test_admin_action_inline(self):
+        self.admin_action()
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ["ann@client.example", "ben@client.example"])
+        self.assertFalse(EmailOutbox.objects.exclude(status=EmailOutbox.STATUS_SENT).exists())
+        self.assertContains(self.changelist(), "Reset OTP emails: 2 sent.")
+
+    def test_admin_action_supersedes_earlier_codes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            earlier = otp_store.issue_otp("ANN@client.example")
+        self.admin_action()
+        earlier.refresh_from_db()
+        self.assertTrue(earlier.is_used)
+        self.assertFalse(PasswordResetOTP.objects.exclude(pk=earlier.pk).filter(is_used=True).exists())
+
+    def test_admin_action_needs_its_permission(self):
+        staff = Account.objects.create_user(username="staff", gmail="staff@example.com", password="Secret#123", is_staff=True)
+        staff.user_permissions.set(Permission.objects.filter(codename__in=["view_account", "change_account"]))
+        self.client.force_login(staff)
+        self.assertNotContains(self.changelist(), 'value="send_reset_otps"')
+        self.admin_action(staff)
+        self.assertFalse(PasswordResetOTP.objects.exists())
+
+        staff.user_permissions.add(Permission.objects.get(codename="send_reset_otps"))
+        staff = Account.objects.get(pk=staff.pk)  # fresh permission cache
+        self.assertContains(self.admin_action(staff), "2 OTP(s) issued")
+
+
+@override_settings(**TEST_SETTINGS, ROOT_URLCONF=__name__)
+class AsyncViewTests(TestCase):
+    """The native async views (accounts/async_views.py) answer like their sync twins."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create_user(username="Alice", gmail="Alice@Example.com", password="Secret#123")
+
+    def setUp(self):
+        clear_caches()
+
+    async def apost(self, url_name, data, **extra):
+        return await self.async_client.post(
+            reverse(url_name), data=json.dumps(data), content_type="application/json", **extra,
+        )
+
+    def post(self, url_name, data, **extra):
+        return self.client.post(reverse(url_name), data=json.dumps(data), content_type="application/json", **extra)
+
+    def both(self, url_name, data, async_data=None, **extra):
+        """The sync view's and then its async twin's response to the same POST (or to `async_data`)."""
+        with self.captureOnCommitCallbacks(execute=True):
+            sync = self.post(url_name, data, **extra)
+            asynchronous = async_to_sync(self.apost)(f"async-{url_name}", async_data or data, **extra)
+        return sync, asynchronous
+
+    def assertSameResponse(self, responses, status_code, ignore=()):
+        """Same status and body; keys in `ignore` (tokens) only have to be present in both."""
+        sync, asynchronous = (response.json() for response in responses)
+        self.assertEqual([response.status_code for response in responses], [status_code, status_code])
+        self.assertEqual(sync.keys(), asynchronous.keys())
+        for key in ignore:
+            sync.pop(key, None), asynchronous.pop(key, None)
+        self.assertEqual(sync, asynchronous)
+
+    def verified_otps(self, count):
+        return [
+            PasswordResetOTP.objects.create(gmail="alice@example.com", code=f"{number}" * 4, is_verified=True)
+            for number in range(1, count + 1)
+        ]
+
+    def test_login_matches_the_sync_view(self):
+        self.assertSameResponse(
+            self.both("login", {"identifier": "ALICE", "password": "Secret#123"}), 200, ignore=("access", "refresh"),
+        )
+        self.assertSameResponse(self.both("login", {"identifier": "alice", "password": "Wrong#1234"}), 400)
+        self.assertSameResponse(self.both("login", {"identifier": "nobody", "password": "Secret#123"}), 400)
+
+    def test_otp_request_matches_the_sync_view(self):
+        self.assertSameResponse(self.both("otp-request", {"gmail": "alice@example.com"}), 200)
+        self.assertEqual(PasswordResetOTP.objects.count(), 2)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertSameResponse(self.both("otp-request", {"gmail": "nobody@example.com"}), 400)
+        self.assertSameResponse(self.both("otp-request", {"gmail": "not-an-email"}), 400)
+
+    def test_verify_matches_the_sync_view(self):
+        with mock.patch("accounts.otp_store.random.randint", side_effect=[1111, 2222]):
+            for _ in range(2):
+                self.post("otp-request", {"gmail": "alice@example.com"})
+        self.assertSameResponse(
+            self.both("verify-otp", {"gmail": "alice@example.com", "otp": "1111"}, {"gmail": "alice@example.com", "otp": "2222"}),
+            200, ignore=("reset_token",),
+        )
+        self.assertSameResponse(self.both("verify-otp", {"gmail": "alice@example.com", "otp": "1111"}), 400)
+        self.assertSameResponse(self.both("verify-otp", {"gmail": "alice@example.com", "otp": "9999"}), 400)
+
+    def test_reset_matches_the_sync_view(self):
+        first, second = self.verified_otps(2)
+        passwords = {"new_password": "Newpass#123", "confirm_password": "Newpass#123"}
+        with self.captureOnCommitCallbacks(execute=True):
+            sync = self.post("reset-password", passwords, headers={"X-Reset-Token": str(first.token)})
+            asynchronous = async_to_sync(self.apost)("async-reset-password", passwords, headers={"X-Reset-Token": str(second.token)})
+        self.assertSameResponse((sync, asynchronous), 200)
+        self.account.refresh_from_db()
+        self.assertTrue(self.account.check_password("Newpass#123"))
+        self.assertSameResponse(self.both("reset-password", passwords, headers={"X-Reset-Token": str(first.token)}), 400)
+        self.assertSameResponse(self.both("reset-password", {**passwords, "confirm_password": "Other#123"}), 400)
+
+    def test_resend_matches_the_sync_view(self):
+        sync = self.post("resend-otp", {"gmail": "alice@example.com"})
+        cache.clear()  # the rate limit window of the sync request
+        self.assertSameResponse((sync, async_to_sync(self.apost)("async-resend-otp", {"gmail": "alice@example.com"})), 200)
+        # both inside the window now
+        self.assertSameResponse(self.both("resend-otp", {"gmail": "alice@example.com"}), 400)
+        self.assertSameResponse(self.both("resend-otp", {"gmail": "nobody@example.com"}), 400)
+
+    async def test_method_not_allowed_is_logged_without_errors(self):
+        with mock.patch("accounts.async_views.log_response") as log_response:
+            response = await self.async_client.get(reverse("async-login"))
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(log_response.call_args.args[:2], ("accounts.login", 405))
+        self.assertIsNone(log_response.call_args.kwargs["errors"])
+
+    async def test_bad_request_logs_the_errors(self):
+        with mock.patch("accounts.async_views.log_response") as log_response:
+            response = await self.apost("async-login", {"identifier": "alice", "password": "short"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(log_response.call_args.kwargs["errors"], response.json())
+        self.assertEqual(response.json(), {"error": ["Enter the valid password of minimum 8 characters"]})
+
+
+class SQLitePragmaTests(TestCase):
+    """settings.DATABASES applies SQLITE_PRAGMAS and transaction_mode on every new connection."""
+
+    def pragma(self, conn, name):
+        with conn.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_test_connection(self):
+        self.assertEqual(self.pragma(connection, "busy_timeout"), 5000)
+        self.assertEqual(self.pragma(connection, "synchronous"), 1)  # NORMAL
+
+    def test_new_file_connection(self):
+        # the test database is in memory, where journal_mode can only be "memory"
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_dict = {**connection.settings_dict, "NAME": os.path.join(directory.name, "db.sqlite3")}
+        connections["pragmas"] = other = type(connections["default"])(settings_dict, alias="pragmas")
+        self.addCleanup(connections.__delitem__, "pragmas")
+        self.addCleanup(other.close)
+
+        self.assertEqual(self.pragma(other, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(other, "busy_timeout"), 5000)
+        self.assertEqual(self.pragma(other, "synchronous"), 1)
+        self.assertEqual(self.pragma(other, "cache_size"), -20000)
+        self.assertEqual(self.pragma(other, "temp_store"), 2)  # MEMORY
+        with CaptureQueriesContext(other) as queries, transaction.atomic(using="pragmas"):
+            pass
+        self.assertEqual(queries[0]["sql"], "BEGIN IMMEDIATE")
+
+
+@override_settings(ACCOUNTS_READ_REPLICA="replica", CACHES=TEST_SETTINGS["CACHES"])
+class ReplicaRouterTests(SimpleTestCase):
+    """Replica reads with read-your-writes pinning (accounts/routers.py); routing only, no queries."""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.reads = []
+
+    def read(self):
+        self.reads.append(self.router.db_for_read(Account))
+
+    def test_reads_go_to_the_replica_until_the_request_writes(self):
+        def view(request):
+            self.read()
+            self.assertIsNone(self.router.db_for_read(EmailOutbox))
+            self.assertEqual(self.router.db_for_write(PasswordResetOTP), "default")
+            self.read()
+            return HttpResponse()
+
+        self.read()  # outside a request
+        response = ReplicaPinningMiddleware(view)(RequestFactory().post("/"))
+        self.assertEqual(self.reads, ["default", "replica", "default"])
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 5)
+
+    def test_pin_cookie_pins_the_next_request(self):
+        def view(request):
+            self.read()
+            return HttpResponse()
+
+        request = RequestFactory().get("/")
+        request.COOKIES[PIN_COOKIE] = "1"
+        response = ReplicaPinningMiddleware(view)(request)
+        self.read()
+        response = ReplicaPinningMiddleware(view)(RequestFactory().get("/"))
+        self.assertEqual(self.reads, ["default", "default", "replica"])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_pinned_values_pin_requests_without_the_cookie(self):
+        def reset(request):
+            self.router.db_for_write(Account)
+            pin("Alice@Example.com")
+            return HttpResponse()
+
+        def login(gmail):
+            def view(request):
+                self.read()
+                self.reads.append(follows_write(gmail))
+                self.read()
+                return HttpResponse()
+            return view
+
+        clear_caches()
+        ReplicaPinningMiddleware(reset)(RequestFactory().post("/"))
+        # no cookie comes back from a cross-origin client
+        ReplicaPinningMiddleware(login("alice@example.com"))(RequestFactory().post("/"))
+        ReplicaPinningMiddleware(login("bob@example.com"))(RequestFactory().post("/"))
+        self.assertEqual(self.reads, ["replica", True, "default", "replica", False, "replica"])
+
+    async def test_write_in_a_thread_pins_the_async_request(self):
+        async def view(request):
+            self.read()
+            await sync_to_async(self.router.db_for_write)(Account)  # as the async ORM runs it
+            self.read()
+            return HttpResponse()
+
+        response = await ReplicaPinningMiddleware(view)(RequestFactory().post("/"))
+        self.assertEqual(self.reads, ["replica", "default"])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+@override_settings(**TEST_SETTINGS, ACCOUNTS_READ_REPLICA="default")
+class ReplicaPinFlowTests(TestCase):
+    """The reset flow pins what the next request sends, for clients that don't return the pin cookie."""
+
+    def setUp(self):
+        clear_caches()
+
+    def post(self, url_name, data, **extra):
+        self.client.cookies.clear()  # as a cross-origin client
+        return self.client.post(reverse(url_name), data=json.dumps(data), content_type="application/json", **extra)
+
+    def test_verify_reset_login(self):
+        account = Account.objects.create_user(username="Alice", gmail="Alice@Example.com", password="Secret#123")
+        otp = PasswordResetOTP.objects.create(gmail="alice@example.com", code="1234")
+        token = self.post("verify-otp", {"gmail": "alice@example.com", "otp": "1234"}).json()["reset_token"]
+        self.assertTrue(cache.get(f"accounts_db_pin:{token}"))
+
+        response = self.post(
+            "reset-password", {"new_password": "Newpass#123", "confirm_password": "Newpass#123"},
+            headers={"X-Reset-Token": token},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(cache.get("accounts_db_pin:alice@example.com"))
+
+        # the account is read again once it turns out to be pinned
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post("login", {"identifier": "alice", "password": "Newpass#123"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len([q for q in queries.captured_queries if 'FROM "accounts_account"' in q["sql"]]), 2)
+        self.assertEqual(response.json()["user"]["id"], account.pk)
+        otp.refresh_from_db()
+        self.assertTrue(otp.is_used)
+
+
+class ProfileStartupTests(SimpleTestCase):
+    """How manage.py profile_startup charges -X importtime lines to apps."""
+
+    def test_modules_are_charged_to_the_app_that_imported_them(self):
+        stderr = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |     django.db.models
+import time:        20 |        120 |   accounts.models
+import time:        10 |        130 | accounts
+import time:       300 |        300 |     rest_framework.fields
+import time:        40 |        340 |   rest_framework.serializers
+import time:         5 |        345 | accounts.serializers
+import time:         7 |          7 | json
+"""
+        imports = [
+            ("setup", int(self_us), int(cumulative_us), len(indent) // 2, module)
+            for self_us, cumulative_us, indent, module in IMPORT_LINE.findall(stderr)
+        ]
+        totals = charge(imports, ["accounts", "rest_framework"])
+        self.assertEqual({owner: dict(by_phase) for owner, by_phase in totals.items()}, {
+            "accounts": {"setup": 135},
+            "rest_framework": {"setup": 340},
+            "(json)": {"setup": 7},
+        })
+
+
+@override_settings(**TEST_SETTINGS)
+class PasswordResetOTPAdminTests(TestCase):
+    """The OTP changelist pages by primary key and never counts the whole table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Account.objects.create_superuser(username="root", gmail="root@example.com", password="Secret#123")
+        for gmail in ("Ann@Example.com", "ann.b@example.com", "bob@example.com", "ANNE@example.com", "carl@example.com"):
+            PasswordResetOTP.objects.create(gmail=gmail, code="1234")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:accounts_passwordresetotp_changelist")
+
+    def rows(self, response):
+        return [otp.gmail for otp in response.context["cl"].result_list]
+
+    def test_keyset_pages_without_count_or_offset(self):
+        with mock.patch.object(PasswordResetOTPAdmin, "list_per_page", 2), CaptureQueriesContext(connection) as queries:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url + first.context["cl"].next_url)
+            last = self.client.get(self.url + second.context["cl"].next_url)
+        self.assertEqual(self.rows(first), ["carl@example.com", "ANNE@example.com"])
+        self.assertEqual(self.rows(second), ["bob@example.com", "ann.b@example.com"])
+        self.assertEqual(self.rows(last), ["Ann@Example.com"])
+        self.assertIsNone(last.context["cl"].next_url)
+        self.assertContains(first, "about 5 password reset otps")
+        sql = " ".join(query["sql"] for query in queries.captured_queries if "passwordresetotp" in query["sql"])
+        self.assertNotIn("OFFSET", sql)
+        self.assertNotIn('COUNT(*) AS "__count" FROM "accounts_passwordresetotp"', sql)
+
+    def test_gmail_prefix_search_is_case_insensitive(self):
+        response = self.client.get(self.url, {"q": "ANN"})
+        self.assertEqual(self.rows(response), ["ANNE@example.com", "ann.b@example.com", "Ann@Example.com"])
+        self.assertEqual(response.context["cl"].result_count, 3)
+        self.assertEqual(self.rows(self.client.get(self.url, {"q": "example"})), [])
+
+    def test_read_only(self):
+        otp = PasswordResetOTP.objects.first()
+        self.assertEqual(self.client.get(reverse("admin:accounts_passwordresetotp_add")).status_code, 403)
+        response = self.client.post(reverse("admin:accounts_passwordresetotp_change", args=[otp.pk]), {"is_used": "on"})
+        self.assertEqual(response.status_code, 403)
+        self.assertNotContains(self.client.get(reverse("admin:accounts_passwordresetotp_change", args=[otp.pk])), otp.code)
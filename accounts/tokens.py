@@ -0,0 +1,141 @@
+# accounts/tokens.py
+"""
+Lean JWT minting for login.
+
+simplejwt's RefreshToken() / .access_token build both tokens claim by claim,
+copy the payload between them and go through PyJWT for each signature
+(header dict, json.dumps, key preparation and algorithm lookup every time).
+TokenMinter does the per-process part once:
+
+ - the signing key, algorithm and hash function are resolved up front
+ - the encoded JWT header and the JSON claim templates (token type, aud /
+   iss) are prebuilt, so a token is one string format, one base64 and
+   one HMAC
+
+The tokens are ordinary simplejwt tokens (same claims and settings:
+SIMPLE_JWT lifetimes, USER_ID_CLAIM, TOKEN_TYPE_CLAIM, JTI_CLAIM, AUDIENCE,
+ISSUER) and validate with AccessToken(...) / RefreshToken(...). Both carry
+the user id, and with CHECK_REVOKE_TOKEN the REVOKE_TOKEN_CLAIM too, as
+RefreshToken.for_user() and its .access_token would.
+
+Non-HMAC algorithms (RS256, ES256, ...) are signed through the simplejwt
+token backend with the same templates. With the token blacklist app
+installed, refresh tokens must be recorded as outstanding, so they are
+issued by RefreshToken.for_user() instead.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+
+from django.apps import apps
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+class TokenMinter:
+    """Issues access / refresh tokens for an account with the current SIMPLE_JWT settings."""
+
+    def __init__(self):
+        from rest_framework_simplejwt.state import token_backend
+
+        self._backend = token_backend
+        self._encoder = api_settings.JSON_ENCODER
+        self._digest = _HMAC_DIGESTS.get(token_backend.algorithm)
+        if self._digest is not None:
+            self._key = self._backend.prepared_signing_key
+            if isinstance(self._key, str):
+                self._key = self._key.encode()
+            header = {"alg": token_backend.algorithm, "typ": "JWT"}
+            self._header = _b64(json.dumps(header, separators=(",", ":")).encode()) + b"."
+        self._access_lifetime = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+        self._refresh_lifetime = int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+        self._outstanding = apps.is_installed("rest_framework_simplejwt.token_blacklist")
+
+        # claim JSON around the per-token values; see _sign()
+        extra = {}
+        if token_backend.audience is not None:
+            extra["aud"] = token_backend.audience
+        if token_backend.issuer is not None:
+            extra["iss"] = token_backend.issuer
+        dumps = self._dumps
+        self._heads = {
+            token_type: "{%s:%s," % (dumps(api_settings.TOKEN_TYPE_CLAIM), dumps(token_type))
+            for token_type in ("access", "refresh")
+        }
+        self._jti_key = dumps(api_settings.JTI_CLAIM)
+        self._user_id_key = dumps(api_settings.USER_ID_CLAIM)
+        self._revoke_key = dumps(api_settings.REVOKE_TOKEN_CLAIM) if api_settings.CHECK_REVOKE_TOKEN else None
+        self._tail = "".join(f",{dumps(name)}:{dumps(value)}" for name, value in extra.items()) + "}"
+
+    def _dumps(self, value):
+        return json.dumps(value, separators=(",", ":"), cls=self._encoder)
+
+    def _user_claims(self, user):
+        claims = f"{self._user_id_key}:{self._dumps(getattr(user, api_settings.USER_ID_FIELD))}"
+        if self._revoke_key is not None:
+            # changing the password revokes the token (JWTAuthentication.get_user)
+            claims += f",{self._revoke_key}:{self._dumps(get_md5_hash_password(user.password))}"
+        return claims
+
+    def _sign(self, token_type, now, lifetime, user_claims):
+        payload = (
+            f'{self._heads[token_type]}"exp":{now + lifetime},"iat":{now},'
+            f'{self._jti_key}:"{uuid.uuid4().hex}",{user_claims}{self._tail}'
+        )
+        if self._digest is None:
+            return self._backend.encode(json.loads(payload))
+        signing_input = self._header + _b64(payload.encode())
+        signature = hmac.new(self._key, signing_input, self._digest).digest()
+        return (signing_input + b"." + _b64(signature)).decode()
+
+    def mint(self, user, access_only=False):
+        """{"access": ..., "refresh": ...} for `user`; only "access" if `access_only`."""
+        now = int(time.time())
+        user_claims = self._user_claims(user)
+        tokens = {"access": self._sign("access", now, self._access_lifetime, user_claims)}
+        if not access_only:
+            if self._outstanding:
+                from rest_framework_simplejwt.tokens import RefreshToken
+
+                tokens["refresh"] = str(RefreshToken.for_user(user))
+            else:
+                tokens["refresh"] = self._sign("refresh", now, self._refresh_lifetime, user_claims)
+        return tokens
+
+
+_minter = None
+_minter_lock = threading.Lock()
+
+
+def minter():
+    global _minter
+    if _minter is None:
+        with _minter_lock:
+            if _minter is None:
+                _minter = TokenMinter()
+    return _minter
+
+
+@receiver(setting_changed)
+def _reset_minter(setting, **kwargs):
+    global _minter
+    if setting in ("SIMPLE_JWT", "SECRET_KEY"):
+        _minter = None
+
+
+def issue_tokens(user, access_only=False):
+    """Access (and refresh) token for `user`, see TokenMinter."""
+    return minter().mint(user, access_only=access_only)
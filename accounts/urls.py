@@ -1,7 +1,19 @@
 # accounts/urls.py
+from django.conf import settings
 from django.urls import path
+from .metrics import metrics_view
 from .views import LoginView, OTPRequestView, OTPVerifyView, ResetPasswordView,ResendOTPView
 
+if getattr(settings, "ACCOUNTS_ASYNC_VIEWS", False):
+    # native async views for ASGI deployments, see accounts/async_views.py
+    from .async_views import (
+        AsyncLoginView as LoginView,
+        AsyncOTPRequestView as OTPRequestView,
+        AsyncOTPVerifyView as OTPVerifyView,
+        AsyncResetPasswordView as ResetPasswordView,
+        AsyncResendOTPView as ResendOTPView,
+    )
+
 urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
      path('otp-request/', OTPRequestView.as_view(), name='otp-request'),
@@ -10,3 +22,7 @@ urlpatterns = [
     path("resend-otp/", ResendOTPView.as_view(), name="resend-otp"),
 
 ]
+
+if getattr(settings, "ACCOUNTS_METRICS_ENABLED", True):
+    # Prometheus text format, answered only with ACCOUNTS_METRICS_TOKEN
+    urlpatterns.append(path("metrics/", metrics_view, name="metrics"))
@@ -4,11 +4,13 @@ Views for account auth and password-reset flow.
 
 Flow:
 - POST /api/accounts/login/          -> LoginView (identifier + password) -> JWTs
-- POST /api/accounts/otp-request/    -> OTPRequestView (gmail) -> sends OTP via SMTP
+- POST /api/accounts/otp-request/    -> OTPRequestView (gmail) -> queues OTP email (accounts.mail)
 - POST /api/accounts/verify-otp/     -> OTPVerifyView (gmail + otp) -> returns reset_token
 - POST /api/accounts/reset-password/ -> ResetPasswordView (new_password + confirm_password, header X-Reset-Token)
 """
 
+import time
+
 from rest_framework import generics, permissions, status
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
@@ -18,6 +20,8 @@ from django.conf import settings
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth import get_user_model
 
+from .events import log_response
+from .hashing import HashingBusy
 from .models import Account, PasswordResetOTP
 from .serializers import (
     LoginSerializer,
@@ -30,19 +34,40 @@ from .serializers import (
 User = get_user_model()
 
 
+class EventLogMixin:
+    """Emits one structured event per request, named `event` (accounts/events.py)."""
+    event = None
+
+    def initial(self, request, *args, **kwargs):
+        self._started = time.perf_counter()
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        try:
+            payload = request.data
+        except Exception:
+            # unparseable body; the response already says so
+            payload = None
+        log_response(
+            self.event, response.status_code, payload=payload,
+            errors=getattr(response, "data", None), started=getattr(self, "_started", None),
+        )
+        return response
+
+
 # --------------------
 # LOGIN VIEW
 # --------------------
-class LoginView(generics.GenericAPIView):
+class LoginView(EventLogMixin, generics.GenericAPIView):
     serializer_class = LoginSerializer
     permission_classes = [permissions.AllowAny]
+    event = "accounts.login"
 
     def post(self, request):
-        # Keep logs for debugging; remove or replace with proper logger in production.
-        print("LOGIN PAYLOAD:", request.data)
+        # payload and errors are logged (redacted) by EventLogMixin
         serializer = self.get_serializer(data=request.data)
         if not serializer.is_valid():
-            print("LOGIN ERRORS:", serializer.errors)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
@@ -50,12 +75,13 @@ class LoginView(generics.GenericAPIView):
 # --------------------
 # OTP REQUEST VIEW
 # --------------------
-class OTPRequestView(APIView):
+class OTPRequestView(EventLogMixin, APIView):
     permission_classes = [AllowAny]
+    event = "accounts.otp_request"
 
     def post(self, request, *args, **kwargs):
         """
-        Validates the gmail and synchronously sends an OTP email using SMTP.
+        Validates the gmail, stores the OTP and queues the email on the mail pool.
         Returns 200 on success or 400 with the validation/send error.
         """
         serializer = OTPRequestSerializer(data=request.data)
@@ -77,38 +103,39 @@ class OTPRequestView(APIView):
 # --------------------
 # OTP VERIFY VIEW
 # --------------------
-class OTPVerifyView(APIView):
+class OTPVerifyView(EventLogMixin, APIView):
     permission_classes = [AllowAny]
+    event = "accounts.otp_verify"
 
     def post(self, request, *args, **kwargs):
         """
-        Verifies the OTP. On success marks OTP as verified (if the model supports it),
-        and returns a reset_token (UUID) for the next step.
+        Verifies the OTP. On success marks OTP as verified (a conditional UPDATE,
+        or the hot tier) and returns its reset_token (UUID) for the next step.
         """
         serializer = OTPVerifySerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        otp_rec = serializer.validated_data.get("otp_rec")
-
-        # Mark verified if the model supports the field
+        # Mark verified (hot tier or table) and get the reset token
         try:
-            if hasattr(otp_rec, "is_verified"):
-                otp_rec.is_verified = True
-                otp_rec.save(update_fields=["is_verified"])
+            reset_token = serializer.save()
+        except serializers.ValidationError as ve:
+            # wrong/expired code, or lost a race with a concurrent verify
+            return Response(ve.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as exc:
             # Log in production; return friendly error to client
             return Response({"error": f"failed to mark otp verified: {str(exc)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         # Return reset token so client can call reset-password
-        return Response({"detail": "otp valid", "reset_token": str(otp_rec.token)}, status=status.HTTP_200_OK)
+        return Response({"detail": "otp valid", "reset_token": reset_token}, status=status.HTTP_200_OK)
 
 
 # --------------------
 # RESET PASSWORD VIEW
 # --------------------
-class ResetPasswordView(APIView):
+class ResetPasswordView(EventLogMixin, APIView):
     permission_classes = [AllowAny]
+    event = "accounts.reset_password"
 
     def post(self, request, *args, **kwargs):
         """
@@ -123,6 +150,8 @@ class ResetPasswordView(APIView):
             updated = serializer.save()
         except serializers.ValidationError as ve:
             return Response({"error": ve.detail if hasattr(ve, "detail") else str(ve)}, status=status.HTTP_400_BAD_REQUEST)
+        except HashingBusy as busy:
+            return Response({"error": busy.detail}, status=busy.status_code)
         except Exception as exc:
             return Response({"error": f"internal error while resetting password: {str(exc)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -131,8 +160,9 @@ class ResetPasswordView(APIView):
         return Response({"error": "no account updated"}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ResendOTPView(APIView):
+class ResendOTPView(EventLogMixin, APIView):
     permission_classes = [AllowAny]
+    event = "accounts.resend_otp"
 
     def post(self, request, *args, **kwargs):
         serializer = ResendOTPSerializer(data=request.data)
@@ -0,0 +1,432 @@
+"""
+Load test of the five accounts endpoints under WSGI and ASGI.
+
+    python benchmarks/bench_endpoints.py [--accounts 1000 10000 100000]
+        [--requests 500] [--concurrency 16] [--servers wsgi asgi]
+        [--db-profiles tuned baseline] [--fast-hasher] [--output bench_endpoints.json]
+
+For every --accounts size a throwaway SQLite database (benchmarks/bench_settings.py,
+locmem email backend) is migrated and seeded with that many accounts. Each
+server then runs in its own process against that database:
+
+ - wsgi: the sync views, get_wsgi_application() called from --concurrency
+   threads
+ - asgi: the async views (ACCOUNTS_ASYNC_VIEWS), get_asgi_application()
+   called from --concurrency asyncio tasks
+
+Both call the application in-process with a built environ / ASGI scope, so
+the numbers are Django + the accounts code without socket or server overhead.
+Per endpoint --requests requests are timed, in the order login, otp-request,
+verify-otp, reset-password, resend-otp, each on its own account and OTP
+(created before the clock starts). Reported: throughput, p50 / p95 / p99
+latency, SQL statements per request (accounts.query_budget.QueryRecorder) and
+non-2xx responses. Results are printed and written to --output as JSON, so runs
+before and after a change can be diffed; the per-size rows show how latency
+grows with the table.
+
+--fast-hasher uses MD5 instead of PBKDF2, leaving out the hashing cost that
+otherwise dominates login and reset-password.
+
+--db-profiles tuned baseline runs everything twice, on separate databases:
+with the SQLite profile of settings.py (WAL and the other PRAGMAs, IMMEDIATE
+transactions, persistent connections) and with Django's SQLite defaults, and
+prints the throughput ratio per endpoint.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = ("login", "otp-request", "verify-otp", "reset-password", "resend-otp")
+PASSWORD = "Bench#Password1"
+NEW_PASSWORD = "Bench#Password2"
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+# --------------------
+# SEEDING (child process)
+# --------------------
+def seed(count):
+    from django.core.management import call_command
+
+    from accounts import hashing
+    from accounts.models import Account
+
+    call_command("migrate", verbosity=0, interactive=False)
+    password = hashing.make_password(PASSWORD)
+    started = time.perf_counter()
+    batch = 5000
+    for offset in range(0, count, batch):
+        Account.objects.bulk_create([
+            Account(username=f"bench{i}", gmail=f"bench{i}@example.com", password=password)
+            for i in range(offset, min(count, offset + batch))
+        ])
+    return {"accounts": count, "seed_seconds": round(time.perf_counter() - started, 3)}
+
+
+# --------------------
+# REQUESTS (child process)
+# --------------------
+def build_requests(count, accounts, rng):
+    """(endpoint, path, body, headers) per timed request; OTP rows made up front."""
+    from accounts import otp_store
+    from accounts.models import PasswordResetOTP
+
+    def gmail(i):
+        return f"bench{i}@example.com"
+
+    picks = [rng.randrange(accounts) for _ in range(count)]
+    requests = {
+        "login": [{"identifier": f"bench{i}", "password": PASSWORD} for i in picks],
+        "otp-request": [{"gmail": gmail(i)} for i in picks],
+    }
+
+    pending = PasswordResetOTP.objects.bulk_create([
+        PasswordResetOTP(gmail=gmail(i), code=f"{rng.randrange(10**6):06d}") for i in picks
+    ])
+    for otp in pending:
+        otp_store.remember(otp)
+    requests["verify-otp"] = [{"gmail": otp.gmail, "otp": otp.code} for otp in pending]
+
+    verified = PasswordResetOTP.objects.bulk_create([
+        PasswordResetOTP(gmail=gmail(i), code=f"{rng.randrange(10**6):06d}", is_verified=True) for i in picks
+    ])
+    requests["reset-password"] = [
+        ({"new_password": NEW_PASSWORD, "confirm_password": NEW_PASSWORD}, {"x-reset-token": str(otp.token)})
+        for otp in verified
+    ]
+
+    # one per account: a second resend for the same gmail is rate limited
+    requests["resend-otp"] = [{"gmail": gmail(i)} for i in rng.sample(range(accounts), min(count, accounts))]
+
+    prefix = "/api/accounts/"
+    for endpoint in ENDPOINTS:
+        requests[endpoint] = [
+            (f"{prefix}{endpoint}/", *(item if isinstance(item, tuple) else (item, {})))
+            for item in requests[endpoint]
+        ]
+        requests[endpoint] = [(path, json.dumps(body).encode(), headers) for path, body, headers in requests[endpoint]]
+    return requests
+
+
+def summarize(endpoint, samples, wall, concurrency):
+    latencies = sorted(ms for ms, _, _ in samples)
+    return {
+        "endpoint": endpoint,
+        "requests": len(samples),
+        "concurrency": concurrency,
+        "throughput_rps": round(len(samples) / wall, 1) if wall else 0.0,
+        "mean_ms": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "queries_per_request": round(statistics.fmean(q for _, q, _ in samples), 2) if samples else 0.0,
+        "errors": sum(1 for _, _, status in samples if not 200 <= status < 300),
+    }
+
+
+def wsgi_environ(path, body, headers):
+    environ = {
+        "REQUEST_METHOD": "POST",
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "SERVER_NAME": "bench",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "REMOTE_ADDR": "127.0.0.1",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in headers.items():
+        environ["HTTP_" + name.upper().replace("-", "_")] = value
+    return environ
+
+
+def run_wsgi(requests, concurrency):
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connection
+
+    from accounts.query_budget import QueryRecorder
+
+    app = get_wsgi_application()
+
+    def call(request):
+        path, body, headers = request
+        status = []
+        with QueryRecorder() as recorder:
+            started = time.perf_counter()
+            result = app(wsgi_environ(path, body, headers), lambda s, h, exc_info=None: status.append(int(s[:3])))
+            try:
+                b"".join(result)
+            finally:
+                result.close()
+            elapsed = (time.perf_counter() - started) * 1000
+        return elapsed, len(recorder.queries), status[0]
+
+    def close_connection():
+        connection.close()
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for endpoint in ENDPOINTS:
+            started = time.perf_counter()
+            samples = list(pool.map(call, requests[endpoint]))
+            results[endpoint] = summarize(endpoint, samples, time.perf_counter() - started, concurrency)
+        # per-thread connections, kept open between requests with CONN_MAX_AGE
+        list(pool.map(lambda _: close_connection(), range(concurrency)))
+    return results
+
+
+def asgi_scope(path, body, headers):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ] + [(name.encode(), value.encode()) for name, value in headers.items()],
+        "client": ("127.0.0.1", 40000),
+        "server": ("bench", 80),
+    }
+
+
+def run_asgi(requests, concurrency):
+    from django.core.asgi import get_asgi_application
+
+    from accounts.query_budget import QueryRecorder
+
+    app = get_asgi_application()
+
+    async def call(request, limit):
+        path, body, headers = request
+        status = []
+        body_sent = False
+        disconnected = asyncio.Event()
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Django listens for a disconnect while the view runs
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+
+        async with limit:
+            # a task per request: the recorder's context variable is per task
+            with QueryRecorder() as recorder:
+                started = time.perf_counter()
+                await app(asgi_scope(path, body, headers), receive, send)
+                elapsed = (time.perf_counter() - started) * 1000
+        disconnected.set()
+        return elapsed, len(recorder.queries), status[0]
+
+    async def main():
+        limit = asyncio.Semaphore(concurrency)
+        results = {}
+        for endpoint in ENDPOINTS:
+            started = time.perf_counter()
+            samples = await asyncio.gather(*(call(request, limit) for request in requests[endpoint]))
+            results[endpoint] = summarize(endpoint, samples, time.perf_counter() - started, concurrency)
+        return results
+
+    return asyncio.run(main())
+
+
+def run_server(server, options):
+    from django.core.cache import cache
+
+    from accounts import hashing
+    from accounts.models import Account
+
+    # undo the previous server's reset-password requests and rate limits
+    accounts = Account.objects.update(password=hashing.make_password(PASSWORD))
+    cache.clear()
+    rng = random.Random(options.seed)
+    requests = build_requests(options.requests, accounts, rng)
+    # warm-up: imports, URL resolver, first connections; logins on their own accounts
+    warmup = [
+        ("/api/accounts/login/", json.dumps({"identifier": f"bench{i}", "password": PASSWORD}).encode(), {})
+        for i in range(min(accounts, options.warmup))
+    ]
+    runner = run_wsgi if server == "wsgi" else run_asgi
+    runner({**{endpoint: [] for endpoint in ENDPOINTS}, "login": warmup}, options.concurrency)
+    results = runner(requests, options.concurrency)
+    return [{"server": server, "accounts": accounts, **row} for row in results.values()]
+
+
+# --------------------
+# ORCHESTRATION (parent process)
+# --------------------
+def child(options):
+    sys.path.insert(0, ROOT)
+    os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.bench_settings"
+    import django
+
+    django.setup()
+    if options.child == "seed":
+        result = seed(options.accounts[0])
+    else:
+        result = run_server(options.child, options)
+    # the parent reads the last line of stdout
+    print(json.dumps(result))
+
+
+def spawn(argv, bench_dir, options, profile, server=None):
+    env = {
+        **os.environ,
+        "ACCOUNTS_BENCH_DIR": bench_dir,
+        "ACCOUNTS_BENCH_DB_PROFILE": profile,
+        "ACCOUNTS_BENCH_ASYNC": "1" if server == "asgi" else "0",
+        "ACCOUNTS_BENCH_FAST_HASHER": "1" if options.fast_hasher else "0",
+    }
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *argv],
+        env=env, cwd=ROOT, stdout=subprocess.PIPE, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def django_version():
+    import django
+
+    return django.get_version()
+
+
+def print_table(rows):
+    print(f"{'db':8} {'server':6} {'accounts':>9} {'endpoint':15} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'queries':>8} {'errors':>7}")
+    for row in rows:
+        print(f"{row['db_profile']:8} {row['server']:6} {row['accounts']:>9} {row['endpoint']:15} "
+              f"{row['throughput_rps']:>9.1f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} "
+              f"{row['queries_per_request']:>8.2f} {row['errors']:>7}")
+
+
+def print_profile_gain(rows):
+    """tuned / baseline throughput per (server, accounts, endpoint)."""
+    baseline = {
+        (row["server"], row["accounts"], row["endpoint"]): row for row in rows if row["db_profile"] == "baseline"
+    }
+    print(f"\n{'server':6} {'accounts':>9} {'endpoint':15} {'baseline/s':>11} {'tuned/s':>9} {'gain':>6} {'errors b/t':>11}")
+    for row in rows:
+        base = baseline.get((row["server"], row["accounts"], row["endpoint"]))
+        if row["db_profile"] != "tuned" or base is None:
+            continue
+        gain = row["throughput_rps"] / base["throughput_rps"] if base["throughput_rps"] else 0.0
+        print(f"{row['server']:6} {row['accounts']:>9} {row['endpoint']:15} {base['throughput_rps']:>11.1f} "
+              f"{row['throughput_rps']:>9.1f} {gain:>5.2f}x {base['errors']:>5}/{row['errors']:<5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--accounts", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--requests", type=int, default=500, help="timed requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--servers", nargs="+", choices=["wsgi", "asgi"], default=["wsgi", "asgi"])
+    parser.add_argument("--db-profiles", nargs="+", choices=["tuned", "baseline"], default=["tuned"],
+                        help="SQLite profile of settings.py and/or Django's defaults")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--fast-hasher", action="store_true", help="MD5 instead of PBKDF2")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for picking accounts")
+    parser.add_argument("--output", default="bench_endpoints.json")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark databases")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.child:
+        child(options)
+        return
+
+    common = ["--requests", str(options.requests), "--concurrency", str(options.concurrency),
+              "--warmup", str(options.warmup), "--seed", str(options.seed)]
+    seeding, rows = [], []
+    for count in options.accounts:
+        # a database per profile: WAL mode sticks to the file once set
+        for profile in options.db_profiles:
+            bench_dir = tempfile.mkdtemp(prefix=f"bench_endpoints_{count}_{profile}_")
+            try:
+                seeded = spawn(["--child", "seed", "--accounts", str(count)], bench_dir, options, profile)
+                seeding.append({"db_profile": profile, **seeded})
+                print(f"seeded {count} accounts ({profile}) in {seeded['seed_seconds']} s", file=sys.stderr)
+                for server in options.servers:
+                    results = spawn(["--child", server, *common], bench_dir, options, profile, server)
+                    rows.extend({"db_profile": profile, **row} for row in results)
+                    print(f"  {server} done", file=sys.stderr)
+            finally:
+                if options.keep:
+                    print(f"  kept {bench_dir}", file=sys.stderr)
+                else:
+                    shutil.rmtree(bench_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "django": django_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "hasher": "md5" if options.fast_hasher else "default",
+            "db_profiles": options.db_profiles,
+            "requests_per_endpoint": options.requests,
+            "concurrency": options.concurrency,
+        },
+        "seeding": seeding,
+        "results": rows,
+    }
+    with open(options.output, "w") as out:
+        json.dump(report, out, indent=2)
+    print_table(rows)
+    if {"tuned", "baseline"} <= set(options.db_profiles):
+        print_profile_gain(rows)
+    print(f"\nwritten to {options.output}")
+
+
+if __name__ == "__main__":
+    main()
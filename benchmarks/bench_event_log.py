@@ -0,0 +1,147 @@
+"""
+Per-request cost of the accounts event log (accounts/events.py).
+
+    python benchmarks/bench_event_log.py [--iterations 20000] [--sink-delay-us 200]
+
+Times, per call on the request thread, a login-sized event written:
+ - with print() to a file (what LoginView used to do)
+ - through a synchronous FileHandler + JSON formatter
+ - through QueueJSONHandler (enqueue only; the listener writes)
+ - through QueueJSONHandler with ACCOUNTS_EVENT_SAMPLE_RATE = 0.1
+ - synchronously and through the queue to a slow sink (--sink-delay-us per
+   write, e.g. a full pipe or a remote syslog)
+and reports mean / p50 / p99 in microseconds. Output goes to temp files.
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myproject.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+
+from accounts import events  # noqa: E402
+
+PAYLOAD = {"identifier": "alice@example.com", "password": "Secret#123"}
+ERRORS = {"error": ["Enter the valid password"]}
+
+
+def measure(call, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+    return statistics.fmean(timings), timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+
+
+class SlowStream:
+    """File stream that takes `delay` seconds per write."""
+
+    def __init__(self, path, delay):
+        self._file = open(path, "w")
+        self._delay = delay
+
+    def write(self, text):
+        time.sleep(self._delay)
+        return self._file.write(text)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def slow_handler(path, delay):
+    handler = logging.StreamHandler(SlowStream(path, delay))
+    handler.setFormatter(events.JSONLineFormatter())
+    return handler
+
+
+class SlowQueueJSONHandler(events.QueueJSONHandler):
+    delay = 0.0
+
+    def _target(self):
+        return slow_handler(self.filename, self.delay)
+
+
+def use_handler(handler):
+    events.logger.handlers[:] = [handler]
+    events.logger.setLevel(logging.INFO)
+    events.logger.propagate = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--sink-delay-us", type=float, default=200.0)
+    options = parser.parse_args()
+    iterations = options.iterations
+    # the slow-sink runs are shorter: the synchronous one sleeps on every call
+    slow_iterations = max(100, iterations // 10)
+    delay = options.sink_delay_us / 1e6
+    tmp = tempfile.mkdtemp(prefix="bench_event_log_")
+
+    def log_call():
+        events.log_response("accounts.login", 400, payload=PAYLOAD, errors=ERRORS, started=time.perf_counter())
+
+    results = []
+
+    with open(os.path.join(tmp, "print.log"), "w") as out, contextlib.redirect_stdout(out):
+        def print_call():
+            print("LOGIN PAYLOAD:", PAYLOAD)
+            print("LOGIN ERRORS:", ERRORS)
+            out.flush()  # stdout to a pipe/terminal is line buffered
+        results.append(("print() (old LoginView)", measure(print_call, iterations)))
+
+    sync_handler = logging.FileHandler(os.path.join(tmp, "sync.log"))
+    sync_handler.setFormatter(events.JSONLineFormatter())
+    use_handler(sync_handler)
+    results.append(("sync FileHandler + JSON", measure(log_call, iterations)))
+    sync_handler.close()
+
+    queue_handler = events.QueueJSONHandler(filename=os.path.join(tmp, "queue.log"), queue_size=iterations * 2)
+    use_handler(queue_handler)
+    results.append(("QueueJSONHandler", measure(log_call, iterations)))
+
+    settings.ACCOUNTS_EVENT_SAMPLE_RATE = 0.1
+    results.append(("QueueJSONHandler, 10% sampled", measure(log_call, iterations)))
+    drain_started = time.perf_counter()
+    queue_handler.stop()
+    drain_ms = (time.perf_counter() - drain_started) * 1000
+    settings.ACCOUNTS_EVENT_SAMPLE_RATE = 1.0
+
+    slow_sync = slow_handler(os.path.join(tmp, "slow_sync.log"), delay)
+    use_handler(slow_sync)
+    results.append((f"sync, slow sink ({slow_iterations})", measure(log_call, slow_iterations)))
+    slow_sync.close()
+
+    SlowQueueJSONHandler.delay = delay
+    slow_queue = SlowQueueJSONHandler(filename=os.path.join(tmp, "slow_queue.log"), queue_size=slow_iterations * 2)
+    use_handler(slow_queue)
+    results.append((f"QueueJSONHandler, slow sink ({slow_iterations})", measure(log_call, slow_iterations)))
+    slow_queue.stop()
+
+    print(f"{iterations} events per run, microseconds per call on the request thread\n")
+    print(f"{'':40} {'mean':>8} {'p50':>8} {'p99':>8}")
+    for name, (mean, p50, p99) in results:
+        print(f"{name:40} {mean:8.2f} {p50:8.2f} {p99:8.2f}")
+    print(f"\nlistener drained the remaining queue in {drain_ms:.1f} ms; dropped: {queue_handler.dropped}")
+    print(f"output in {tmp}")
+
+
+if __name__ == "__main__":
+    main()
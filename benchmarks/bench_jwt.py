@@ -0,0 +1,82 @@
+"""
+Tokens per second: login's JWT issuance, simplejwt vs accounts.tokens.
+
+    python benchmarks/bench_jwt.py [--seconds 2]
+
+Mints tokens for an (unsaved) account the ways login has done it:
+ - RefreshToken() + .access_token + user_id set afterwards (old LoginSerializer)
+ - RefreshToken.for_user() + .access_token
+ - TokenMinter, access + refresh
+ - TokenMinter, access only
+each for about --seconds after a warm-up, and reports logins and tokens per
+second and microseconds per login. Uses the SIMPLE_JWT settings of
+myproject.settings; no database is touched.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myproject.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken  # noqa: E402
+
+from accounts.models import Account  # noqa: E402
+from accounts.tokens import TokenMinter  # noqa: E402
+
+
+def rate(call, seconds):
+    for _ in range(200):
+        call()
+    calls, started = 0, time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            call()
+        calls += 100
+    return calls / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    options = parser.parse_args()
+
+    user = Account(id=42, username="bench", gmail="bench@example.com")
+    minter = TokenMinter()
+
+    def simplejwt_login():
+        refresh = RefreshToken()
+        access = refresh.access_token
+        access["user_id"] = user.id
+        return {"refresh": str(refresh), "access": str(access)}
+
+    def simplejwt_for_user():
+        refresh = RefreshToken.for_user(user)
+        return {"refresh": str(refresh), "access": str(refresh.access_token)}
+
+    # the minted tokens must be accepted by simplejwt
+    tokens = minter.mint(user)
+    assert AccessToken(tokens["access"])["user_id"] == user.id
+    assert RefreshToken(tokens["refresh"])["user_id"] == user.id
+
+    cases = [
+        ("RefreshToken() + access_token (old login)", simplejwt_login, 2),
+        ("RefreshToken.for_user() + access_token", simplejwt_for_user, 2),
+        ("TokenMinter, access + refresh", lambda: minter.mint(user), 2),
+        ("TokenMinter, access only", lambda: minter.mint(user, access_only=True), 1),
+    ]
+    print(f"{'':44} {'logins/s':>10} {'tokens/s':>10} {'us/login':>9}")
+    for name, call, per_login in cases:
+        logins = rate(call, options.seconds)
+        print(f"{name:44} {logins:10.0f} {logins * per_login:10.0f} {1e6 / logins:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
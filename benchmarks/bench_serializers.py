@@ -0,0 +1,183 @@
+"""
+Where the time goes inside LoginSerializer, OTPVerifySerializer and
+ResetPasswordSerializer validation, without the HTTP stack.
+
+    python benchmarks/bench_serializers.py [--accounts 10000] [--repeat 5] [--fast-hasher]
+
+Each serializer's work is split into the parts a request pays for:
+ - DRF field machinery: to_internal_value() (field lookup, CharField /
+   EmailField parsing and their validators)
+ - the serializer's own checks (identifier / length checks, the
+   password-strength regexes)
+ - the ORM: building and compiling the queryset, and the SQL round trip
+   against a throwaway SQLite database seeded with --accounts accounts
+ - the OTP hot tier, password hashing and JWT minting
+plus the whole is_valid() for comparison. The `_meta.get_fields()` scan the
+old OTPVerifySerializer ran on every verify is timed on its own, for
+reference; validate() no longer does it.
+
+Timed with timeit: one warm-up run, then --repeat runs of an autoranged
+number of calls; best and median microseconds per call are reported.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import timeit
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = "Bench#Password1"
+
+
+def measure(func, repeat):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()  # also the warm-up
+    runs = sorted(t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number))
+    return runs[0], statistics.median(runs)
+
+
+def setup_django(options, bench_dir):
+    os.environ["ACCOUNTS_BENCH_DIR"] = bench_dir
+    os.environ["ACCOUNTS_BENCH_FAST_HASHER"] = "1" if options.fast_hasher else "0"
+    os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.bench_settings"
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+
+    from accounts import hashing
+    from accounts.models import Account
+
+    call_command("migrate", verbosity=0, interactive=False)
+    password = hashing.make_password(PASSWORD)
+    Account.objects.bulk_create(
+        [Account(username=f"bench{i}", gmail=f"bench{i}@example.com", password=password) for i in range(options.accounts)],
+        batch_size=5000,
+    )
+
+
+def login_cases():
+    from accounts import hashing
+    from accounts.identity import resolve_account
+    from accounts.serializers import LoginSerializer
+
+    data = {"identifier": "bench42", "password": PASSWORD}
+    serializer = LoginSerializer(data=data)
+    attrs = LoginSerializer().to_internal_value(data)
+    user = resolve_account("bench42")
+    return "LoginSerializer", [
+        ("fields: to_internal_value()", lambda: LoginSerializer().to_internal_value(data)),
+        ("checks: _credentials()", lambda: serializer._credentials(attrs)),
+        ("orm: resolve_account() queryset + compile", lambda: _compile(resolve_account_queryset("bench42"))),
+        ("orm: resolve_account() with SQL", lambda: resolve_account("bench42")),
+        ("hash: check_password()", lambda: hashing.check_password(PASSWORD, user.password)),
+        ("jwt: _login_response()", lambda: serializer._login_response(user)),
+        ("total: is_valid()", lambda: LoginSerializer(data=data).is_valid()),
+    ]
+
+
+def verify_cases():
+    from accounts import otp_store
+    from accounts.models import PasswordResetOTP
+    from accounts.serializers import OTPVerifySerializer
+
+    otp = PasswordResetOTP.objects.create(gmail="bench7@example.com", code="123456")
+    otp_store.remember(otp)
+    data = {"gmail": "bench7@example.com", "otp": "123456"}
+    attrs = OTPVerifySerializer().to_internal_value(data)
+    serializer = OTPVerifySerializer(data=data)
+    serializer._validated_data = attrs
+
+    return "OTPVerifySerializer", [
+        ("fields: to_internal_value()", lambda: OTPVerifySerializer().to_internal_value(data)),
+        ("hot tier: otp_store.lookup()", lambda: otp_store.lookup("bench7@example.com", "123456")),
+        ("orm: _claim() queryset + compile", lambda: _compile(serializer._claim({"pk": otp.pk}), update=True)),
+        ("orm: _newest() row, with SQL", lambda: serializer._newest().first()),
+        ("legacy: _meta.get_fields() scan (removed)", lambda: any(
+            f.name == "is_verified" for f in PasswordResetOTP._meta.get_fields()
+        )),
+        ("total: validate() (hot tier)", lambda: serializer.validate(dict(attrs))),
+        ("total: is_valid()", lambda: OTPVerifySerializer(data=data).is_valid()),
+    ]
+
+
+def reset_cases():
+    from accounts import hashing
+    from accounts.serializers import ResetPasswordSerializer
+
+    data = {"new_password": "Bench#Password2", "confirm_password": "Bench#Password2"}
+    attrs = ResetPasswordSerializer().to_internal_value(data)
+    serializer = ResetPasswordSerializer(data=data)
+    missing = uuid.uuid4()
+
+    return "ResetPasswordSerializer", [
+        ("fields: to_internal_value()", lambda: ResetPasswordSerializer().to_internal_value(data)),
+        ("checks: validate() (match + strength regexes)", lambda: serializer.validate(dict(attrs))),
+        ("orm: _apply_reset(), claim matches nothing", lambda: serializer._apply_reset(missing, "x")),
+        ("hash: make_password()", lambda: hashing.make_password("Bench#Password2")),
+        ("total: is_valid()", lambda: ResetPasswordSerializer(data=data).is_valid()),
+    ]
+
+
+def resolve_account_queryset(identifier):
+    from accounts.identity import identifier_filter, lowercase_accounts, normalize_identifier
+
+    return lowercase_accounts().filter(identifier_filter(normalize_identifier(identifier)))[:2]
+
+
+def _compile(queryset, update=False):
+    """Build the SQL for `queryset` (as an UPDATE if `update`) without running it."""
+    from django.db.models.sql import UpdateQuery
+
+    query = queryset.query.chain(UpdateQuery) if update else queryset.query
+    if update:
+        query.add_update_values({"is_verified": True})
+    return query.get_compiler(queryset.db).as_sql()
+
+
+def run(options):
+    results = []
+    for group, cases in (login_cases(), verify_cases(), reset_cases()):
+        print(f"\n{group}")
+        print(f"  {'':46} {'best us':>10} {'median us':>10}")
+        for name, func in cases:
+            best, median = measure(func, options.repeat)
+            results.append({"serializer": group, "case": name, "best_us": round(best, 2), "median_us": round(median, 2)})
+            print(f"  {name:46} {best:10.2f} {median:10.2f}")
+    return results
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fast-hasher", action="store_true", help="MD5 instead of PBKDF2")
+    parser.add_argument("--output", help="also write the results as JSON")
+    options = parser.parse_args()
+
+    # the throwaway database is removed on the way out
+    with tempfile.TemporaryDirectory(prefix="bench_serializers_") as bench_dir:
+        setup_django(options, bench_dir)
+        try:
+            results = run(options)
+        finally:
+            from django.db import connections
+
+            connections.close_all()
+
+    if options.output:
+        with open(options.output, "w") as out:
+            json.dump({"accounts": options.accounts, "fast_hasher": options.fast_hasher, "results": results}, out, indent=2)
+        print(f"\nwritten to {options.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Settings for the benchmarks: myproject.settings pointed at a throwaway
+directory (ACCOUNTS_BENCH_DIR) for the database, cache and metrics, with the
+locmem email backend. ACCOUNTS_BENCH_ASYNC=1 serves the async views,
+ACCOUNTS_BENCH_FAST_HASHER=1 swaps PBKDF2 for MD5 (framework cost only) and
+ACCOUNTS_BENCH_DB_PROFILE=baseline drops the SQLite profile of settings.py
+(PRAGMAs, IMMEDIATE transactions, persistent connections) for comparison.
+"""
+
+import os
+
+from myproject.settings import *  # noqa: F401,F403
+
+BENCH_DIR = os.environ["ACCOUNTS_BENCH_DIR"]
+
+if os.environ.get("ACCOUNTS_BENCH_DB_PROFILE") == "baseline":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.path.join(BENCH_DIR, "db.sqlite3"),
+        }
+    }
+else:
+    DATABASES = {"default": {**DATABASES["default"], "NAME": os.path.join(BENCH_DIR, "db.sqlite3")}}  # noqa: F405
+CACHES = {
+    "default": {
+        "BACKEND": "accounts.cache.SQLiteCache",
+        "LOCATION": os.path.join(BENCH_DIR, "cache.sqlite3"),
+        "OPTIONS": {"MAX_ENTRIES": 1_000_000},
+    },
+    "otp": {
+        "BACKEND": "accounts.cache.SQLiteCache",
+        "LOCATION": os.path.join(BENCH_DIR, "cache_otp.sqlite3"),
+        "OPTIONS": {"MAX_ENTRIES": 1_000_000},
+    },
+}
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+ALLOWED_HOSTS = ["*"]
+DEBUG = False
+
+ACCOUNTS_ASYNC_VIEWS = os.environ.get("ACCOUNTS_BENCH_ASYNC") == "1"
+ACCOUNTS_METRICS_DIR = os.path.join(BENCH_DIR, "metrics")
+ACCOUNTS_EVENT_SAMPLE_RATE = 0.0
+OTP_RATE_LIMIT_SECONDS = 3600
+OTP_HOT_STORE = True  # the benchmarks seed and time the OTP hot tier (off in settings.py)
+
+if os.environ.get("ACCOUNTS_BENCH_FAST_HASHER") == "1":
+    PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
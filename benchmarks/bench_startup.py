@@ -0,0 +1,74 @@
+"""
+Cold start: process start to first response, full vs lean API settings.
+
+    python benchmarks/bench_startup.py [--runs 10] [--settings-modules myproject.settings myproject.settings_api]
+
+Starts --runs fresh interpreters per settings module (interleaved, so drift
+on the host hits all of them alike), each timing import django, settings,
+django.setup(), get_wsgi_application() and one GET of --path, the same
+steps as `manage.py profile_startup` (use that for the per-app breakdown).
+Reports the median and p95 of each step and of the whole process, which
+includes interpreter startup and exit. Nothing touches the database.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from accounts.management.commands.profile_startup import PHASES, run_child  # noqa: E402
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--settings-modules", nargs="+", default=["myproject.settings", "myproject.settings_api"])
+    parser.add_argument("--path", default="/api/accounts/login/")
+    parser.add_argument("--output", help="also write the results as JSON")
+    options = parser.parse_args()
+
+    samples = {module: [] for module in options.settings_modules}
+    for _ in range(options.runs):
+        for module in options.settings_modules:
+            samples[module].append(run_child(options.path, settings_module=module, cwd=ROOT))
+
+    columns = PHASES + ("total", "wall")
+    results = {}
+    print(f"{'ms, median / p95':24}" + "".join(f"{name:>18}" for name in columns))
+    for module, runs in samples.items():
+        row = {}
+        for name in columns:
+            values = sorted((run[name] if name in ("total", "wall") else run["phases"][name]) * 1000 for run in runs)
+            row[name] = {"median": round(statistics.median(values), 2), "p95": round(percentile(values, 0.95), 2)}
+        results[module] = row
+        print(f"{module:24}" + "".join(f"{row[name]['median']:9.1f} /{row[name]['p95']:7.1f}" for name in columns))
+        stale = runs[-1]["stale"]
+        if stale:
+            print(f"{'':24}{len(stale)} module(s) compiled from source on every start (no up-to-date .pyc)")
+
+    if len(results) > 1:
+        base, *others = options.settings_modules
+        for module in others:
+            change = results[module]["wall"]["median"] - results[base]["wall"]["median"]
+            print(f"\n{module} vs {base}: {change:+.1f} ms median wall per cold start")
+
+    if options.output:
+        with open(options.output, "w") as out:
+            json.dump({
+                "meta": {"runs": options.runs, "path": options.path, "python": platform.python_version()},
+                "results": results,
+            }, out, indent=2)
+        print(f"\nwritten to {options.output}")
+
+
+if __name__ == "__main__":
+    main()
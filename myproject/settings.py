@@ -69,6 +69,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'accounts.metrics.MetricsMiddleware',
+    'accounts.routers.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -102,13 +104,89 @@ WSGI_APPLICATION = 'myproject.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite tuned for several workers writing at once, applied on every new
+# connection (init_command):
+#  - WAL: readers don't block the writer and vice versa; synchronous=NORMAL is
+#    safe in WAL (a power loss can only drop the last commits)
+#  - transaction_mode IMMEDIATE takes the write lock at BEGIN, so concurrent
+#    writers wait up to busy_timeout instead of failing with "database is
+#    locked" when a read transaction tries to upgrade
+#  - connections are kept for CONN_MAX_AGE seconds and health-checked before
+#    reuse instead of reopened (and re-PRAGMA'd) per request
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,       # ms
+    'mmap_size': 134217728,     # 128 MiB of the file mapped
+    'cache_size': -20000,       # negative: KiB of page cache per connection
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Account / PasswordResetOTP reads go to the ACCOUNTS_READ_REPLICA alias of
+# DATABASES (None: everything on default), writes to default; a request that
+# writes reads from default from then on, and so does the same client for
+# ACCOUNTS_REPLICA_PIN_SECONDS (cookie, same-origin clients only). Reset
+# tokens and gmails just written are pinned for as long in the
+# ACCOUNTS_REPLICA_PIN_CACHE cache, which covers cross-origin clients too; it
+# must be shared by all app servers. See accounts/routers.py, also for a
+# local replica on a second SQLite file.
+DATABASE_ROUTERS = ['accounts.routers.ReplicaRouter']
+ACCOUNTS_READ_REPLICA = None
+ACCOUNTS_REPLICA_PIN_SECONDS = 5
+ACCOUNTS_REPLICA_PIN_CACHE = 'default'
+
+
+# Password hashing: cost parameters come from settings (accounts/hashers.py);
+# run `manage.py calibrate_hashers --target-ms N` to pick them for this host.
+# None keeps Django's default. Outdated hashes are upgraded on login.
+
+PASSWORD_HASHERS = [
+    'accounts.hashers.CalibratedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'accounts.hashers.CalibratedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'accounts.hashers.CalibratedScryptPasswordHasher',
+]
+PASSWORD_HASHER_PBKDF2_ITERATIONS = None
+PASSWORD_HASHER_SCRYPT_WORK_FACTOR = None
+PASSWORD_HASHER_ARGON2_TIME_COST = None
+
+
+# Cache shared by all worker processes on the host (OTP rate limits etc.),
+# see accounts/cache.py
+
+CACHES = {
+    'default': {
+        'BACKEND': 'accounts.cache.SQLiteCache',
+        'LOCATION': BASE_DIR / 'cache.sqlite3',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100_000,
+        },
+    },
+    # OTP hot tier (accounts/otp_store.py), kept apart from the rate-limit and
+    # replica-pin keys so their churn does not cull OTP state
+    'otp': {
+        'BACKEND': 'accounts.cache.SQLiteCache',
+        'LOCATION': BASE_DIR / 'cache_otp.sqlite3',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100_000,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -153,7 +231,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachingJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
@@ -169,4 +247,79 @@ DEFAULT_FROM_EMAIL = "Your App <no-reply@yourdomain.com>"
 
 
 PASSWORD_RESET_OTP_EXPIRY_MINUTES = 10
+
+# OTP emails go through the outbox (accounts/outbox.py) and are sent by a
+# background thread pool (accounts/mail.py); `manage.py drain_outbox` retries
+OTP_EMAIL_ASYNC = True
+OTP_EMAIL_WORKERS = 2
+OTP_EMAIL_QUEUE_SIZE = 1000
+OTP_EMAIL_IDLE_SECONDS = 30
+OTP_EMAIL_CLAIM_SECONDS = 300
+OTP_EMAIL_MAX_ATTEMPTS = 5
+OTP_EMAIL_RETRY_BASE_SECONDS = 30
+OTP_EMAIL_RETRY_MAX_SECONDS = 3600
+OTP_EMAIL_BULK_BATCH_SIZE = 100  # emails per claim in bulk dispatch (admin action)
+
+# Serve OTP verify/reset from the OTP cache instead of the database
+# (accounts/otp_store.py). Off by default: the database is the source of
+# truth; with OTP_STORE_WRITE_BEHIND the verified / superseded flags of
+# PasswordResetOTP rows also lag the cache by up to one background flush
+OTP_HOT_STORE = False
+OTP_STORE_WRITE_BEHIND = False
+OTP_STORE_QUEUE_SIZE = 10000
+OTP_STORE_CACHE = 'otp'
+
+# Serve accounts/ with the native async views (accounts/async_views.py) under ASGI
+ACCOUNTS_ASYNC_VIEWS = False
+
+# Structured JSON-lines event log of the accounts endpoints (accounts/events.py):
+# written from a background thread, sensitive fields redacted, INFO sampled
+ACCOUNTS_EVENT_SAMPLE_RATE = 1.0
+ACCOUNTS_EVENT_LOG_FILE = None  # None: stderr
+
+# Per-URL-name / per-phase latency histograms (accounts/metrics.py), summed
+# across workers through per-process snapshot files and served in Prometheus
+# text format at /api/accounts/metrics/ to scrapers that send
+# "Authorization: Bearer <ACCOUNTS_METRICS_TOKEN>" (404 while it is unset)
+ACCOUNTS_METRICS_ENABLED = True
+ACCOUNTS_METRICS_DIR = BASE_DIR / '.metrics'
+ACCOUNTS_METRICS_FLUSH_SECONDS = 1.0
+ACCOUNTS_METRICS_RETAIN_SECONDS = 86400
+ACCOUNTS_METRICS_TOKEN = None
+
+# SQL budgets per accounts URL name (accounts/query_budget.py), enforced by
+# accounts/tests.py; add 'accounts.query_budget.QueryBudgetMiddleware' to
+# MIDDLEWARE to check them on every request while DEBUG is on
+ACCOUNTS_QUERY_BUDGETS = {}  # overrides, e.g. {"login": {"queries": 1, "ms": 50}}
+ACCOUNTS_QUERY_BUDGETS_STRICT = False  # fail the request instead of logging
+
+# Per-process caches of accounts.authentication.CachingJWTAuthentication:
+# verified access tokens (until their exp) and accounts by id. The account
+# cache is off (0 seconds): a change made in one worker process, e.g. a
+# password reset, reaches the others only when their entry expires
+ACCOUNTS_JWT_TOKEN_CACHE_SIZE = 10000
+ACCOUNTS_JWT_USER_CACHE_SIZE = 10000
+ACCOUNTS_JWT_USER_CACHE_SECONDS = 0
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "accounts_events": {
+            "class": "accounts.events.QueueJSONHandler",
+            "filename": ACCOUNTS_EVENT_LOG_FILE,
+            "queue_size": 10000,
+        },
+    },
+    "loggers": {
+        "accounts.events": {"handlers": ["accounts_events"], "level": "INFO", "propagate": False},
+    },
+}
+
+# Run PBKDF2 hash/verify calls in a process pool (accounts/hashing.py)
+PASSWORD_HASHING_POOL = False
+PASSWORD_HASHING_POOL_WORKERS = None  # default: os.cpu_count()
+PASSWORD_HASHING_POOL_MAX_PENDING = None  # default: 4 x workers
+PASSWORD_HASHING_POOL_TIMEOUT = 5
+
 AUTH_USER_MODEL = 'accounts.Account'
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""
+Lean settings for processes that only serve the JSON API (api/accounts/).
+
+    DJANGO_SETTINGS_MODULE=myproject.settings_api gunicorn myproject.wsgi
+
+Everything in myproject.settings except what the API never uses, so a fresh
+worker gets to its first response sooner (compare with
+`manage.py profile_startup --settings myproject.settings_api`):
+
+ - admin, messages, sessions and staticfiles are not installed and their
+   middleware is dropped (auth's AuthenticationMiddleware too, it needs
+   sessions; the API authenticates through DRF)
+ - the URLconf has no admin/ (myproject/urls_api.py)
+ - DRF renders JSON only, no browsable API templates
+
+Serve the admin and run migrations with myproject.settings; the schema is
+the same.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK, TEMPLATES
+
+NOT_FOR_API = (
+    'django.contrib.admin',
+    'django.contrib.messages',
+    'django.contrib.sessions',
+    'django.contrib.staticfiles',
+)
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in NOT_FOR_API]
+
+MIDDLEWARE = [
+    name for name in MIDDLEWARE
+    if name not in (
+        'django.contrib.sessions.middleware.SessionMiddleware',
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+        'django.contrib.messages.middleware.MessageMiddleware',
+    )
+]
+
+ROOT_URLCONF = 'myproject.urls_api'
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'OPTIONS': {
+            'context_processors': ['django.template.context_processors.request'],
+        },
+    },
+]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ('rest_framework.renderers.JSONRenderer',),
+}
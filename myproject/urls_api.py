@@ -0,0 +1,8 @@
+"""
+URL configuration of myproject.settings_api: the accounts API without the admin.
+"""
+from django.urls import path, include
+
+urlpatterns = [
+    path('api/accounts/', include('accounts.urls')),
+]